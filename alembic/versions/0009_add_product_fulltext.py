@@ -0,0 +1,68 @@
+"""add product full-text search index
+
+Revision ID: 0009_fulltext
+Revises: 0008_slug
+Create Date: 2025-08-20
+
+Postgres: generated tsvector column (title weighted above description) + GIN index.
+SQLite: external-content FTS5 table kept in sync with products by triggers.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0009_fulltext'
+down_revision = '0008_slug'
+branch_labels = None
+depends_on = None
+
+SQLITE_TRIGGERS = [
+	"""CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN
+		INSERT INTO products_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+	END""",
+	"""CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN
+		INSERT INTO products_fts(products_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+	END""",
+	"""CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE OF title, description ON products BEGIN
+		INSERT INTO products_fts(products_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+		INSERT INTO products_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+	END""",
+]
+
+
+def upgrade() -> None:
+	bind = op.get_bind()
+	inspector = sa.inspect(bind)
+	if bind.dialect.name == 'postgresql':
+		cols = {c['name'] for c in inspector.get_columns('products')}
+		if 'search_vector' not in cols:
+			op.execute(
+				"ALTER TABLE products ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+				"setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+				"setweight(to_tsvector('simple', coalesce(description, '')), 'B')) STORED"
+			)
+		op.execute("CREATE INDEX IF NOT EXISTS ix_products_search_vector ON products USING gin (search_vector)")
+	elif bind.dialect.name == 'sqlite':
+		try:
+			if 'products_fts' not in inspector.get_table_names():
+				op.execute(
+					"CREATE VIRTUAL TABLE products_fts USING fts5("
+					"title, description, content='products', content_rowid='id', "
+					"tokenize='unicode61 remove_diacritics 2')"
+				)
+			for ddl in SQLITE_TRIGGERS:
+				op.execute(ddl)
+			op.execute("INSERT INTO products_fts(products_fts) VALUES ('rebuild')")
+		except Exception:
+			# SQLite built without FTS5: search keeps using the ILIKE fallback
+			pass
+
+
+def downgrade() -> None:
+	bind = op.get_bind()
+	if bind.dialect.name == 'postgresql':
+		op.execute("DROP INDEX IF EXISTS ix_products_search_vector")
+		op.execute("ALTER TABLE products DROP COLUMN IF EXISTS search_vector")
+	elif bind.dialect.name == 'sqlite':
+		for name in ('products_fts_ai', 'products_fts_ad', 'products_fts_au'):
+			op.execute(f"DROP TRIGGER IF EXISTS {name}")
+		op.execute("DROP TABLE IF EXISTS products_fts")
@@ -0,0 +1,30 @@
+"""add category updated_at
+
+Revision ID: 0010_category_updated_at
+Revises: 0009_fulltext
+Create Date: 2025-08-22
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0010_cat_updated_at'
+down_revision = '0009_fulltext'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+	bind = op.get_bind()
+	inspector = sa.inspect(bind)
+	cols = {c['name'] for c in inspector.get_columns('categories')}
+	if 'updated_at' not in cols:
+		# Nullable without server default so SQLite can add it in place
+		op.add_column('categories', sa.Column('updated_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+	try:
+		op.drop_column('categories', 'updated_at')
+	except Exception:
+		pass
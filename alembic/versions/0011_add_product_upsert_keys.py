@@ -0,0 +1,49 @@
+"""unique upsert keys on products (slug, source_url)
+
+Revision ID: 0011_upsert_keys
+Revises: 0010_cat_updated_at
+Create Date: 2025-08-25
+
+Partial unique indexes (NULLs excluded) so bulk import can use
+INSERT ... ON CONFLICT on either column. If existing data already has
+duplicates the index is skipped with a warning; imports keyed on that
+column will then report per-batch errors until the duplicates are fixed.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0011_upsert_keys'
+down_revision = '0010_cat_updated_at'
+branch_labels = None
+depends_on = None
+
+UPSERT_KEYS = {
+	'ux_products_slug': 'slug',
+	'ux_products_source_url': 'source_url',
+}
+
+
+def upgrade() -> None:
+	bind = op.get_bind()
+	inspector = sa.inspect(bind)
+	indexes = {ix['name'] for ix in inspector.get_indexes('products')}
+	for name, col in UPSERT_KEYS.items():
+		if name in indexes:
+			continue
+		dupes = bind.execute(sa.text(
+			f"SELECT COUNT(*) FROM (SELECT {col} FROM products WHERE {col} IS NOT NULL GROUP BY {col} HAVING COUNT(*) > 1) d"
+		)).scalar()
+		if dupes:
+			print(f"WARNING: {dupes} duplicate products.{col} values, skipping unique index {name}")
+			continue
+		op.create_index(name, 'products', [col], unique=True,
+			postgresql_where=sa.text(f'{col} IS NOT NULL'),
+			sqlite_where=sa.text(f'{col} IS NOT NULL'))
+
+
+def downgrade() -> None:
+	for name in UPSERT_KEYS:
+		try:
+			op.drop_index(name, table_name='products')
+		except Exception:
+			pass
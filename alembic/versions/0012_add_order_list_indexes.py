@@ -0,0 +1,40 @@
+"""indexes for keyset order listing and filters
+
+Revision ID: 0012_order_indexes
+Revises: 0011_upsert_keys
+Create Date: 2025-08-27
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0012_order_indexes'
+down_revision = '0011_upsert_keys'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+	('ix_orders_created_at_id', 'orders', ['created_at', 'id']),
+	('ix_orders_status', 'orders', ['status']),
+	('ix_orders_customer_id', 'orders', ['customer_id']),
+	# email filter compares lower(shipping_email)
+	('ix_orders_shipping_email_lower', 'orders', [sa.text('lower(shipping_email)')]),
+	# selectinload(Order.items) filters order_items by order_id
+	('ix_order_items_order_id', 'order_items', ['order_id']),
+]
+
+
+def upgrade() -> None:
+	bind = op.get_bind()
+	inspector = sa.inspect(bind)
+	for name, table, cols in INDEXES:
+		if name not in {ix['name'] for ix in inspector.get_indexes(table)}:
+			op.create_index(name, table, cols)
+
+
+def downgrade() -> None:
+	for name, table, _ in INDEXES:
+		try:
+			op.drop_index(name, table_name=table)
+		except Exception:
+			pass
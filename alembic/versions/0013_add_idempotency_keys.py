@@ -0,0 +1,42 @@
+"""add idempotency_keys table
+
+Revision ID: 0013_idempotency
+Revises: 0012_order_indexes
+Create Date: 2025-08-29
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0013_idempotency'
+down_revision = '0012_order_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+	bind = op.get_bind()
+	inspector = sa.inspect(bind)
+	if 'idempotency_keys' not in inspector.get_table_names():
+		op.create_table(
+			'idempotency_keys',
+			sa.Column('id', sa.Integer(), primary_key=True),
+			sa.Column('scope', sa.String(length=64), nullable=False),
+			sa.Column('key', sa.String(length=255), nullable=False),
+			sa.Column('request_hash', sa.String(length=64), nullable=False),
+			sa.Column('status', sa.String(length=20), nullable=False),
+			sa.Column('response_status', sa.Integer(), nullable=True),
+			sa.Column('response_body', sa.Text(), nullable=True),
+			sa.Column('created_at', sa.DateTime(), nullable=False),
+			sa.Column('expires_at', sa.DateTime(), nullable=False),
+			sa.UniqueConstraint('scope', 'key', name='uq_idempotency_scope_key'),
+		)
+		op.create_index('ix_idempotency_keys_expires_at', 'idempotency_keys', ['expires_at'])
+
+
+def downgrade() -> None:
+	try:
+		op.drop_index('ix_idempotency_keys_expires_at', table_name='idempotency_keys')
+	except Exception:
+		pass
+	op.drop_table('idempotency_keys')
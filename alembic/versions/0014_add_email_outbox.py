@@ -0,0 +1,44 @@
+"""add email_outbox table
+
+Revision ID: 0014_email_outbox
+Revises: 0013_idempotency
+Create Date: 2025-09-01
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0014_email_outbox'
+down_revision = '0013_idempotency'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+	bind = op.get_bind()
+	inspector = sa.inspect(bind)
+	if 'email_outbox' not in inspector.get_table_names():
+		op.create_table(
+			'email_outbox',
+			sa.Column('id', sa.Integer(), primary_key=True),
+			sa.Column('recipients', sa.Text(), nullable=False),
+			sa.Column('subject', sa.String(length=255), nullable=False),
+			sa.Column('html', sa.Text(), nullable=False),
+			sa.Column('from_email', sa.String(length=190), nullable=True),
+			sa.Column('from_name', sa.String(length=160), nullable=True),
+			sa.Column('status', sa.String(length=20), nullable=False),
+			sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+			sa.Column('next_attempt_at', sa.DateTime(), nullable=False),
+			sa.Column('last_error', sa.Text(), nullable=True),
+			sa.Column('created_at', sa.DateTime(), nullable=False),
+			sa.Column('sent_at', sa.DateTime(), nullable=True),
+		)
+		op.create_index('ix_email_outbox_status_next_attempt', 'email_outbox', ['status', 'next_attempt_at'])
+
+
+def downgrade() -> None:
+	try:
+		op.drop_index('ix_email_outbox_status_next_attempt', table_name='email_outbox')
+	except Exception:
+		pass
+	op.drop_table('email_outbox')
@@ -0,0 +1,32 @@
+"""add settings_version counter
+
+Revision ID: 0015_settings_version
+Revises: 0014_email_outbox
+Create Date: 2025-09-02
+
+"""
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0015_settings_version'
+down_revision = '0014_email_outbox'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+	bind = op.get_bind()
+	inspector = sa.inspect(bind)
+	if 'settings_version' not in inspector.get_table_names():
+		table = op.create_table(
+			'settings_version',
+			sa.Column('id', sa.Integer(), primary_key=True),
+			sa.Column('version', sa.Integer(), nullable=False, server_default='1'),
+			sa.Column('updated_at', sa.DateTime(), nullable=False),
+		)
+		op.bulk_insert(table, [{'id': 1, 'version': 1, 'updated_at': datetime.utcnow()}])
+
+
+def downgrade() -> None:
+	op.drop_table('settings_version')
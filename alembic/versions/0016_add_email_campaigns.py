@@ -0,0 +1,49 @@
+"""add email_campaigns table
+
+Revision ID: 0016_email_campaigns
+Revises: 0015_settings_version
+Create Date: 2025-09-03
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0016_email_campaigns'
+down_revision = '0015_settings_version'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+	bind = op.get_bind()
+	inspector = sa.inspect(bind)
+	if 'email_campaigns' not in inspector.get_table_names():
+		op.create_table(
+			'email_campaigns',
+			sa.Column('id', sa.Integer(), primary_key=True),
+			sa.Column('name', sa.String(length=160), nullable=False),
+			sa.Column('subject', sa.String(length=255), nullable=False),
+			sa.Column('html', sa.Text(), nullable=False),
+			sa.Column('segment', sa.String(length=20), nullable=False, server_default='customers'),
+			sa.Column('order_status', sa.String(length=20), nullable=True),
+			sa.Column('rate_per_second', sa.Float(), nullable=False, server_default='5'),
+			sa.Column('concurrency', sa.Integer(), nullable=False, server_default='2'),
+			sa.Column('status', sa.String(length=20), nullable=False, server_default='draft'),
+			sa.Column('cursor', sa.String(length=190), nullable=True),
+			sa.Column('sent_count', sa.Integer(), nullable=False, server_default='0'),
+			sa.Column('failed_count', sa.Integer(), nullable=False, server_default='0'),
+			sa.Column('last_error', sa.Text(), nullable=True),
+			sa.Column('created_at', sa.DateTime(), nullable=False),
+			sa.Column('started_at', sa.DateTime(), nullable=True),
+			sa.Column('finished_at', sa.DateTime(), nullable=True),
+			sa.Column('updated_at', sa.DateTime(), nullable=False),
+		)
+		op.create_index('ix_email_campaigns_status', 'email_campaigns', ['status'])
+
+
+def downgrade() -> None:
+	try:
+		op.drop_index('ix_email_campaigns_status', table_name='email_campaigns')
+	except Exception:
+		pass
+	op.drop_table('email_campaigns')
@@ -0,0 +1,38 @@
+"""add chat inbox/message paging indexes
+
+Revision ID: 0017_chat_indexes
+Revises: 0016_email_campaigns
+Create Date: 2025-09-04
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0017_chat_indexes'
+down_revision = '0016_email_campaigns'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+	# inbox keyset: ORDER BY last_activity_at DESC, id DESC
+	('ix_chat_sessions_last_activity_id', 'chat_sessions', ['last_activity_at', 'id']),
+	# per-session windows and before_id/after_id paging
+	('ix_chat_messages_session_id_id', 'chat_messages', ['session_id', 'id']),
+]
+
+
+def upgrade() -> None:
+	bind = op.get_bind()
+	inspector = sa.inspect(bind)
+	for name, table, cols in INDEXES:
+		if name not in {ix['name'] for ix in inspector.get_indexes(table)}:
+			op.create_index(name, table, cols)
+
+
+def downgrade() -> None:
+	for name, table, _ in INDEXES:
+		try:
+			op.drop_index(name, table_name=table)
+		except Exception:
+			pass
@@ -0,0 +1,42 @@
+"""add ai_suggestion_cache table
+
+Revision ID: 0018_ai_suggestion_cache
+Revises: 0017_chat_indexes
+Create Date: 2025-09-05
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0018_ai_suggestion_cache'
+down_revision = '0017_chat_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+	bind = op.get_bind()
+	inspector = sa.inspect(bind)
+	if 'ai_suggestion_cache' not in inspector.get_table_names():
+		op.create_table(
+			'ai_suggestion_cache',
+			sa.Column('key', sa.String(length=64), primary_key=True),
+			sa.Column('model', sa.String(length=64), nullable=False),
+			sa.Column('prompt_version', sa.String(length=20), nullable=False),
+			sa.Column('response', sa.Text(), nullable=False),
+			sa.Column('hits', sa.Integer(), nullable=False, server_default='0'),
+			sa.Column('created_at', sa.DateTime(), nullable=False),
+			sa.Column('last_used_at', sa.DateTime(), nullable=False),
+			sa.Column('expires_at', sa.DateTime(), nullable=False),
+		)
+		op.create_index('ix_ai_suggestion_cache_last_used_at', 'ai_suggestion_cache', ['last_used_at'])
+		op.create_index('ix_ai_suggestion_cache_expires_at', 'ai_suggestion_cache', ['expires_at'])
+
+
+def downgrade() -> None:
+	for name in ('ix_ai_suggestion_cache_expires_at', 'ix_ai_suggestion_cache_last_used_at'):
+		try:
+			op.drop_index(name, table_name='ai_suggestion_cache')
+		except Exception:
+			pass
+	op.drop_table('ai_suggestion_cache')
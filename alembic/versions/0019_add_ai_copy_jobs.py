@@ -0,0 +1,51 @@
+"""add ai_copy_jobs table
+
+Revision ID: 0019_ai_copy_jobs
+Revises: 0018_ai_suggestion_cache
+Create Date: 2025-09-06
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0019_ai_copy_jobs'
+down_revision = '0018_ai_suggestion_cache'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+	bind = op.get_bind()
+	inspector = sa.inspect(bind)
+	if 'ai_copy_jobs' not in inspector.get_table_names():
+		op.create_table(
+			'ai_copy_jobs',
+			sa.Column('id', sa.Integer(), primary_key=True),
+			sa.Column('category_id', sa.Integer(), nullable=True),
+			sa.Column('drafts_only', sa.Boolean(), nullable=False, server_default=sa.text('false')),
+			sa.Column('missing_description', sa.Boolean(), nullable=False, server_default=sa.text('true')),
+			sa.Column('language', sa.String(length=10), nullable=False, server_default='sq'),
+			sa.Column('tone', sa.String(length=80), nullable=True),
+			sa.Column('update_title', sa.Boolean(), nullable=False, server_default=sa.text('false')),
+			sa.Column('concurrency', sa.Integer(), nullable=False, server_default='4'),
+			sa.Column('status', sa.String(length=20), nullable=False, server_default='draft'),
+			sa.Column('cursor', sa.Integer(), nullable=True),
+			sa.Column('total', sa.Integer(), nullable=False, server_default='0'),
+			sa.Column('processed_count', sa.Integer(), nullable=False, server_default='0'),
+			sa.Column('updated_count', sa.Integer(), nullable=False, server_default='0'),
+			sa.Column('failed_count', sa.Integer(), nullable=False, server_default='0'),
+			sa.Column('last_error', sa.Text(), nullable=True),
+			sa.Column('created_at', sa.DateTime(), nullable=False),
+			sa.Column('started_at', sa.DateTime(), nullable=True),
+			sa.Column('finished_at', sa.DateTime(), nullable=True),
+			sa.Column('updated_at', sa.DateTime(), nullable=False),
+		)
+		op.create_index('ix_ai_copy_jobs_status', 'ai_copy_jobs', ['status'])
+
+
+def downgrade() -> None:
+	try:
+		op.drop_index('ix_ai_copy_jobs_status', table_name='ai_copy_jobs')
+	except Exception:
+		pass
+	op.drop_table('ai_copy_jobs')
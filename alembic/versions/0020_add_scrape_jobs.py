@@ -0,0 +1,45 @@
+"""add scrape_jobs table
+
+Revision ID: 0020_scrape_jobs
+Revises: 0019_ai_copy_jobs
+Create Date: 2025-09-07
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0020_scrape_jobs'
+down_revision = '0019_ai_copy_jobs'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+	bind = op.get_bind()
+	inspector = sa.inspect(bind)
+	if 'scrape_jobs' not in inspector.get_table_names():
+		op.create_table(
+			'scrape_jobs',
+			sa.Column('id', sa.Integer(), primary_key=True),
+			sa.Column('urls', sa.Text(), nullable=False),
+			sa.Column('price_eur', sa.Numeric(10, 2), nullable=True),
+			sa.Column('category_id', sa.Integer(), nullable=True),
+			sa.Column('status', sa.String(length=20), nullable=False, server_default='running'),
+			sa.Column('total', sa.Integer(), nullable=False, server_default='0'),
+			sa.Column('processed_count', sa.Integer(), nullable=False, server_default='0'),
+			sa.Column('saved_count', sa.Integer(), nullable=False, server_default='0'),
+			sa.Column('failed_count', sa.Integer(), nullable=False, server_default='0'),
+			sa.Column('errors', sa.Text(), nullable=True),
+			sa.Column('created_at', sa.DateTime(), nullable=False),
+			sa.Column('finished_at', sa.DateTime(), nullable=True),
+			sa.Column('updated_at', sa.DateTime(), nullable=False),
+		)
+		op.create_index('ix_scrape_jobs_status', 'scrape_jobs', ['status'])
+
+
+def downgrade() -> None:
+	try:
+		op.drop_index('ix_scrape_jobs_status', table_name='scrape_jobs')
+	except Exception:
+		pass
+	op.drop_table('scrape_jobs')
@@ -0,0 +1,33 @@
+"""add catalog_versions counters
+
+Revision ID: 0021_catalog_versions
+Revises: 0020_scrape_jobs
+Create Date: 2025-09-08
+
+"""
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0021_catalog_versions'
+down_revision = '0020_scrape_jobs'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+	bind = op.get_bind()
+	inspector = sa.inspect(bind)
+	if 'catalog_versions' not in inspector.get_table_names():
+		table = op.create_table(
+			'catalog_versions',
+			sa.Column('name', sa.String(length=20), primary_key=True),
+			sa.Column('version', sa.Integer(), nullable=False, server_default='1'),
+			sa.Column('changed_at', sa.DateTime(), nullable=False),
+		)
+		now = datetime.utcnow()
+		op.bulk_insert(table, [{'name': name, 'version': 1, 'changed_at': now} for name in ('products', 'categories')])
+
+
+def downgrade() -> None:
+	op.drop_table('catalog_versions')
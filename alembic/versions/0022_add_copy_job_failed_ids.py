@@ -0,0 +1,29 @@
+"""add ai_copy_jobs.failed_ids
+
+Revision ID: 0022_copy_job_failed_ids
+Revises: 0021_catalog_versions
+Create Date: 2025-09-10
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0022_copy_job_failed_ids'
+down_revision = '0021_catalog_versions'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+	bind = op.get_bind()
+	inspector = sa.inspect(bind)
+	cols = {c['name'] for c in inspector.get_columns('ai_copy_jobs')}
+	if 'failed_ids' not in cols:
+		op.add_column('ai_copy_jobs', sa.Column('failed_ids', sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+	try:
+		op.drop_column('ai_copy_jobs', 'failed_ids')
+	except Exception:
+		pass
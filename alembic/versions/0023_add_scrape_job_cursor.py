@@ -0,0 +1,29 @@
+"""add scrape_jobs.cursor
+
+Revision ID: 0023_scrape_job_cursor
+Revises: 0022_copy_job_failed_ids
+Create Date: 2025-09-10
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0023_scrape_job_cursor'
+down_revision = '0022_copy_job_failed_ids'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+	bind = op.get_bind()
+	inspector = sa.inspect(bind)
+	cols = {c['name'] for c in inspector.get_columns('scrape_jobs')}
+	if 'cursor' not in cols:
+		op.add_column('scrape_jobs', sa.Column('cursor', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+	try:
+		op.drop_column('scrape_jobs', 'cursor')
+	except Exception:
+		pass
@@ -0,0 +1,37 @@
+"""add product listing keyset indexes
+
+Revision ID: 0024_product_sort_indexes
+Revises: 0023_scrape_job_cursor
+Create Date: 2025-09-11
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0024_product_sort_indexes'
+down_revision = '0023_scrape_job_cursor'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+	# product keyset: ORDER BY <sort column>, id (PRODUCT_SORTS); 'newest' rides the primary key
+	('ix_products_price_eur_id', 'products', ['price_eur', 'id']),
+	('ix_products_title_id', 'products', ['title', 'id']),
+]
+
+
+def upgrade() -> None:
+	bind = op.get_bind()
+	inspector = sa.inspect(bind)
+	for name, table, cols in INDEXES:
+		if name not in {ix['name'] for ix in inspector.get_indexes(table)}:
+			op.create_index(name, table, cols)
+
+
+def downgrade() -> None:
+	for name, table, _ in INDEXES:
+		try:
+			op.drop_index(name, table_name=table)
+		except Exception:
+			pass
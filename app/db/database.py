@@ -1,3 +1,5 @@
+from typing import Callable, TypeVar
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy import create_engine
 from urllib.parse import urlparse
 import sys
@@ -34,3 +36,17 @@ def get_db():
         yield db
     finally:
         db.close()
+
+T = TypeVar("T")
+
+async def run_db(fn: Callable[..., T], *args, **kwargs) -> T:
+    """Run `fn(db, *args, **kwargs)` with its own session on the threadpool.
+
+    For DB work inside `async def` routes: the session is opened, used and closed on a
+    worker thread, so a slow query never stalls the event loop. Don't pass ORM objects
+    back into another session; return plain values or detached rows.
+    """
+    def call() -> T:
+        with SessionLocal() as db:
+            return fn(db, *args, **kwargs)
+    return await run_in_threadpool(call)
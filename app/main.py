@@ -1,3 +1,4 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import get_settings
@@ -12,6 +13,8 @@ from sqlalchemy import text
 from app.db.database import get_db
 from app.dependencies import get_current_admin
 from app.models.admin import AdminSetting
+from app.services import ai_copy_jobs, campaign_service, http_clients, loop_monitor, outbox_service, scrape_jobs, scraper, settings_service, smtp_pool
+from app.services.chat_hub import hub as chat_hub
 from app.schemas.settings import AdminSettingCreate, AdminSettingOut
 from typing import List
 from fastapi import HTTPException
@@ -19,7 +22,33 @@ from app.models.admin import AdminSetting
 
 settings = get_settings()
 
-app = FastAPI(title=settings.APP_NAME, debug=settings.DEBUG)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # background delivery of queued transactional emails
+    if settings.EMAIL_OUTBOX_WORKER:
+        outbox_service.worker.start()
+    # campaigns, batch AI copy and bulk scrape jobs interrupted by a restart continue
+    # from their last checkpoint
+    if settings.CAMPAIGN_RESUME_ON_STARTUP:
+        campaign_service.resume_interrupted()
+    if settings.AI_COPY_RESUME_ON_STARTUP:
+        ai_copy_jobs.resume_interrupted()
+    if settings.SCRAPE_RESUME_ON_STARTUP:
+        scrape_jobs.resume_interrupted()
+    # cross-worker chat fan-out (LISTEN/NOTIFY on Postgres, a no-op in memory)
+    chat_hub().start()
+    # pooled keep-alive connections for outbound API calls
+    await http_clients.startup()
+    # DEBUG: log blocking calls that stall the event loop
+    loop_monitor.start()
+    yield
+    await loop_monitor.stop()
+    await http_clients.shutdown()
+    scraper.shutdown_pool()
+    chat_hub().stop()
+    outbox_service.worker.stop()
+
+app = FastAPI(title=settings.APP_NAME, debug=settings.DEBUG, lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -27,6 +56,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Last-Modified", "X-Next-Cursor"],
 )
 
 app.include_router(auth.router, prefix=settings.API_V1_PREFIX)
@@ -49,22 +79,18 @@ def list_settings(db: Session = Depends(get_db), admin=Depends(get_current_admin
 
 @app.post(f"{settings.API_V1_PREFIX}/settings/", response_model=AdminSettingOut)
 def upsert_setting(payload: AdminSettingCreate, db: Session = Depends(get_db), admin=Depends(get_current_admin)):
-    setting = db.query(AdminSetting).filter(AdminSetting.key == payload.key).first()
-    if setting:
-        setting.value = payload.value
-    else:
-        setting = AdminSetting(key=payload.key, value=payload.value)
-        db.add(setting)
-    db.commit()
-    db.refresh(setting)
+    setting = settings_service.set_setting(db, payload.key, payload.value)
+    if payload.key.startswith("smtp_"):
+        # pooled sessions were opened with the old credentials
+        smtp_pool.reset()
     return setting
 
 OPENAI_KEY_NAME = "OPENAI_API_KEY"
 
 @app.get(f"{settings.API_V1_PREFIX}/openai/key")
-def get_openai_key(db: Session = Depends(get_db), admin=Depends(get_current_admin)):
-    s = db.query(AdminSetting).filter(AdminSetting.key == OPENAI_KEY_NAME).first()
-    return {"exists": bool(s and s.value), "masked": bool(s and s.value), "last4": (s.value[-4:] if s and s.value and len(s.value) >=4 else None)}
+def get_openai_key(admin=Depends(get_current_admin)):
+    value = settings_service.get_setting(OPENAI_KEY_NAME)
+    return {"exists": bool(value), "masked": bool(value), "last4": (value[-4:] if value and len(value) >=4 else None)}
 
 class OpenAIKeyIn(AdminSettingCreate):
     pass
@@ -73,13 +99,7 @@ class OpenAIKeyIn(AdminSettingCreate):
 def set_openai_key(payload: OpenAIKeyIn, db: Session = Depends(get_db), admin=Depends(get_current_admin)):
     if payload.key != OPENAI_KEY_NAME:
         raise HTTPException(status_code=400, detail="Key name must be OPENAI_API_KEY")
-    setting = db.query(AdminSetting).filter(AdminSetting.key == OPENAI_KEY_NAME).first()
-    if setting:
-        setting.value = payload.value
-    else:
-        setting = AdminSetting(key=OPENAI_KEY_NAME, value=payload.value)
-        db.add(setting)
-    db.commit()
+    settings_service.set_setting(db, OPENAI_KEY_NAME, payload.value)
     return {"ok": True}
 
 @app.get("/")
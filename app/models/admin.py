@@ -32,6 +32,15 @@ class AdminSetting(Base):
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
 
+class SettingsVersion(Base):
+    """Single-row counter bumped on every admin settings write; workers poll it to refresh their snapshot."""
+    __tablename__ = "settings_version"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=1)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+
 class RefreshToken(Base):
     __tablename__ = "refresh_tokens"
 
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text
+from datetime import datetime
+from app.db.database import Base
+
+class AiSuggestionCache(Base):
+    """Stored OpenAI copy suggestions keyed by a hash of the normalized request."""
+    __tablename__ = "ai_suggestion_cache"
+
+    key = Column(String(64), primary_key=True)  # sha256 of normalized input + model + prompt version
+    model = Column(String(64), nullable=False)
+    prompt_version = Column(String(20), nullable=False)
+    response = Column(Text, nullable=False)  # JSON of SuggestOutput
+    hits = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    last_used_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)  # LRU eviction order
+    expires_at = Column(DateTime, nullable=False, index=True)
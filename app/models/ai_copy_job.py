@@ -0,0 +1,33 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean
+from datetime import datetime
+from app.db.database import Base
+
+class AiCopyJob(Base):
+    """Batch AI copy generation over a product filter; `cursor` and the counters are checkpointed while it runs."""
+    __tablename__ = "ai_copy_jobs"
+
+    id = Column(Integer, primary_key=True)
+    # product filter
+    category_id = Column(Integer, nullable=True)
+    drafts_only = Column(Boolean, nullable=False, default=False)
+    missing_description = Column(Boolean, nullable=False, default=True)
+    # generation options
+    language = Column(String(10), nullable=False, default="sq")
+    tone = Column(String(80), nullable=True)
+    update_title = Column(Boolean, nullable=False, default=False)
+    concurrency = Column(Integer, nullable=False, default=4)
+    status = Column(String(20), nullable=False, default="draft", index=True)  # draft | running | paused | completed | failed
+    # id of the last product below which everything has been handled
+    cursor = Column(Integer, nullable=True)
+    total = Column(Integer, nullable=False, default=0)
+    processed_count = Column(Integer, nullable=False, default=0)
+    updated_count = Column(Integer, nullable=False, default=0)
+    failed_count = Column(Integer, nullable=False, default=0)
+    # JSON list of product ids whose generation failed; retried when the job is started again
+    failed_ids = Column(Text, nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    # heartbeat while running; a running job with a stale heartbeat is resumed by another worker
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
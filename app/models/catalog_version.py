@@ -0,0 +1,11 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from datetime import datetime
+from app.db.database import Base
+
+class CatalogVersion(Base):
+    """Per-resource write counters ("products", "categories") behind the catalog ETag/Last-Modified validators."""
+    __tablename__ = "catalog_versions"
+
+    name = Column(String(20), primary_key=True)
+    version = Column(Integer, nullable=False, default=1)
+    changed_at = Column(DateTime, default=datetime.utcnow, nullable=False)
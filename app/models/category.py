@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Integer, String, DateTime
+from datetime import datetime
 from app.db.database import Base
 
 class Category(Base):
@@ -7,3 +8,5 @@ class Category(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(160), unique=True, nullable=False)
     slug = Column(String(160), unique=True, index=True, nullable=False)
+    # Nullable for rows created before migration 0010; drives ETag/Last-Modified
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=True)
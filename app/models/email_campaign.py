@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, Float
+from datetime import datetime
+from app.db.database import Base
+
+class EmailCampaign(Base):
+    """Bulk email to a customer segment; `cursor` and the counters are checkpointed while it runs."""
+    __tablename__ = "email_campaigns"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String(160), nullable=False)
+    subject = Column(String(255), nullable=False)  # Jinja template
+    html = Column(Text, nullable=False)  # Jinja template, rendered per recipient
+    segment = Column(String(20), nullable=False, default="customers")  # customers | orders
+    order_status = Column(String(20), nullable=True)  # orders segment: only orders in this status
+    rate_per_second = Column(Float, nullable=False, default=5.0)
+    concurrency = Column(Integer, nullable=False, default=2)
+    status = Column(String(20), nullable=False, default="draft", index=True)  # draft | running | paused | completed | failed
+    # lower-cased email of the last recipient below which everything has been handled
+    cursor = Column(String(190), nullable=True)
+    sent_count = Column(Integer, nullable=False, default=0)
+    failed_count = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    # heartbeat while running; a running campaign with a stale heartbeat is resumed by another worker
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
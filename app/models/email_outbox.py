@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, Index
+from datetime import datetime
+from app.db.database import Base
+
+class EmailOutbox(Base):
+    """Transactional email queued in the same transaction as the change that triggered it."""
+    __tablename__ = "email_outbox"
+
+    id = Column(Integer, primary_key=True)
+    recipients = Column(Text, nullable=False)  # JSON array of addresses
+    subject = Column(String(255), nullable=False)
+    html = Column(Text, nullable=False)
+    from_email = Column(String(190), nullable=True)
+    from_name = Column(String(160), nullable=True)
+    status = Column(String(20), nullable=False, default="pending")  # pending | sending | sent | dead
+    attempts = Column(Integer, nullable=False, default=0)
+    # when the row is next due; while `sending` it doubles as the worker's lease expiry
+    next_attempt_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    sent_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_email_outbox_status_next_attempt", "status", "next_attempt_at"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Enum, ForeignKey, Numeric
+from sqlalchemy import Column, Integer, String, DateTime, Enum, ForeignKey, Numeric, Index, func
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -20,8 +20,8 @@ class Order(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     order_number = Column(String(80), unique=True, index=True, nullable=False)
-    customer_id = Column(Integer, ForeignKey("customers.id"), nullable=True)
-    status = Column(Enum(OrderStatus), default=OrderStatus.PENDING, nullable=False)
+    customer_id = Column(Integer, ForeignKey("customers.id"), nullable=True, index=True)
+    status = Column(Enum(OrderStatus), default=OrderStatus.PENDING, nullable=False, index=True)
     total_eur = Column(Numeric(10,2), default=0)
     total_lek = Column(Numeric(10,2), default=0)
     # Shipping contact and address
@@ -37,11 +37,17 @@ class Order(Base):
     customer = relationship("Customer")
     items = relationship("OrderItem", back_populates="order", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # keyset order listing (newest first)
+        Index("ix_orders_created_at_id", "created_at", "id"),
+        Index("ix_orders_shipping_email_lower", func.lower(shipping_email)),
+    )
+
 class OrderItem(Base):
     __tablename__ = "order_items"
 
     id = Column(Integer, primary_key=True)
-    order_id = Column(Integer, ForeignKey("orders.id", ondelete="CASCADE"), nullable=False)
+    order_id = Column(Integer, ForeignKey("orders.id", ondelete="CASCADE"), nullable=False, index=True)
     product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
     quantity = Column(Integer, nullable=False)
     price_eur = Column(Numeric(10,2), nullable=False)
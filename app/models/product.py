@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Numeric, ForeignKey, Boolean, DateTime
+from sqlalchemy import Column, Integer, String, Text, Numeric, ForeignKey, Boolean, DateTime, Index, text
 from datetime import datetime
 from sqlalchemy.orm import relationship
 from app.db.database import Base
@@ -27,6 +27,15 @@ class Product(Base):
     slug = Column(String(220), nullable=True, index=True)
     # Timestamps
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
-    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
     category = relationship("Category")
+
+    __table_args__ = (
+        # Upsert keys for bulk import (migration 0011); NULLs are not constrained
+        Index("ux_products_slug", "slug", unique=True, postgresql_where=text("slug IS NOT NULL"), sqlite_where=text("slug IS NOT NULL")),
+        Index("ux_products_source_url", "source_url", unique=True, postgresql_where=text("source_url IS NOT NULL"), sqlite_where=text("source_url IS NOT NULL")),
+        # Keyset listing: ORDER BY <sort column>, id (migration 0024)
+        Index("ix_products_price_eur_id", "price_eur", "id"),
+        Index("ix_products_title_id", "title", "id"),
+    )
@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, Numeric
+from datetime import datetime
+from app.db.database import Base
+
+class ScrapeJob(Base):
+    """Bulk scrape of post URLs into draft products; counters are checkpointed while it runs."""
+    __tablename__ = "scrape_jobs"
+
+    id = Column(Integer, primary_key=True)
+    urls = Column(Text, nullable=False)  # JSON array, de-duplicated
+    price_eur = Column(Numeric(10, 2), nullable=True)
+    category_id = Column(Integer, nullable=True)
+    status = Column(String(20), nullable=False, default="running", index=True)  # running | completed | failed
+    # every URL before this index has been handled; an interrupted job resumes from here
+    cursor = Column(Integer, nullable=True)
+    total = Column(Integer, nullable=False, default=0)
+    processed_count = Column(Integer, nullable=False, default=0)
+    saved_count = Column(Integer, nullable=False, default=0)
+    failed_count = Column(Integer, nullable=False, default=0)
+    errors = Column(Text, nullable=True)  # JSON array of {"url", "error"}, first 50 only
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    finished_at = Column(DateTime, nullable=True)
+    # heartbeat while running; a running job with a stale heartbeat is resumed by another worker
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -1,38 +1,56 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
 from typing import List
 from app.models.category import Category
+from app.models.product import Product
 from app.db.database import get_db
 from app.schemas.category import CategoryCreate, CategoryOut
 from app.services import category_service
+from app.services.cache import invalidate_categories, invalidate_products
+from app.services.http_cache import make_etag, not_modified, validator_headers
 from app.dependencies import get_current_admin
 
 router = APIRouter(prefix="/categories", tags=["categories"])
 
 @router.get("/", response_model=List[CategoryOut])
-def list_categories(db: Session = Depends(get_db)):
-    return category_service.list_categories(db)
+def list_categories(request: Request, db: Session = Depends(get_db)):
+    version = category_service.categories_version(db)
+    etag = make_etag(version, request)
+    unchanged = not_modified(request, etag, version[1])
+    if unchanged:
+        return unchanged
+    return Response(content=category_service.list_categories_payload(db), media_type="application/json", headers=validator_headers(etag, version[1]))
 
 @router.post("/", response_model=CategoryOut)
 def create_category(payload: CategoryCreate, db: Session = Depends(get_db), admin=Depends(get_current_admin)):
     return category_service.create_category(db, payload)
 
 @router.get("/slug/{slug}")
-def get_category_by_slug(slug: str, db: Session = Depends(get_db)):
-    cat = db.query(Category).filter(Category.slug == slug).first()
-    if not cat:
+def get_category_by_slug(slug: str, request: Request, db: Session = Depends(get_db)):
+    version = category_service.categories_version(db)
+    etag = make_etag(version, request)
+    unchanged = not_modified(request, etag, version[1])
+    if unchanged:
+        return unchanged
+    body = category_service.get_category_by_slug_payload(db, slug)
+    if body is None:
         raise HTTPException(status_code=404, detail="Not found")
-    return {"category": {"id": cat.id, "name": cat.name, "slug": cat.slug, "productCount": 0}}
+    return Response(content=body, media_type="application/json", headers=validator_headers(etag, version[1]))
 
 @router.put("/{category_id}", response_model=CategoryOut)
 def update_category(category_id: int, payload: CategoryCreate, db: Session = Depends(get_db), admin=Depends(get_current_admin)):
     cat = db.query(Category).filter(Category.id == category_id).first()
     if not cat:
         raise HTTPException(status_code=404, detail="Not found")
+    old_slug = cat.slug
     cat.name = payload.name
     cat.slug = payload.slug
+    product_ids = [pid for (pid,) in db.query(Product.id).filter(Product.category_id == cat.id)]
     db.commit()
     db.refresh(cat)
+    invalidate_categories(old_slug, cat.slug)
+    # product pages and list pages embed or filter by the category
+    invalidate_products(product_ids)
     return cat
 
 @router.delete("/{category_id}")
@@ -40,8 +58,11 @@ def delete_category(category_id: int, db: Session = Depends(get_db), admin=Depen
     cat = db.query(Category).filter(Category.id == category_id).first()
     if not cat:
         raise HTTPException(status_code=404, detail="Not found")
+    product_ids = [pid for (pid,) in db.query(Product.id).filter(Product.category_id == cat.id)]
     db.delete(cat)
     db.commit()
+    invalidate_categories(cat.slug)
+    invalidate_products(product_ids)
     return {"ok": True}
 
 @router.get("/{category_id}", response_model=CategoryOut)
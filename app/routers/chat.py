@@ -1,14 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, WebSocket
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import List, Optional
 from uuid import uuid4
 from datetime import datetime
-from app.db.database import get_db
-from app.models.chat import ChatSession, ChatMessage
+from app.core.config import get_settings
+from app.db.database import SessionLocal, get_db
+from app.models.chat import ChatSession
 from app.dependencies import get_current_admin
+from app.services import chat_service
+from app.services.chat_hub import hub, session_channel
 
 router = APIRouter(prefix="/chat", tags=["chat"])
+settings = get_settings()
+BACKLOG_PAGE = 200  # messages read from the DB per catch-up query
 
 class ChatMessageOut(BaseModel):
     id: int
@@ -26,9 +33,20 @@ class ChatSessionOut(BaseModel):
     created_at: datetime
     last_activity_at: datetime
     messages: List[ChatMessageOut]
+    has_more: bool = False
     class Config:
         from_attributes = True
 
+class ChatSessionSummaryOut(BaseModel):
+    id: int
+    session_id: str
+    customer_email: Optional[str]
+    customer_name: Optional[str]
+    created_at: datetime
+    last_activity_at: datetime
+    message_count: int
+    last_message: Optional[ChatMessageOut]
+
 class ChatSessionCreate(BaseModel):
     customer_email: Optional[str] = None
     customer_name: Optional[str] = None
@@ -45,29 +63,30 @@ def create_session(data: ChatSessionCreate, db: Session = Depends(get_db)):
     db.refresh(sess)
     return ChatSessionOut.model_validate({**sess.__dict__, 'messages': []})
 
-@router.get("/sessions", response_model=List[ChatSessionOut])
-def list_sessions(db: Session = Depends(get_db), admin=Depends(get_current_admin)):
-    sessions = db.query(ChatSession).order_by(ChatSession.last_activity_at.desc()).limit(100).all()
-    out = []
-    for s in sessions:
-        msgs = db.query(ChatMessage).filter(ChatMessage.session_id == s.id).order_by(ChatMessage.id.asc()).all()
-        out.append(ChatSessionOut(
-            id=s.id,
-            session_id=s.session_id,
-            customer_email=s.customer_email,
-            customer_name=s.customer_name,
-            created_at=s.created_at,
-            last_activity_at=s.last_activity_at,
-            messages=[ChatMessageOut.model_validate(m) for m in msgs]
-        ))
-    return out
+@router.get("/sessions", response_model=List[ChatSessionSummaryOut])
+def list_sessions(
+    response: Response,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: str | None = None,
+    db: Session = Depends(get_db), admin=Depends(get_current_admin)):
+    """Admin inbox: sessions by most recent activity with their last message and message
+    count. The next page cursor is returned in the X-Next-Cursor header."""
+    items, next_cursor = chat_service.list_inbox(db, limit=limit, cursor=cursor)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return items
 
 @router.get("/sessions/{session_id}", response_model=ChatSessionOut)
-def get_session(session_id: str, db: Session = Depends(get_db)):
-    sess = db.query(ChatSession).filter(ChatSession.session_id == session_id).first()
-    if not sess:
-        raise HTTPException(status_code=404, detail="Not found")
-    msgs = db.query(ChatMessage).filter(ChatMessage.session_id == sess.id).order_by(ChatMessage.id.asc()).all()
+def get_session(
+    session_id: str,
+    limit: int = Query(50, ge=1, le=200),
+    before_id: int | None = None,
+    after_id: int | None = None,
+    db: Session = Depends(get_db)):
+    """Session with one page of messages (ascending). Without cursors this is the newest
+    `limit` messages; pass before_id=<first id> for older ones or after_id=<last id> for newer."""
+    sess = chat_service.get_session_or_404(db, session_id)
+    msgs, has_more = chat_service.page_messages(db, sess, limit=limit, before_id=before_id, after_id=after_id)
     return ChatSessionOut(
         id=sess.id,
         session_id=sess.session_id,
@@ -75,7 +94,8 @@ def get_session(session_id: str, db: Session = Depends(get_db)):
         customer_name=sess.customer_name,
         created_at=sess.created_at,
         last_activity_at=sess.last_activity_at,
-        messages=[ChatMessageOut.model_validate(m) for m in msgs]
+        messages=[ChatMessageOut.model_validate(m) for m in msgs],
+        has_more=has_more,
     )
 
 @router.post("/sessions/{session_id}/messages", response_model=ChatMessageOut)
@@ -83,9 +103,91 @@ def post_message(session_id: str, data: ChatMessageCreate, db: Session = Depends
     sess = db.query(ChatSession).filter(ChatSession.session_id == session_id).first()
     if not sess:
         raise HTTPException(status_code=404, detail="Session not found")
-    msg = ChatMessage(session_id=sess.id, role=data.role, content=data.content)
-    sess.last_activity_at = datetime.utcnow()
-    db.add(msg)
-    db.commit()
-    db.refresh(msg)
-    return msg
+    return chat_service.post_message(db, sess, data.role, data.content)
+
+def _delta(session_id: str, after_id: int):
+    with SessionLocal() as db:
+        sess, rows = chat_service.messages_after(db, session_id, after_id)
+        return sess is not None, [ChatMessageOut.model_validate(m) for m in rows]
+
+@router.get("/sessions/{session_id}/messages", response_model=List[ChatMessageOut])
+async def poll_messages(
+    session_id: str,
+    after_id: int = Query(..., ge=0),
+    wait: float = Query(25, ge=0, le=settings.CHAT_LONG_POLL_MAX_SECONDS)):
+    """Long-poll: messages newer than after_id, waiting up to `wait` seconds for one to arrive.
+
+    The request parks on the chat hub instead of sleeping in a loop. When this worker's
+    LISTEN connection has already delivered the session's newest message id, an idle poll
+    touches no DB at all. Otherwise one small query returns the delta.
+    """
+    channel = session_channel(session_id)
+    with hub().subscribe(channel) as sub:
+        known = hub().last_seen(channel)
+        if known is None or known > after_id:
+            exists, rows = await run_in_threadpool(_delta, session_id, after_id)
+            if not exists:
+                raise HTTPException(status_code=404, detail="Not found")
+            if rows:
+                return rows
+        event = await sub.get(timeout=wait)
+        if event is None:
+            return []
+    # woken by a commit: read just the new rows (also covers events that arrived together)
+    return (await run_in_threadpool(_delta, session_id, after_id))[1]
+
+def _backlog(session_id: str, after_id: int | None):
+    with SessionLocal() as db:
+        sess, rows = chat_service.messages_after(db, session_id, after_id or 0, limit=BACKLOG_PAGE)
+        if sess is None:
+            return None
+        return [chat_service.message_event(sess, m) for m in rows] if after_id is not None else []
+
+async def _catch_up(websocket: WebSocket, session_id: str, last_id: int) -> int:
+    """Send every stored message newer than last_id, a page at a time; returns the new last id."""
+    while True:
+        events = await run_in_threadpool(_backlog, session_id, last_id) or []
+        for event in events:
+            await websocket.send_json(event)
+            last_id = event["id"]
+        if len(events) < BACKLOG_PAGE:
+            return last_id
+
+@router.websocket("/sessions/{session_id}/ws")
+async def session_events(websocket: WebSocket, session_id: str, after_id: int | None = None):
+    """Live messages for one session. With after_id, messages newer than it are sent first
+    so a reconnecting client catches up without reloading the transcript."""
+    with hub().subscribe(session_channel(session_id)) as sub:
+        # subscribed before reading the backlog, so nothing falls between the two
+        backlog = await run_in_threadpool(_backlog, session_id, after_id)
+        if backlog is None:
+            await websocket.close(code=4404)
+            return
+        await websocket.accept()
+        last_id = after_id or 0
+        for event in backlog:
+            await websocket.send_json(event)
+            last_id = event["id"]
+        if len(backlog) >= BACKLOG_PAGE:
+            last_id = await _catch_up(websocket, session_id, last_id)
+
+        async def pump():
+            nonlocal last_id
+            while True:
+                event = await sub.get()
+                if event.get("truncated") or event.get("resync"):
+                    # payload too large for NOTIFY, or events dropped for a slow socket:
+                    # read everything after the last id sent from the DB
+                    last_id = await _catch_up(websocket, session_id, last_id)
+                elif event["id"] > last_id:
+                    await websocket.send_json(event)
+                    last_id = event["id"]
+
+        sender = asyncio.create_task(pump())
+        try:
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+        finally:
+            sender.cancel()
@@ -1,21 +1,30 @@
-from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel, EmailStr
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel, EmailStr, Field
+from jinja2 import TemplateSyntaxError
 from typing import List, Optional
+from datetime import datetime
 import smtplib
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
 from sqlalchemy.orm import Session
 
 from app.db.database import get_db
 from app.dependencies import get_current_admin
-from app.models.admin import AdminSetting
+from app.models.email_campaign import EmailCampaign
+from app.models.email_outbox import EmailOutbox
+from app.models.order import OrderStatus
+from app.core.config import get_settings
+from app.services import campaign_service, outbox_service, smtp_diagnostics, smtp_pool
+from app.services.email_delivery import build_message, deliver_email, smtp_config
+from app.services.smtp_diagnostics import Strategy
+from app.services.settings_service import get_setting
+from app.services.templates import environment as template_environment
 import re
-import os
+import time
 import logging
 logger = logging.getLogger(__name__)
 
 
 router = APIRouter(prefix="/emails", tags=["emails"])
+settings = get_settings()
 
 
 class EmailSendIn(BaseModel):
@@ -26,11 +35,6 @@ class EmailSendIn(BaseModel):
     from_name: Optional[str] = None
 
 
-def _get_setting(db: Session, key: str) -> Optional[str]:
-    s = db.query(AdminSetting).filter(AdminSetting.key == key).first()
-    return s.value if s else None
-
-
 def send_email_with_settings(
     db: Session,
     to: list[str],
@@ -39,45 +43,8 @@ def send_email_with_settings(
     from_email: Optional[str] = None,
     from_name: Optional[str] = None,
 ) -> bool:
-    host = _get_setting(db, "smtp_host")
-    port_str = _get_setting(db, "smtp_port") or "587"
-    secure_str = _get_setting(db, "smtp_secure") or "false"
-    user = _get_setting(db, "smtp_user")
-    password = _get_setting(db, "smtp_password")
-    from_email = from_email or _get_setting(db, "smtp_from_email") or user
-    from_name = from_name or _get_setting(db, "smtp_from_name") or "ProudShop"
-
-    if not host or not user or not password or not from_email:
-        return False
-
-    try:
-        port = int(port_str)
-    except ValueError:
-        port = 587
-
-    secure = str(secure_str).lower() in ("1", "true", "yes", "on")
-
-    msg = MIMEMultipart("alternative")
-    msg["Subject"] = subject
-    msg["From"] = f"{from_name} <{from_email}>"
-    msg["To"] = ", ".join(to)
-    msg.attach(MIMEText(html, "html", _charset="utf-8"))
-
     try:
-        if secure and port == 465:
-            with smtplib.SMTP_SSL(host, port) as server:
-                server.login(user, password)
-                server.sendmail(from_email, to, msg.as_string())
-        else:
-            with smtplib.SMTP(host, port) as server:
-                server.ehlo()
-                try:
-                    server.starttls()
-                    server.ehlo()
-                except smtplib.SMTPException:
-                    pass
-                server.login(user, password)
-                server.sendmail(from_email, to, msg.as_string())
+        deliver_email(to, subject, html, from_email=from_email, from_name=from_name)
     except Exception:
         return False
     return True
@@ -97,14 +64,14 @@ def _mask_user(u: str | None):
 
 
 @router.get("/check")
-def check_email_settings(db: Session = Depends(get_db), admin=Depends(get_current_admin)):
+def check_email_settings(admin=Depends(get_current_admin)):
     """Lightweight diagnostics for SMTP configuration (does NOT send an email)."""
-    host = _get_setting(db, "smtp_host")
-    port = _get_setting(db, "smtp_port")
-    secure = _get_setting(db, "smtp_secure")
-    user = _get_setting(db, "smtp_user")
-    password = _get_setting(db, "smtp_password")
-    from_email = _get_setting(db, "smtp_from_email") or user
+    host = get_setting("smtp_host")
+    port = get_setting("smtp_port")
+    secure = get_setting("smtp_secure")
+    user = get_setting("smtp_user")
+    password = get_setting("smtp_password")
+    from_email = get_setting("smtp_from_email") or user
     missing = [k for k, v in {
         'smtp_host': host,
         'smtp_user': user,
@@ -120,63 +87,27 @@ def check_email_settings(db: Session = Depends(get_db), admin=Depends(get_curren
             'user_masked': _mask_user(user),
             'from_email_masked': _mask_user(from_email),
             'has_password': bool(password),
-        }
+        },
+        'pool': smtp_pool.stats(),
     }
 
 
 @router.post("/send")
-def send_email(payload: EmailSendIn, db: Session = Depends(get_db), admin=Depends(get_current_admin)):
-    host = _get_setting(db, "smtp_host")
-    port_str = _get_setting(db, "smtp_port") or "587"
-    secure_str = _get_setting(db, "smtp_secure") or "false"
-    user = _get_setting(db, "smtp_user")
-    password = _get_setting(db, "smtp_password")
-    from_email = payload.from_email or _get_setting(db, "smtp_from_email") or user
-    from_name = payload.from_name or _get_setting(db, "smtp_from_name") or "ProudShop"
-
-    if not host or not user or not password or not from_email:
-        raise HTTPException(status_code=400, detail="SMTP settings are not configured")
-
-    try:
-        port = int(port_str)
-    except ValueError:
-        port = 587
-
-    secure = str(secure_str).lower() in ("1", "true", "yes", "on")
+def send_email(payload: EmailSendIn, admin=Depends(get_current_admin)):
+    config = smtp_config()
+    from_email = payload.from_email or get_setting("smtp_from_email") or (config.user if config else None)
+    from_name = payload.from_name or get_setting("smtp_from_name") or "ProudShop"
 
-    # Build message
-    msg = MIMEMultipart("alternative")
-    msg["Subject"] = payload.subject
-    msg["From"] = f"{from_name} <{from_email}>"
-    msg["To"] = ", ".join(payload.to)
-    msg.attach(MIMEText(payload.html, "html", _charset="utf-8"))
+    if not config or not from_email:
+        raise HTTPException(status_code=400, detail="SMTP settings are not configured")
 
     # Quick password whitespace warning (common copy/paste issue)
-    if password and (password != password.strip()):
+    if config.password != config.password.strip():
         raise HTTPException(status_code=400, detail="SMTP password ka hapësira në fillim/fund. Hiq ato dhe ruaj përsëri.")
 
-    debug_mode = os.getenv('SMTP_DEBUG') in ('1', 'true', 'True')
+    message = build_message(payload.subject, payload.html, from_email, from_name, payload.to)
     try:
-        if secure and port == 465:
-            with smtplib.SMTP_SSL(host, port, timeout=20) as server:
-                if debug_mode:
-                    server.set_debuglevel(1)
-                server.login(user, password)
-                server.sendmail(from_email, payload.to, msg.as_string())
-        else:
-            with smtplib.SMTP(host, port, timeout=20) as server:
-                if debug_mode:
-                    server.set_debuglevel(1)
-                server.ehlo()
-                # Only attempt STARTTLS if port commonly supports it
-                if port in (587, 25, 2525):
-                    try:
-                        server.starttls()
-                        server.ehlo()
-                    except smtplib.SMTPException:
-                        pass
-                server.login(user, password)
-                server.sendmail(from_email, payload.to, msg.as_string())
+        smtp_pool.get_pool(config).sendmail(from_email, payload.to, message)
     except smtplib.SMTPAuthenticationError as e:
         logger.warning("SMTP auth failed code=%s error=%s", getattr(e, 'smtp_code', None), getattr(e, 'smtp_error', None))
         hint = "SMTP authentication failed (535). Kontrolloni user/password. Për Hostinger: përdorni password të llogarisë së email-it (jo panelit) dhe username adresën e plotë."
@@ -185,48 +116,25 @@ def send_email(payload: EmailSendIn, db: Session = Depends(get_db), admin=Depend
         raise HTTPException(status_code=500, detail=f"SMTP error: {type(e).__name__}: {e}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Unexpected email error: {type(e).__name__}: {e}")
+    return {"ok": True, "sent": len(payload.to)}
 
 
 @router.get("/auth-matrix")
-def smtp_auth_matrix(db: Session = Depends(get_db), admin=Depends(get_current_admin)):
-    """Try multiple common SMTP connection/auth strategies to diagnose failures."""
-    host = _get_setting(db, "smtp_host")
-    port_setting = _get_setting(db, "smtp_port")
-    secure_setting = _get_setting(db, "smtp_secure")
-    user = _get_setting(db, "smtp_user")
-    password = _get_setting(db, "smtp_password")
-    results = []
+def smtp_auth_matrix(admin=Depends(get_current_admin)):
+    """Try multiple common SMTP connection/auth strategies to diagnose failures.
+
+    Strategies are probed concurrently and the first successful login cancels the rest,
+    so the whole call takes about as long as the slowest single attempt (bounded by
+    SMTP_PROBE_DEADLINE_SECONDS).
+    """
+    host = get_setting("smtp_host")
+    port_setting = get_setting("smtp_port")
+    secure_setting = get_setting("smtp_secure")
+    user = get_setting("smtp_user")
+    password = get_setting("smtp_password")
     if not (host and user and password):
         raise HTTPException(status_code=400, detail="Missing smtp_host|smtp_user|smtp_password")
 
-    def attempt(name: str, mode: str, host: str, port: int, starttls: bool):
-        from time import time
-        t0 = time()
-        try:
-            if mode == 'SSL':
-                with smtplib.SMTP_SSL(host, port, timeout=15) as server:
-                    server.login(user, password)
-            else:
-                with smtplib.SMTP(host, port, timeout=15) as server:
-                    server.ehlo()
-                    if starttls:
-                        server.starttls(); server.ehlo()
-                    server.login(user, password)
-            ok = True
-            err = None
-        except Exception as e:  # broad for diagnostics only
-            ok = False
-            err = f"{type(e).__name__}: {e}"[:300]
-        results.append({
-            'name': name,
-            'host': host,
-            'port': port,
-            'mode': mode,
-            'starttls': starttls,
-            'success': ok,
-            'error': err,
-        })
-
     # Strategy list (ordered)
     strategies = []
     try:
@@ -256,14 +164,130 @@ def smtp_auth_matrix(db: Session = Depends(get_db), admin=Depends(get_current_ad
     if (configured_port, configured_secure) != (25, False):
         strategies.append(("plain-25", 'PLAIN', 25, False))
 
-    # Execute attempts
-    for name, mode, port, starttls in strategies:
-        attempt(name, mode, host, port, starttls)
+    started = time.perf_counter()
+    results = smtp_diagnostics.probe(
+        host, user, password, [Strategy(*s) for s in strategies],
+        deadline=settings.SMTP_PROBE_DEADLINE_SECONDS, attempt_timeout=15,
+    )
 
     return {
         'user_masked': _mask_user(user),
         'attempts': results,
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 1),
         'hint': 'Zakonisht Hostinger: SSL 465 ose STARTTLS 587. Sigurohuni që password është korrekt (pa hapësira) dhe përdorni adresën e plotë si username.'
     }
 
-    return {"ok": True, "sent": len(payload.to)}
+
+class OutboxEmailOut(BaseModel):
+    id: int
+    recipients: str
+    subject: str
+    status: str
+    attempts: int
+    next_attempt_at: datetime
+    last_error: Optional[str] = None
+    created_at: datetime
+    sent_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+@router.get("/outbox", response_model=List[OutboxEmailOut])
+def list_outbox(status: Optional[str] = Query(None, pattern="^(pending|sending|sent|dead)$"), limit: int = Query(50, ge=1, le=200),
+                db: Session = Depends(get_db), admin=Depends(get_current_admin)):
+    """Queued transactional emails, newest first (status=dead lists the dead-lettered ones)."""
+    q = db.query(EmailOutbox)
+    if status:
+        q = q.filter(EmailOutbox.status == status)
+    return q.order_by(EmailOutbox.id.desc()).limit(limit).all()
+
+
+@router.post("/outbox/{email_id}/retry", response_model=OutboxEmailOut)
+def retry_outbox_email(email_id: int, db: Session = Depends(get_db), admin=Depends(get_current_admin)):
+    row = db.query(EmailOutbox).filter(EmailOutbox.id == email_id).first()
+    if not row:
+        raise HTTPException(status_code=404, detail="Not found")
+    if row.status == "sent":
+        raise HTTPException(status_code=400, detail="Email was already sent")
+    return outbox_service.retry(db, row)
+
+
+class CampaignCreate(BaseModel):
+    name: str
+    subject: str
+    html: str
+    segment: str = Field("customers", pattern="^(customers|orders)$")
+    order_status: Optional[OrderStatus] = None
+    rate_per_second: float = Field(5.0, gt=0, le=100)
+    concurrency: int = Field(2, ge=1, le=32)
+
+
+class CampaignOut(BaseModel):
+    id: int
+    name: str
+    subject: str
+    segment: str
+    order_status: Optional[str] = None
+    rate_per_second: float
+    concurrency: int
+    status: str
+    cursor: Optional[str] = None
+    sent_count: int
+    failed_count: int
+    last_error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+def _campaign_or_404(db: Session, campaign_id: int) -> EmailCampaign:
+    campaign = db.query(EmailCampaign).filter(EmailCampaign.id == campaign_id).first()
+    if not campaign:
+        raise HTTPException(status_code=404, detail="Not found")
+    return campaign
+
+
+@router.post("/campaigns", response_model=CampaignOut)
+def create_campaign(payload: CampaignCreate, db: Session = Depends(get_db), admin=Depends(get_current_admin)):
+    """Create a draft campaign. `subject` and `html` are Jinja templates rendered per
+    recipient with `email`, `name` and `campaign` in the context."""
+    try:
+        env = template_environment()
+        env.from_string(payload.subject)
+        env.from_string(payload.html)
+    except TemplateSyntaxError as e:
+        raise HTTPException(status_code=400, detail=f"Template error: {e}")
+    data = payload.model_dump()
+    data["order_status"] = payload.order_status.value if payload.order_status else None
+    campaign = EmailCampaign(**data, status="draft")
+    db.add(campaign)
+    db.commit()
+    db.refresh(campaign)
+    return campaign
+
+
+@router.get("/campaigns", response_model=List[CampaignOut])
+def list_campaigns(db: Session = Depends(get_db), admin=Depends(get_current_admin)):
+    return db.query(EmailCampaign).order_by(EmailCampaign.id.desc()).limit(100).all()
+
+
+@router.get("/campaigns/{campaign_id}", response_model=CampaignOut)
+def get_campaign(campaign_id: int, db: Session = Depends(get_db), admin=Depends(get_current_admin)):
+    """Poll this for progress: counters and the cursor are checkpointed about once a second."""
+    return _campaign_or_404(db, campaign_id)
+
+
+@router.post("/campaigns/{campaign_id}/start", response_model=CampaignOut)
+def start_campaign(campaign_id: int, db: Session = Depends(get_db), admin=Depends(get_current_admin)):
+    """Start a draft campaign, or resume a paused/failed one after its last checkpoint."""
+    return campaign_service.start_campaign(db, _campaign_or_404(db, campaign_id))
+
+
+@router.post("/campaigns/{campaign_id}/pause", response_model=CampaignOut)
+def pause_campaign(campaign_id: int, db: Session = Depends(get_db), admin=Depends(get_current_admin)):
+    return campaign_service.pause_campaign(db, _campaign_or_404(db, campaign_id))
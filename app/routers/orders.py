@@ -1,44 +1,79 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from fastapi.security import HTTPAuthorizationCredentials
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
+from typing import Any, List
+from datetime import datetime
 from app.db.database import get_db
-from app.schemas.order import OrderCreate, OrderOut, OrderStatus
-from app.dependencies import get_current_admin
+from app.schemas.order import OrderCreate, OrderOut, OrderSummaryOut, OrderStatus
+from app.dependencies import bearer_scheme, get_current_admin
 from app.models.order import Order
-from app.services import order_service
-from app.routers.emails import send_email_with_settings, _get_setting  # reuse existing mail logic
-from jinja2 import Template
-from pydantic import BaseModel
+from app.services import order_service, export_service, idempotency_service, outbox_service
+from app.services.order_emails import status_update_email
+from pydantic import BaseModel, TypeAdapter
 
 router = APIRouter(prefix="/orders", tags=["orders"])
 
-@router.get("/", response_model=List[OrderOut])
-def list_orders(db: Session = Depends(get_db)):
-    return order_service.list_orders(db)
+_orders_adapter = TypeAdapter(List[OrderOut])
+_summaries_adapter = TypeAdapter(List[OrderSummaryOut])
+ORDERS_PAGE_SIZE = 50
+
+@router.get("/")
+def list_orders(
+    response: Response,
+    status: OrderStatus | None = None,
+    date_from: datetime | None = None,
+    date_to: datetime | None = None,
+    customer_id: int | None = None,
+    email: str | None = None,
+    limit: int = Query(ORDERS_PAGE_SIZE, ge=1, le=200),
+    cursor: str | None = None,
+    include_items: bool = True,
+    paginated: bool = Query(False),
+    credentials: HTTPAuthorizationCredentials | None = Depends(bearer_scheme),
+    db: Session = Depends(get_db)) -> Any:
+    """Newest orders first, one keyset page at a time (50 by default). The plain list
+    response carries the next page cursor in the X-Next-Cursor header; paginated=true
+    wraps it in the body. Filtering by customer_id or email is admin-only."""
+    if customer_id is not None or email:
+        get_current_admin(credentials, db)
+    orders, next_cursor = order_service.list_orders(
+        db, limit=limit, cursor=cursor, status=status.value if status else None, date_from=date_from,
+        date_to=date_to, customer_id=customer_id, email=email, include_items=include_items)
+    adapter = _orders_adapter if include_items else _summaries_adapter
+    data = adapter.validate_python(orders, from_attributes=True)
+    if paginated:
+        return {"orders": data, "pagination": {"limit": limit, "next_cursor": next_cursor, "has_more": next_cursor is not None}}
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return data
 
 @router.post("/", response_model=OrderOut)
-def create_order(payload: OrderCreate, db: Session = Depends(get_db)):
-    """Public order creation (guest checkout allowed)."""
-    order = order_service.create_order(db, payload)
-    # Fire-and-forget style (best-effort) email if shipping_email present
-    if order.shipping_email:
-        try:
-            subject = f"Faleminderit për porosinë #{order.order_number}" if hasattr(order, 'order_number') else "Faleminderit për porosinë tuaj"
-            tpl = Template("""
-            <div style='font-family:Arial,sans-serif;font-size:14px;color:#222'>
-              <h2>Faleminderit për porosinë tuaj!</h2>
-              <p>Pershendetje {{name or 'Klient'}},</p>
-              <p>Ne kemi pranuar porosinë tuaj me numër <strong>{{order_number}}</strong>.</p>
-              <p>Totali: EUR {{total_eur}} / LEK {{total_lek}}</p>
-              <p>Do t'ju njoftojmë sapo statusi të përditësohet.</p>
-              <p style='margin-top:20px'>ProudShop</p>
-            </div>
-            """)
-            html = tpl.render(name=order.shipping_name, order_number=order.order_number, total_eur=order.total_eur, total_lek=order.total_lek)
-            send_email_with_settings(db, to=[order.shipping_email], subject=subject, html=html)
-        except Exception:
-            pass
-    return order
+def create_order(payload: OrderCreate, db: Session = Depends(get_db), idempotency_key: str | None = Header(None, alias="Idempotency-Key")):
+    """Public order creation (guest checkout allowed).
+
+    Clients that retry should send an Idempotency-Key header: a replay with the same key
+    and body returns the original response instead of placing (and charging stock for)
+    a second order. The confirmation email is queued in the outbox with the order, so
+    the response never waits on SMTP.
+    """
+    if idempotency_key:
+        return idempotency_service.run_idempotent(
+            db, "orders.create", idempotency_key, payload.model_dump(mode="json"),
+            handler=lambda complete: order_service.create_order(db, payload, before_commit=complete),
+            serialize=lambda order: OrderOut.model_validate(order).model_dump_json(),
+        )
+    return order_service.create_order(db, payload)
+
+@router.get("/export")
+def export_orders(format: str = Query("csv", pattern="^(csv|ndjson)$"), status: OrderStatus | None = None, admin=Depends(get_current_admin)):
+    """Stream all orders with their items (CSV: one line per item, NDJSON: one object per order)."""
+    media_type = "text/csv; charset=utf-8" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        export_service.export_orders(format, status.value if status else None),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="orders.{format}"'},
+    )
 
 @router.get("/by-number/{order_number}")
 def get_order_by_number(order_number: str, db: Session = Depends(get_db)):
@@ -63,49 +98,12 @@ def update_order_status(order_id: int, payload: OrderStatusUpdate, db: Session =
     if not order:
         raise HTTPException(status_code=404, detail="Not found")
     order.status = payload.status
+    # Notify customer if email present (delivered by the outbox worker after commit)
+    if order.shipping_email:
+        subject, html = status_update_email(order, payload.status.value)
+        outbox_service.enqueue(db, [order.shipping_email], subject, html)
     db.commit()
     db.refresh(order)
-    # Notify customer if email present
-    if order.shipping_email:
-        try:
-            status_value = payload.status.value.upper()
-            name = order.shipping_name or 'Klient'
-            subjects = {
-                'PROCESSING': f"Porosia #{order.order_number} është në proces",
-                'SHIPPED': f"Porosia #{order.order_number} u nis",
-                'DELIVERED': f"Porosia #{order.order_number} u dorëzua",
-                'CANCELLED': f"Porosia #{order.order_number} u anulua",
-                'CANCELED': f"Porosia #{order.order_number} u anulua",
-                'CONFIRMED': f"Porosia #{order.order_number} u konfirmua",
-                'PENDING': f"Porosia #{order.order_number} është në pritje",
-                'PAID': f"Porosia #{order.order_number} u pagua",
-                'COMPLETED': f"Porosia #{order.order_number} u përfundua"
-            }
-            body_messages = {
-                'PROCESSING': 'Porosia juaj është marrë në proces dhe po përgatitet.',
-                'SHIPPED': 'Porosia juaj është nisur dhe është në rrugë drejt jush.',
-                'DELIVERED': 'Porosia juaj është dorëzuar. Shpresojmë të kënaqeni!',
-                'CANCELLED': 'Porosia juaj është anuluar sipas kërkesës ose për shkak të një problemi.',
-                'CANCELED': 'Porosia juaj është anuluar.',
-                'CONFIRMED': 'Porosia juaj u konfirmua dhe do të vazhdojë përpunimin.',
-                'PENDING': 'Porosia juaj është regjistruar dhe pret konfirmim.',
-                'PAID': 'Pagesa u pranua. Faleminderit!',
-                'COMPLETED': 'Porosia u përfundua me sukses. Faleminderit!'
-            }
-            subject = subjects.get(status_value, f"Përditësim i porosisë #{order.order_number}")
-            message = body_messages.get(status_value, f"Statusi i porosisë suaj është: {status_value}.")
-            html = f"""
-            <div style='font-family:Arial,sans-serif;font-size:14px;color:#222'>
-              <h2>Përditësim i Porosisë</h2>
-              <p>Përshëndetje {name},</p>
-              <p>{message}</p>
-              <p><strong>Numri i porosisë:</strong> {order.order_number}</p>
-              <p style='margin-top:15px'>ProudShop</p>
-            </div>
-            """
-            send_email_with_settings(db, to=[order.shipping_email], subject=subject, html=html)
-        except Exception:
-            pass
     return order
 
 @router.delete("/{order_id}")
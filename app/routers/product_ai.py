@@ -1,74 +1,129 @@
-from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
-from typing import List
-import os, json, re, httpx
-from bs4 import BeautifulSoup
-from app.db.database import get_db
+from datetime import datetime
+from typing import List, Optional
+import json
+from app.db.database import get_db, run_db
+from app.core.config import get_settings
 from app.dependencies import get_current_admin
-from app.models.admin import AdminSetting
+from app.models.ai_copy_job import AiCopyJob
+from app.models.product import Product
+from app.models.scrape_job import ScrapeJob
+from app.services import ai_copy, ai_copy_jobs, http_clients, scrape_jobs, scraper, suggestion_cache
+from app.services.cache import invalidate_products
 
 router = APIRouter(prefix="/products/ai", tags=["products-ai"])
-
-OPENAI_KEY_NAME = "OPENAI_API_KEY"
-
-def _get_openai_key(db: Session) -> str | None:
-    s = db.query(AdminSetting).filter(AdminSetting.key == OPENAI_KEY_NAME).first()
-    return s.value if s and s.value else os.getenv('OPENAI_API_KEY')
+settings = get_settings()
 
 class SuggestInput(BaseModel):
     title: str
     features: List[str] = []
     language: str = "sq"
     tone: str | None = None
+    force_refresh: bool = False  # skip the suggestion cache and ask OpenAI again
 
 class SuggestOutput(BaseModel):
     suggested_title: str | None = None
     description: str | None = None
     tags: List[str] = []
 
-@router.post("/suggest", response_model=SuggestOutput)
-async def suggest_product_copy(data: SuggestInput, db: Session = Depends(get_db), admin=Depends(get_current_admin)):
-    api_key = _get_openai_key(db)
-    if not api_key:
-        raise HTTPException(status_code=400, detail="OpenAI key mungon")
-    system = "You are an ecommerce product copy assistant for Albanian (sq) language unless specified. Return concise output."
-    user_prompt = (
-        f"Generate improved product title, 120-160 word engaging description, and 5-10 short comma-separated SEO tags.\n"
-        f"Title: {data.title}\nFeatures: {', '.join(data.features) or 'N/A'}\nLanguage: {data.language}\n"
-        f"Tone: {data.tone or 'neutral professional'}\nRespond in JSON with keys: title, description, tags (array)."
-    )
+async def _openai_suggest(data: SuggestInput, api_key: str) -> SuggestOutput:
     try:
-        async with httpx.AsyncClient(timeout=60) as client:
-            r = await client.post("https://api.openai.com/v1/chat/completions", headers={
-                "Authorization": f"Bearer {api_key}",
-                "Content-Type": "application/json"
-            }, json={
-                "model": "gpt-4o-mini",
-                "messages": [
-                    {"role": "system", "content": system},
-                    {"role": "user", "content": user_prompt}
-                ],
-                "temperature": 0.7,
-                "max_tokens": 600
-            })
-        if r.status_code >= 400:
-            raise HTTPException(status_code=500, detail=f"OpenAI error {r.status_code}: {r.text[:200]}")
-        content = r.json()["choices"][0]["message"]["content"]
+        async with http_clients.client() as client:
+            copy = await ai_copy.suggest_copy(client, api_key, data.title, data.features, data.language, data.tone)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"AI request dështoi: {e}")
-    json_text = content
-    m = re.search(r"```json(.*?)```", content, re.S)
-    if m:
-        json_text = m.group(1)
-    try:
-        parsed = json.loads(json_text)
-    except Exception:
-        parsed = {}
-    tags = parsed.get('tags') or []
-    if isinstance(tags, str):
-        tags = [t.strip() for t in tags.split(',') if t.strip()]
-    return SuggestOutput(suggested_title=parsed.get('title'), description=parsed.get('description'), tags=tags)
+    return SuggestOutput(**copy)
+
+@router.post("/suggest", response_model=SuggestOutput)
+async def suggest_product_copy(data: SuggestInput, response: Response, admin=Depends(get_current_admin)):
+    api_key = await run_in_threadpool(ai_copy.openai_key)  # may refresh the settings snapshot from the DB
+    if not api_key:
+        raise HTTPException(status_code=400, detail="OpenAI key mungon")
+    key = suggestion_cache.cache_key(data.model_dump(exclude={"force_refresh"}), ai_copy.MODEL, ai_copy.PROMPT_VERSION)
+    if not data.force_refresh:
+        cached = await run_db(suggestion_cache.lookup, key)
+        if cached is not None:
+            response.headers["X-Cache"] = "hit"
+            return SuggestOutput(**cached)
+
+    async def generate() -> SuggestOutput:
+        out = await _openai_suggest(data, api_key)
+        if out.suggested_title or out.description:  # don't keep unparseable answers
+            await run_db(suggestion_cache.store, key, ai_copy.MODEL, ai_copy.PROMPT_VERSION, out.model_dump())
+        return out
+
+    response.headers["X-Cache"] = "miss"
+    return await suggestion_cache.single_flight.do(key, generate)
+
+class CopyJobCreate(BaseModel):
+    category_id: Optional[int] = None
+    drafts_only: bool = False
+    missing_description: bool = True
+    language: str = "sq"
+    tone: Optional[str] = None
+    update_title: bool = False
+    concurrency: int = Field(4, ge=1, le=32)
+
+class CopyJobOut(BaseModel):
+    id: int
+    category_id: Optional[int] = None
+    drafts_only: bool
+    missing_description: bool
+    language: str
+    tone: Optional[str] = None
+    update_title: bool
+    concurrency: int
+    status: str
+    cursor: Optional[int] = None
+    total: int
+    processed_count: int
+    updated_count: int
+    failed_count: int
+    last_error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+def _job_or_404(db: Session, job_id: int) -> AiCopyJob:
+    job = db.query(AiCopyJob).filter(AiCopyJob.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Not found")
+    return job
+
+@router.post("/copy-jobs", response_model=CopyJobOut)
+def create_copy_job(payload: CopyJobCreate, db: Session = Depends(get_db), admin=Depends(get_current_admin)):
+    """Create a draft job that fills product copy for every product matching the filter."""
+    job = AiCopyJob(**payload.model_dump(), status="draft")
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+@router.get("/copy-jobs", response_model=List[CopyJobOut])
+def list_copy_jobs(db: Session = Depends(get_db), admin=Depends(get_current_admin)):
+    return db.query(AiCopyJob).order_by(AiCopyJob.id.desc()).limit(100).all()
+
+@router.get("/copy-jobs/{job_id}", response_model=CopyJobOut)
+def get_copy_job(job_id: int, db: Session = Depends(get_db), admin=Depends(get_current_admin)):
+    """Poll this for progress: results, counters and the cursor are checkpointed about once a second."""
+    return _job_or_404(db, job_id)
+
+@router.post("/copy-jobs/{job_id}/start", response_model=CopyJobOut)
+def start_copy_job(job_id: int, db: Session = Depends(get_db), admin=Depends(get_current_admin)):
+    """Start a draft job, resume a paused/failed one after its last checkpoint, or retry the failed
+    products of a completed one."""
+    return ai_copy_jobs.start_job(db, _job_or_404(db, job_id))
+
+@router.post("/copy-jobs/{job_id}/pause", response_model=CopyJobOut)
+def pause_copy_job(job_id: int, db: Session = Depends(get_db), admin=Depends(get_current_admin)):
+    return ai_copy_jobs.pause_job(db, _job_or_404(db, job_id))
 
 class ImageGenIn(BaseModel):
     prompt: str
@@ -79,13 +134,13 @@ class ImageGenOut(BaseModel):
     images: List[str]
 
 @router.post('/image', response_model=ImageGenOut)
-async def generate_image(data: ImageGenIn, db: Session = Depends(get_db), admin=Depends(get_current_admin)):
-    api_key = _get_openai_key(db)
+async def generate_image(data: ImageGenIn, admin=Depends(get_current_admin)):
+    api_key = await run_in_threadpool(ai_copy.openai_key)  # may refresh the settings snapshot from the DB
     if not api_key:
         raise HTTPException(status_code=400, detail="OpenAI key mungon")
     try:
-        async with httpx.AsyncClient(timeout=90) as client:
-            r = await client.post('https://api.openai.com/v1/images/generations', headers={
+        async with http_clients.client() as client:
+            r = await client.post(f'{settings.OPENAI_BASE_URL}/images/generations', headers={
                 'Authorization': f'Bearer {api_key}',
                 'Content-Type': 'application/json'
             }, json={
@@ -93,7 +148,7 @@ async def generate_image(data: ImageGenIn, db: Session = Depends(get_db), admin=
                 'prompt': data.prompt,
                 'size': data.size,
                 'n': data.n
-            })
+            }, timeout=90)
         if r.status_code >= 400:
             raise HTTPException(status_code=500, detail=f"OpenAI image error {r.status_code}: {r.text[:200]}")
         js = r.json()
@@ -112,96 +167,70 @@ class ScrapeFacebookOut(SuggestOutput):
     images: List[str] = []  # image URLs
     videos: List[str] = []  # video URLs
 
+def _save_draft(db: Session, fields: dict) -> Product:
+    # source_url is unique (bulk-import upsert key): re-scraping refreshes the existing product
+    prod = db.query(Product).filter(Product.source_url == fields['source_url']).first()
+    if prod:
+        for k, v in scraper.refresh_fields(fields).items():
+            setattr(prod, k, v)
+    else:
+        prod = Product(**fields)
+        db.add(prod)
+    db.commit()
+    db.refresh(prod)
+    return prod
+
 @router.post('/scrape-facebook', response_model=ScrapeFacebookOut)
-async def scrape_facebook_post(data: ScrapeFacebookIn, db: Session = Depends(get_db), admin=Depends(get_current_admin)):
+async def scrape_facebook_post(data: ScrapeFacebookIn, admin=Depends(get_current_admin)):
     # Basic fetch (public page HTML). For private pages requiring auth this will not work.
     try:
-        async with httpx.AsyncClient(timeout=30, headers={"User-Agent": "Mozilla/5.0"}) as client:
-            r = await client.get(data.url)
-        if r.status_code >= 400:
-            raise HTTPException(status_code=400, detail=f"Nuk mund të lexoj postin ({r.status_code})")
+        async with http_clients.client() as client:
+            body = await scraper.fetch_capped(client, data.url)
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Fetch dështoi: {e}")
 
-    soup = BeautifulSoup(r.text, 'html.parser')
-    # Heuristics for extracting text & images
-    text_parts = []
-    for sel in ['meta[property="og:description"]', 'meta[name="description"]']:
-        tag = soup.select_one(sel)
-        if tag and tag.get('content'):
-            text_parts.append(tag['content'])
-    # Fallback: gather paragraphs
-    if not text_parts:
-        for p in soup.find_all('p'):
-            t = (p.get_text() or '').strip()
-            if t and len(t) > 20:
-                text_parts.append(t)
-                if len(text_parts) >= 3:
-                    break
-    full_text = '\n'.join(dict.fromkeys(text_parts))[:4000]
-
-    images: List[str] = []
-    videos: List[str] = []
-    for meta_img in soup.select('meta[property="og:image"]'):
-        c = meta_img.get('content')
-        if c and c not in images:
-            images.append(c)
-        if len(images) >= 5:
-            break
-    if not images:
-        for img in soup.find_all('img'):
-            src = img.get('src') or img.get('data-src')
-            if src and 'data:' not in src and src.startswith('http') and src not in images:
-                images.append(src)
-                if len(images) >= 5:
-                    break
-
-    # Collect video URLs (best-effort, public pages only)
-    for sel in ['meta[property="og:video"]', 'meta[property="og:video:url"]', 'meta[property="og:video:secure_url"]']:
-        tag = soup.select_one(sel)
-        if tag and tag.get('content'):
-            url = tag['content']
-            if url not in videos and url.startswith('http'):
-                videos.append(url)
-    # <video> tags
-    for v in soup.find_all('video'):
-        src = v.get('src')
-        if src and src.startswith('http') and src not in videos:
-            videos.append(src)
-        for source in v.find_all('source'):
-            s2 = source.get('src')
-            if s2 and s2.startswith('http') and s2 not in videos:
-                videos.append(s2)
-        if len(videos) >= 3:
-            break
-
-    # Simple title heuristic
-    title_tag = soup.select_one('meta[property="og:title"]') or soup.find('title')
-    raw_title = (title_tag.get('content') if title_tag and title_tag.has_attr('content') else title_tag.string) if title_tag else 'Produkt'
-    raw_title = (raw_title or 'Produkt').strip()[:120]
-
-    # Create product draft in DB
-    from app.models.product import Product
-    # Build unified media list for storage (annotate type)
-    media_objects = []
-    for u in images:
-        media_objects.append({"url": u, "type": "image"})
-    for v in videos:
-        media_objects.append({"url": v, "type": "video"})
-
-    prod = Product(
-        title=raw_title,
-        description=full_text[:2000] or None,
-        price_eur=data.price_eur,
-        price_lek=None,
-        stock=0,
-        category_id=data.category_id,
-        images=json.dumps(media_objects) if media_objects else None,
-        source_url=data.url
-    )
-    db.add(prod)
-    db.commit()
-    db.refresh(prod)
+    # parsing and the DB write both run on worker threads, keeping the event loop free
+    post = await run_in_threadpool(scraper.parse_post, body)
+    prod = await run_db(_save_draft, scraper.draft_fields(data.url, post, data.price_eur, data.category_id))
+    invalidate_products([prod.id])
 
     # Return suggestion format (reuse SuggestOutput) so UI can show & allow refinement
-    return ScrapeFacebookOut(product_id=prod.id, suggested_title=prod.title, description=prod.description, tags=[], images=images, videos=videos)
+    return ScrapeFacebookOut(product_id=prod.id, suggested_title=prod.title, description=prod.description, tags=[],
+                             images=post["images"], videos=post["videos"])
+
+class ScrapeBulkIn(BaseModel):
+    urls: List[str] = Field(..., min_length=1, max_length=1000)
+    price_eur: float | None = None
+    category_id: int | None = None
+
+class ScrapeJobOut(BaseModel):
+    id: int
+    status: str
+    category_id: Optional[int] = None
+    total: int
+    processed_count: int
+    saved_count: int
+    failed_count: int
+    errors: List[dict] = []
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+    updated_at: datetime
+
+    @classmethod
+    def from_job(cls, job: ScrapeJob) -> "ScrapeJobOut":
+        return cls(id=job.id, status=job.status, category_id=job.category_id, total=job.total,
+                   processed_count=job.processed_count, saved_count=job.saved_count, failed_count=job.failed_count,
+                   errors=json.loads(job.errors or "[]"), created_at=job.created_at, finished_at=job.finished_at,
+                   updated_at=job.updated_at)
+
+@router.post('/scrape-bulk', response_model=ScrapeJobOut)
+def scrape_bulk(data: ScrapeBulkIn, db: Session = Depends(get_db), admin=Depends(get_current_admin)):
+    """Scrape many post URLs into draft products in the background; poll the returned job."""
+    return ScrapeJobOut.from_job(scrape_jobs.start_job(db, data.urls, data.price_eur, data.category_id))
+
+@router.get('/scrape-jobs/{job_id}', response_model=ScrapeJobOut)
+def get_scrape_job(job_id: int, db: Session = Depends(get_db), admin=Depends(get_current_admin)):
+    job = db.query(ScrapeJob).filter(ScrapeJob.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Not found")
+    return ScrapeJobOut.from_job(job)
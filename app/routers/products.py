@@ -1,16 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, Response, UploadFile
 from sqlalchemy.orm import Session
 from typing import List, Any, Dict
 from app.db.database import get_db
 from app.schemas.product import ProductCreate, ProductOut
 from pydantic import BaseModel
-from app.services import product_service
+from fastapi.responses import StreamingResponse
+from app.services import product_service, import_service, export_service
+from app.services.cache import invalidate_products
+from app.services.http_cache import make_etag, not_modified, validator_headers
 from app.dependencies import get_current_admin
 
 router = APIRouter(prefix="/products", tags=["products"])
 
 @router.get("/")
 def list_products(
+    request: Request,
     page: int = Query(1, ge=1),
     limit: int = Query(20, ge=1, le=100),
     search: str | None = None,
@@ -19,26 +23,62 @@ def list_products(
     featured: bool | None = None,
     offers: bool | None = None,
     paginated: bool = Query(False),
+    cursor: str | None = Query(None, description="Keyset cursor; pass an empty value for the first page"),
+    include_total: bool = Query(False),
+    view: str | None = Query(None, description="'summary' returns card fields only"),
+    fields: str | None = Query(None, description="Comma-separated ProductOut fields to return"),
     db: Session = Depends(get_db)) -> Any:
-    items, total = product_service.list_products(db, page=page, limit=limit, search=search, category=category, sort=sort, featured=featured, offers=offers)
-    if not paginated:
-        return [ProductOut.model_validate(i) for i in items]
-    pages = (total + limit - 1) // limit
-    return {
-        "products": [ProductOut.model_validate(i) for i in items],
-        "pagination": {"page": page, "limit": limit, "total": total, "pages": pages}
-    }
+    projection = product_service.resolve_fields(view, fields)
+    version = product_service.catalog_version(db)
+    etag = make_etag(version, request)
+    unchanged = not_modified(request, etag, version[1])
+    if unchanged:
+        return unchanged
+    body = product_service.list_products_payload(db, page=page, limit=limit, search=search, category=category, sort=sort, featured=featured, offers=offers, paginated=paginated, cursor=cursor, include_total=include_total, fields=projection)
+    return Response(content=body, media_type="application/json", headers=validator_headers(etag, version[1]))
 
 @router.post("/", response_model=ProductOut)
 def create_product(payload: ProductCreate, db: Session = Depends(get_db), admin=Depends(get_current_admin)):
     return product_service.create_product(db, payload)
 
+@router.post("/import")
+def import_products(
+    file: UploadFile = File(...),
+    format: str | None = Query(None, pattern="^(csv|jsonl)$", description="Defaults to the file extension"),
+    key: str = Query("slug", pattern="^(slug|source_url)$"),
+    batch_size: int = Query(500, ge=1, le=5000),
+    db: Session = Depends(get_db),
+    admin=Depends(get_current_admin)):
+    """Bulk upsert products from a CSV or JSON-lines upload; returns a per-row error report."""
+    fmt = format
+    if fmt is None:
+        name = (file.filename or "").lower()
+        fmt = "csv" if name.endswith(".csv") else "jsonl" if name.endswith((".jsonl", ".ndjson")) else None
+    if fmt is None:
+        raise HTTPException(status_code=400, detail="Unknown file format (use ?format=csv|jsonl)")
+    return import_service.import_products(db, file.file, fmt, key=key, batch_size=batch_size)
+
+EXPORT_MEDIA_TYPES = {"csv": "text/csv; charset=utf-8", "ndjson": "application/x-ndjson"}
+
+@router.get("/export")
+def export_products(format: str = Query("csv", pattern="^(csv|ndjson)$"), admin=Depends(get_current_admin)):
+    return StreamingResponse(
+        export_service.export_products(format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="products.{format}"'},
+    )
+
 @router.get("/{product_id}", response_model=ProductOut)
-def get_product(product_id: int, db: Session = Depends(get_db)):
-    prod = product_service.get_product(db, product_id)
-    if not prod:
+def get_product(product_id: int, request: Request, db: Session = Depends(get_db)):
+    version = product_service.catalog_version(db)
+    etag = make_etag(version, request)
+    unchanged = not_modified(request, etag, version[1])
+    if unchanged:
+        return unchanged
+    body = product_service.get_product_payload(db, product_id)
+    if body is None:
         raise HTTPException(status_code=404, detail="Not found")
-    return prod
+    return Response(content=body, media_type="application/json", headers=validator_headers(etag, version[1]))
 
 @router.put("/{product_id}", response_model=ProductOut)
 def update_product(product_id: int, payload: ProductCreate, db: Session = Depends(get_db), admin=Depends(get_current_admin)):
@@ -47,8 +87,9 @@ def update_product(product_id: int, payload: ProductCreate, db: Session = Depend
         raise HTTPException(status_code=404, detail="Not found")
     for k, v in payload.model_dump().items():
         setattr(prod, k, v)
-    db.commit()
+    product_service.commit_product(db)
     db.refresh(prod)
+    invalidate_products([product_id])
     return prod
 
 @router.delete("/{product_id}")
@@ -58,6 +99,7 @@ def delete_product(product_id: int, db: Session = Depends(get_db), admin=Depends
         raise HTTPException(status_code=404, detail="Not found")
     db.delete(prod)
     db.commit()
+    invalidate_products([product_id])
     return {"ok": True}
 
 class ProductFlagsIn(BaseModel):
@@ -79,4 +121,5 @@ def update_flags(product_id: int, data: ProductFlagsIn, db: Session = Depends(ge
     if changed:
         db.commit()
         db.refresh(prod)
+        invalidate_products([product_id])
     return prod
@@ -1,15 +1,30 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import or_, asc, desc
+from sqlalchemy import asc, desc
 from typing import Any, Dict
 from app.db.database import get_db
 from app.models.product import Product
-from app.schemas.product import ProductOut
+from app.services.pagination import keyset_page
+from app.services.product_service import resolve_fields, project, serialize_products, catalog_version
+from app.services.http_cache import make_etag, not_modified, validator_headers
+from app.services.search_index import apply_search
+from app.services.facet_service import compute_facets
 
 router = APIRouter(prefix="/search", tags=["search"])
 
+# sort param -> (column, descending) for cursor mode
+SEARCH_SORTS = {
+    'price_low': (Product.price_eur, False),
+    'price_high': (Product.price_eur, True),
+    'name': (Product.title, False),
+    'newest': (Product.id, True),
+}
+
 @router.get("/")
 def search_products(
+    request: Request,
     q: str | None = Query(None),
     category: int | None = None,
     minPrice: float | None = None,
@@ -17,31 +32,69 @@ def search_products(
     page: int = Query(1, ge=1),
     limit: int = Query(20, ge=1, le=100),
     sort: str | None = None,
+    cursor: str | None = Query(None, description="Keyset cursor; pass an empty value for the first page"),
+    includeTotal: bool = Query(False),
+    facets: bool = Query(False, description="Include category / price / featured / offer counts"),
+    view: str | None = Query(None, description="'summary' returns card fields only"),
+    fields: str | None = Query(None, description="Comma-separated ProductOut fields to return"),
     db: Session = Depends(get_db)
-) -> Dict[str, Any]:
+) -> Any:
+    projection = resolve_fields(view, fields)
+    version = catalog_version(db)
+    etag = make_etag(version, request)
+    unchanged = not_modified(request, etag, version[1])
+    if unchanged:
+        return unchanged
+    headers = validator_headers(etag, version[1])
     query = db.query(Product)
+    rank = None
     if q:
-        like = f"%{q}%"
-        query = query.filter(or_(Product.title.ilike(like), Product.description.ilike(like)))
+        query, rank = apply_search(db, query, q)
     if category:
         query = query.filter(Product.category_id == category)
     if minPrice is not None:
         query = query.filter(Product.price_eur >= minPrice)
     if maxPrice is not None:
         query = query.filter(Product.price_eur <= maxPrice)
-    total = query.count()
+    filters = {
+        "query": q,
+        "category": category,
+        "minPrice": minPrice,
+        "maxPrice": maxPrice,
+        "sort": sort
+    }
+    facet_counts = compute_facets(query) if facets else None
+    if cursor is not None:
+        sort_key = sort if sort in SEARCH_SORTS else 'newest'
+        column, descending = SEARCH_SORTS[sort_key]
+        items, next_cursor = keyset_page(project(query, projection, column), Product, column, descending, sort_key, cursor or None, limit)
+        pagination: Dict[str, Any] = {"limit": limit, "nextCursor": next_cursor, "hasNext": next_cursor is not None}
+        if includeTotal:
+            pagination["count"] = facet_counts["total"] if facet_counts else query.order_by(None).count()
+        out: Dict[str, Any] = {
+            "products": serialize_products(items, projection),
+            "pagination": pagination,
+            "filters": filters
+        }
+        if facet_counts is not None:
+            out["facets"] = facet_counts
+        return JSONResponse(jsonable_encoder(out), headers=headers)
+    # facet rows already add up to the total, no need for a separate count()
+    total = facet_counts["total"] if facet_counts else query.count()
     if sort == 'price_low':
         query = query.order_by(asc(Product.price_eur))
     elif sort == 'price_high':
         query = query.order_by(desc(Product.price_eur))
     elif sort == 'name':
         query = query.order_by(asc(Product.title))
+    elif rank is not None and sort in (None, 'relevance'):
+        query = query.order_by(desc(rank), desc(Product.id))
     else:
         query = query.order_by(desc(Product.id))
-    items = query.offset((page - 1) * limit).limit(limit).all()
+    items = project(query, projection).offset((page - 1) * limit).limit(limit).all()
     total_pages = (total + limit - 1) // limit
-    return {
-        "products": [ProductOut.model_validate(i) for i in items],
+    out = {
+        "products": serialize_products(items, projection),
         "pagination": {
             "current": page,
             "total": total_pages,
@@ -49,11 +102,8 @@ def search_products(
             "hasNext": page < total_pages,
             "hasPrev": page > 1
         },
-        "filters": {
-            "query": q,
-            "category": category,
-            "minPrice": minPrice,
-            "maxPrice": maxPrice,
-            "sort": sort
-        }
+        "filters": filters
     }
+    if facet_counts is not None:
+        out["facets"] = facet_counts
+    return JSONResponse(jsonable_encoder(out), headers=headers)
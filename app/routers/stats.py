@@ -6,6 +6,8 @@ from app.dependencies import get_current_admin
 from app.models.product import Product
 from app.models.category import Category
 from app.models.order import Order
+from app.services import http_clients, loop_monitor, suggestion_cache
+from app.services.cache import catalog_cache
 
 router = APIRouter(prefix="/stats", tags=["stats"])
 
@@ -28,3 +30,15 @@ class CurrencyRatesOut(BaseModel):
 def get_currency_rates(admin=Depends(get_current_admin)):
     # Static mock for now; replace with external API later
     return CurrencyRatesOut(base="EUR", rates={"EUR":1, "USD":1.08, "ALL":102.5})
+
+@router.get("/cache")
+def get_cache_stats(admin=Depends(get_current_admin)):
+    return {"catalog": catalog_cache.stats(), "ai_suggestions": suggestion_cache.stats()}
+
+@router.get("/http")
+def get_http_client_stats(admin=Depends(get_current_admin)):
+    return http_clients.stats()
+
+@router.get("/loop")
+def get_loop_stats(admin=Depends(get_current_admin)):
+    return loop_monitor.stats()
@@ -39,7 +39,8 @@ class OrderCreate(BaseModel):
     shipping_zip: Optional[str] = None
     shipping_country: Optional[str] = None
 
-class OrderOut(BaseModel):
+class OrderSummaryOut(BaseModel):
+    """Order without its items (list endpoint with include_items=false)."""
     id: int
     order_number: str
     customer_id: Optional[int]
@@ -55,6 +56,8 @@ class OrderOut(BaseModel):
     shipping_zip: Optional[str] = None
     shipping_country: Optional[str] = None
     created_at: Optional[datetime] = None
-    items: List[OrderItemOut]
     class Config:
         from_attributes = True
+
+class OrderOut(OrderSummaryOut):
+    items: List[OrderItemOut]
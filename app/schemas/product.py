@@ -19,7 +19,18 @@ class ProductBase(BaseModel):
 class ProductCreate(ProductBase):
     pass
 
+class ProductImportRow(ProductCreate):
+    """One row of a bulk CSV/JSONL import; `slug` or `source_url` is the upsert key."""
+    slug: Optional[str] = None
+    is_draft: bool = False
+
 class ProductOut(ProductBase):
     id: int
     class Config:
         from_attributes = True
+
+# Columns needed to render a product card (list/search `view=summary`); skips description/images
+PRODUCT_SUMMARY_FIELDS = (
+    "id", "title", "price_eur", "price_lek", "stock", "category_id",
+    "is_featured", "is_offer", "discount_price_eur", "discount_price_lek",
+)
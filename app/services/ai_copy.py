@@ -0,0 +1,82 @@
+import json
+import os
+import re
+from typing import Any, Dict, List
+import httpx
+from app.core.config import get_settings
+from app.services.settings_service import get_setting
+
+# OpenAI product copy generation, shared by POST /products/ai/suggest and the batch
+# copy jobs. Callers pass the httpx client: request handlers use the shared pooled one,
+# job threads their own (pooled connections belong to the event loop that opened them).
+
+settings = get_settings()
+
+OPENAI_KEY_NAME = "OPENAI_API_KEY"
+MODEL = "gpt-4o-mini"
+PROMPT_VERSION = "1"  # bump when the prompt changes so cached answers are not reused
+
+SYSTEM_PROMPT = "You are an ecommerce product copy assistant for Albanian (sq) language unless specified. Return concise output."
+
+class OpenAIError(Exception):
+    """Non-2xx answer from OpenAI; `retry_after` is set from the header on 429/503."""
+    def __init__(self, status_code: int, body: str, retry_after: float | None = None):
+        super().__init__(f"OpenAI error {status_code}: {body[:200]}")
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+    @property
+    def retryable(self) -> bool:
+        return self.status_code == 429 or self.status_code >= 500
+
+    @property
+    def auth_failed(self) -> bool:
+        """The key is missing, revoked or not allowed: no later call with it can succeed."""
+        return self.status_code in (401, 403)
+
+def openai_key() -> str | None:
+    return get_setting(OPENAI_KEY_NAME) or os.getenv('OPENAI_API_KEY')
+
+def _retry_after(response: httpx.Response) -> float | None:
+    try:
+        return float(response.headers["retry-after"])
+    except (KeyError, ValueError):
+        return None
+
+def parse_copy(content: str) -> Dict[str, Any]:
+    json_text = content
+    m = re.search(r"```json(.*?)```", content, re.S)
+    if m:
+        json_text = m.group(1)
+    try:
+        parsed = json.loads(json_text)
+    except Exception:
+        parsed = {}
+    tags = parsed.get('tags') or []
+    if isinstance(tags, str):
+        tags = [t.strip() for t in tags.split(',') if t.strip()]
+    return {"suggested_title": parsed.get('title'), "description": parsed.get('description'), "tags": tags}
+
+async def suggest_copy(client: httpx.AsyncClient, api_key: str, title: str, features: List[str],
+                       language: str = "sq", tone: str | None = None) -> Dict[str, Any]:
+    """Suggested title, description and tags; raises OpenAIError on an error status."""
+    user_prompt = (
+        f"Generate improved product title, 120-160 word engaging description, and 5-10 short comma-separated SEO tags.\n"
+        f"Title: {title}\nFeatures: {', '.join(features) or 'N/A'}\nLanguage: {language}\n"
+        f"Tone: {tone or 'neutral professional'}\nRespond in JSON with keys: title, description, tags (array)."
+    )
+    r = await client.post(f"{settings.OPENAI_BASE_URL}/chat/completions", headers={
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json"
+    }, json={
+        "model": MODEL,
+        "messages": [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": user_prompt}
+        ],
+        "temperature": 0.7,
+        "max_tokens": 600
+    }, timeout=60)
+    if r.status_code >= 400:
+        raise OpenAIError(r.status_code, r.text, _retry_after(r))
+    return parse_copy(r.json()["choices"][0]["message"]["content"])
@@ -0,0 +1,324 @@
+import asyncio
+import json
+import logging
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Dict, List
+import httpx
+from fastapi import HTTPException
+from sqlalchemy import and_, func, or_, update
+from sqlalchemy.orm import Query, Session
+from app.core.config import get_settings
+from app.db.database import SessionLocal
+from app.models.ai_copy_job import AiCopyJob
+from app.models.product import Product
+from app.services import ai_copy, http_clients, suggestion_cache
+from app.services.cache import invalidate_products
+
+# Batch AI copy generation. A job walks the products matching its filter in id order
+# and fans OpenAI calls out on a private event loop in its own thread, at most
+# `concurrency` at a time. 429/5xx answers back off (Retry-After when given,
+# exponential otherwise) and hold the whole job, since the rate limit is per account.
+# Generated copy is buffered and written with one executemany UPDATE per checkpoint,
+# together with a low-watermark product-id cursor and the counters, so a paused,
+# failed or interrupted job resumes after the last product it fully handled.
+# Products whose generation failed are recorded in `failed_ids` and retried first
+# whenever the job is started again, including a completed job that had failures.
+# A 401/403 fails the whole job at once: every remaining call would be refused too.
+# Jobs limited to missing descriptions only write products that still have none, so
+# copy an admin typed in while the call was in flight is kept.
+# Answers go through the suggestion cache like POST /products/ai/suggest.
+#
+# The loop belongs to the job alone, so its short synchronous DB calls don't hold up
+# request handling.
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+PAGE_SIZE = 100
+WRITE_BATCH = 25
+CHECKPOINT_SECONDS = 1.0
+
+_runners: Dict[int, "CopyJobRunner"] = {}
+_runners_lock = threading.Lock()
+
+def product_filter(q: Query, job: AiCopyJob) -> Query:
+    if job.category_id is not None:
+        q = q.filter(Product.category_id == job.category_id)
+    if job.drafts_only:
+        q = q.filter(Product.is_draft.is_(True))
+    if job.missing_description:
+        q = q.filter(or_(Product.description.is_(None), Product.description == ""))
+    return q
+
+class CopyJobRunner:
+    def __init__(self, job_id: int):
+        self.job_id = job_id
+        self.stop_requested = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"ai-copy-{job_id}", daemon=True)
+        self._lock = threading.Lock()
+        self._window: deque = deque()  # [product_id, done, retry] in dispatch order, for the low-watermark
+        self._cursor: int | None = None
+        self._writes: List[dict] = []
+        self._processed = 0
+        self._updated = 0
+        self._failed = 0
+        self._last_error: str | None = None
+        self._failed_ids: List[int] | None = None  # None until loaded from the job
+        self._cooldown_until = 0.0
+        self._only_missing = False  # job.missing_description: guard the writes with it
+        self._fatal_error: str | None = None
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def join(self, timeout: float | None = None) -> None:
+        self._thread.join(timeout)
+
+    def _done(self, entry: list, values: dict | None, error: str | None) -> None:
+        product_id, _, retry = entry
+        with self._lock:
+            entry[1] = True
+            if retry:
+                # already counted as processed and failed by an earlier run
+                self._failed -= 1
+                self._failed_ids.remove(product_id)
+            else:
+                self._processed += 1
+            if error:
+                self._failed += 1
+                self._failed_ids.append(product_id)
+                self._last_error = error
+            elif values:
+                self._writes.append(values)
+                self._updated += 1
+            while self._window and self._window[0][1]:
+                self._cursor = self._window.popleft()[0]
+
+    def _checkpoint(self, db: Session, **extra) -> AiCopyJob:
+        with self._lock:
+            writes, self._writes = self._writes, []
+            values = {"cursor": self._cursor, "processed_count": AiCopyJob.processed_count + self._processed,
+                      "updated_count": AiCopyJob.updated_count + self._updated,
+                      "failed_count": AiCopyJob.failed_count + self._failed, "updated_at": datetime.utcnow()}
+            if self._last_error:
+                values["last_error"] = self._last_error[:1000]
+            if self._failed_ids is not None:
+                values["failed_ids"] = json.dumps(self._failed_ids)
+            self._processed = self._updated = self._failed = 0
+            self._last_error = None
+        if values["cursor"] is None:
+            values.pop("cursor")
+        stmt = update(Product)
+        if writes and self._only_missing:
+            # an admin may have written a description while the call was in flight: keep it
+            missing = or_(Product.description.is_(None), Product.description == "")
+            still_missing = {i for (i,) in db.query(Product.id).filter(Product.id.in_([w["id"] for w in writes]), missing)}
+            values["updated_count"] -= sum(1 for w in writes if w["id"] not in still_missing)
+            writes = [w for w in writes if w["id"] in still_missing]
+            stmt = stmt.where(missing).execution_options(synchronize_session=None)
+        if writes:
+            # one executemany UPDATE ... WHERE id = ? for the whole batch
+            now = datetime.utcnow()
+            db.execute(stmt, [{**w, "updated_at": now} for w in writes])
+        db.query(AiCopyJob).filter(AiCopyJob.id == self.job_id).update(values, synchronize_session=False)
+        if extra:
+            # a final status only replaces "running", never a pause that landed meanwhile
+            db.query(AiCopyJob).filter(AiCopyJob.id == self.job_id, AiCopyJob.status == "running").update(
+                extra, synchronize_session=False)
+        db.commit()
+        if writes:
+            invalidate_products([w["id"] for w in writes])
+        return db.query(AiCopyJob).filter(AiCopyJob.id == self.job_id).populate_existing().one()
+
+    def _run(self) -> None:
+        try:
+            asyncio.run(self._process_all())
+        except Exception as e:
+            logger.exception("AI copy job %s failed", self.job_id)
+            with SessionLocal() as db:
+                self._checkpoint(db, status="failed", last_error=f"{type(e).__name__}: {e}"[:1000], finished_at=datetime.utcnow())
+        finally:
+            with _runners_lock:
+                if _runners.get(self.job_id) is self:
+                    del _runners[self.job_id]
+
+    async def _call(self, client: httpx.AsyncClient, api_key: str, job: AiCopyJob, title: str, features: List[str]) -> dict:
+        for attempt in range(settings.AI_COPY_MAX_RETRIES + 1):
+            wait = self._cooldown_until - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            try:
+                return await ai_copy.suggest_copy(client, api_key, title, features, job.language, job.tone)
+            except (ai_copy.OpenAIError, httpx.TransportError) as e:
+                retryable = isinstance(e, httpx.TransportError) or e.retryable
+                if not retryable or attempt == settings.AI_COPY_MAX_RETRIES:
+                    raise
+                delay = getattr(e, "retry_after", None)
+                if delay is None:
+                    delay = settings.AI_COPY_BACKOFF_SECONDS * 2 ** attempt * random.uniform(1.0, 1.5)
+                self._cooldown_until = max(self._cooldown_until, time.monotonic() + delay)
+        raise AssertionError("unreachable")
+
+    async def _generate(self, client: httpx.AsyncClient, api_key: str, job: AiCopyJob, entry: list,
+                        title: str, description: str | None, slots: asyncio.Semaphore) -> None:
+        try:
+            features = [description[:500]] if description else []
+            key = suggestion_cache.cache_key({"title": title, "features": features, "language": job.language,
+                                              "tone": job.tone}, ai_copy.MODEL, ai_copy.PROMPT_VERSION)
+            with SessionLocal() as db:
+                copy = suggestion_cache.lookup(db, key)
+            if copy is None:
+                copy = await self._call(client, api_key, job, title, features)
+                if copy["suggested_title"] or copy["description"]:
+                    with SessionLocal() as db:
+                        suggestion_cache.store(db, key, ai_copy.MODEL, ai_copy.PROMPT_VERSION, copy)
+            values = {"id": entry[0]}
+            if copy.get("description"):
+                values["description"] = copy["description"]
+            if job.update_title and copy.get("suggested_title"):
+                values["title"] = copy["suggested_title"][:220]
+            self._done(entry, values if len(values) > 1 else None, None)
+        except Exception as e:
+            if isinstance(e, ai_copy.OpenAIError) and e.auth_failed:
+                self._fatal_error = f"OpenAI refused the API key: {e}"
+                self.stop_requested.set()
+            self._done(entry, None, f"product {entry[0]}: {type(e).__name__}: {e}")
+        finally:
+            slots.release()
+
+    async def _process_all(self) -> None:
+        with SessionLocal() as db:
+            job = db.query(AiCopyJob).filter(AiCopyJob.id == self.job_id).one()
+            api_key = ai_copy.openai_key()
+            if not api_key:
+                self._checkpoint(db, status="failed", last_error="OpenAI key mungon")
+                return
+            self._only_missing = job.missing_description
+            retry_ids = json.loads(job.failed_ids or "[]")
+            retry_set = set(retry_ids)
+            self._failed_ids = list(retry_ids)
+            concurrency = max(1, min(job.concurrency, settings.AI_COPY_MAX_CONCURRENCY))
+            slots = asyncio.Semaphore(concurrency)
+            tasks: set = set()
+            last_checkpoint = time.monotonic()
+
+            async def dispatch(client: httpx.AsyncClient, rows: List[tuple], retry: bool) -> bool:
+                """Fan out generation for `rows`; False once the job has been stopped."""
+                nonlocal last_checkpoint
+                for product_id, title, description in rows:
+                    await slots.acquire()
+                    if time.monotonic() - last_checkpoint >= CHECKPOINT_SECONDS or len(self._writes) >= WRITE_BATCH:
+                        last_checkpoint = time.monotonic()
+                        if self._checkpoint(db).status != "running":
+                            self.stop_requested.set()
+                    if self.stop_requested.is_set():
+                        slots.release()
+                        return False
+                    entry = [product_id, False, retry]
+                    if not retry:
+                        # retries don't take part in the cursor's low-watermark
+                        with self._lock:
+                            self._window.append(entry)
+                    task = asyncio.create_task(self._generate(client, api_key, job, entry, title, description, slots))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+                return True
+
+            status = "completed"
+            async with http_clients.build_client() as client:
+                if retry_ids:
+                    rows = (product_filter(db.query(Product.id, Product.title, Product.description), job)
+                            .filter(Product.id.in_(retry_ids)).order_by(Product.id.asc()).all())
+                    gone = retry_set - {r[0] for r in rows}
+                    with self._lock:
+                        # deleted, or no longer matching the filter: nothing left to retry
+                        self._failed_ids = [i for i in self._failed_ids if i not in gone]
+                        self._failed -= len(gone)
+                    if not await dispatch(client, rows, retry=True):
+                        status = None
+                last_id = job.cursor or 0
+                while status:
+                    page = (product_filter(db.query(Product.id, Product.title, Product.description), job)
+                            .filter(Product.id > last_id).order_by(Product.id.asc()).limit(PAGE_SIZE).all())
+                    if not page:
+                        break
+                    # an interrupted run may have checkpointed a failure ahead of its cursor
+                    fresh = [row for row in page if row[0] not in retry_set]
+                    if not await dispatch(client, fresh, retry=False):
+                        status = None
+                        break
+                    last_id = page[-1][0]
+                if tasks:
+                    await asyncio.gather(*tasks)
+            if self._fatal_error:
+                self._checkpoint(db, status="failed", last_error=self._fatal_error[:1000], finished_at=datetime.utcnow())
+            elif status is None:
+                self._checkpoint(db)
+            else:
+                self._checkpoint(db, status=status, finished_at=datetime.utcnow())
+
+def _launch(job_id: int) -> None:
+    runner = CopyJobRunner(job_id)
+    with _runners_lock:
+        if job_id in _runners:
+            return
+        _runners[job_id] = runner
+    runner.start()
+
+def start_job(db: Session, job: AiCopyJob) -> AiCopyJob:
+    """Start (or resume) a job in this worker; a running one is only taken over once its heartbeat is stale."""
+    stale_before = datetime.utcnow() - timedelta(seconds=settings.AI_COPY_LEASE_SECONDS)
+    values = {"status": "running", "updated_at": datetime.utcnow(), "finished_at": None,
+              "started_at": func.coalesce(AiCopyJob.started_at, datetime.utcnow())}
+    if job.started_at is None:
+        values["total"] = product_filter(db.query(Product), job).count()
+    claimed = db.query(AiCopyJob).filter(
+        AiCopyJob.id == job.id,
+        or_(AiCopyJob.status.in_(("draft", "paused", "failed")),
+            # a completed job with failures is started again to retry them
+            and_(AiCopyJob.status == "completed", AiCopyJob.failed_count > 0),
+            and_(AiCopyJob.status == "running", AiCopyJob.updated_at < stale_before)),
+    ).update(values, synchronize_session=False)
+    db.commit()
+    if not claimed:
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}")
+    _launch(job.id)
+    db.refresh(job)
+    return job
+
+def pause_job(db: Session, job: AiCopyJob) -> AiCopyJob:
+    # the runner notices at its next checkpoint (whichever worker owns it)
+    db.query(AiCopyJob).filter(AiCopyJob.id == job.id, AiCopyJob.status == "running").update(
+        {"status": "paused"}, synchronize_session=False)
+    db.commit()
+    with _runners_lock:
+        runner = _runners.get(job.id)
+    if runner:
+        runner.stop_requested.set()
+    db.refresh(job)
+    return job
+
+def resume_interrupted() -> int:
+    """Take over running jobs whose owner stopped heartbeating (e.g. after a restart)."""
+    resumed = 0
+    stale_before = datetime.utcnow() - timedelta(seconds=settings.AI_COPY_LEASE_SECONDS)
+    with SessionLocal() as db:
+        stale = db.query(AiCopyJob.id, AiCopyJob.updated_at).filter(
+            AiCopyJob.status == "running", AiCopyJob.updated_at < stale_before).all()
+        for job_id, heartbeat in stale:
+            won = db.query(AiCopyJob).filter(
+                AiCopyJob.id == job_id, AiCopyJob.updated_at == heartbeat
+            ).update({"updated_at": datetime.utcnow()}, synchronize_session=False)
+            db.commit()
+            if won:
+                _launch(job_id)
+                resumed += 1
+    return resumed
+
+def runner_for(job_id: int) -> CopyJobRunner | None:
+    with _runners_lock:
+        return _runners.get(job_id)
@@ -0,0 +1,122 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Iterable
+from app.core.config import get_settings
+
+class TTLCache:
+    """Small thread-safe LRU cache whose entries also expire after `ttl` seconds.
+
+    Values are stored as-is; callers keep them immutable (we store serialized JSON bytes).
+    Every invalidation bumps a generation counter so a load that started before the
+    invalidation cannot write its (now stale) result back afterwards.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0, enabled: bool = True):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.enabled = enabled
+        self._data: "OrderedDict[str, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Any | None:
+        if not self.enabled:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < now:
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: str, value: Any, generation: int | None = None) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_load(self, key: str, loader: Callable[[], Any]) -> Any:
+        value = self.get(key)
+        if value is not None:
+            return value
+        generation = self._generation
+        value = loader()
+        if value is not None:
+            self.set(key, value, generation)
+        return value
+
+    def invalidate(self, *keys: str) -> None:
+        with self._lock:
+            self._generation += 1
+            for k in keys:
+                self._data.pop(k, None)
+
+    def invalidate_prefix(self, *prefixes: str) -> None:
+        with self._lock:
+            self._generation += 1
+            for k in [k for k in self._data if k.startswith(prefixes)]:
+                del self._data[k]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+_settings = get_settings()
+
+# Public catalog reads (products + categories). Per-process: with several gunicorn workers
+# an admin write only clears the worker that handled it, the TTL bounds staleness elsewhere.
+catalog_cache = TTLCache(
+    maxsize=_settings.CATALOG_CACHE_MAX_ENTRIES,
+    ttl=_settings.CATALOG_CACHE_TTL_SECONDS,
+    enabled=_settings.CATALOG_CACHE_ENABLED,
+)
+
+PRODUCT_LIST_PREFIX = "products:list:"
+CATEGORY_LIST_KEY = "categories:list"
+
+def product_key(product_id: int) -> str:
+    return f"product:{product_id}"
+
+def category_slug_key(slug: str) -> str:
+    return f"category:slug:{slug}"
+
+def list_key(prefix: str, params: dict) -> str:
+    return prefix + "&".join(f"{k}={params[k]}" for k in sorted(params))
+
+def invalidate_products(product_ids: Iterable[int] = ()) -> None:
+    """Drop the given product detail entries and every cached product list page."""
+    catalog_cache.invalidate(*(product_key(pid) for pid in product_ids))
+    catalog_cache.invalidate_prefix(PRODUCT_LIST_PREFIX)
+
+def invalidate_categories(*slugs: str) -> None:
+    catalog_cache.invalidate(CATEGORY_LIST_KEY, *(category_slug_key(s) for s in slugs if s))
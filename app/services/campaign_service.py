@@ -0,0 +1,236 @@
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, Tuple
+from fastapi import HTTPException
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.orm import Session
+from app.core.config import get_settings
+from app.db.database import SessionLocal
+from app.models.customer import Customer
+from app.models.email_campaign import EmailCampaign
+from app.models.order import Order
+from app.services import email_delivery
+from app.services.templates import environment
+
+# Bulk email campaigns. Recipients are streamed from the database in lower(email)
+# order with a server-side cursor (yield_per), rendered per recipient, and sent over
+# the pooled SMTP sessions by a bounded thread pool, paced to rate_per_second.
+# Progress (a low-watermark email cursor plus counters) is checkpointed about once a
+# second; a restart resumes after the cursor, so at most the in-flight messages are
+# sent twice. The checkpoint doubles as a heartbeat: a `running` campaign whose
+# heartbeat is older than CAMPAIGN_LEASE_SECONDS is picked up by another worker.
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+SEGMENTS = ("customers", "orders")
+YIELD_PER = 500
+CHECKPOINT_SECONDS = 1.0
+
+_runners: Dict[int, "CampaignRunner"] = {}
+_runners_lock = threading.Lock()
+
+def iter_recipients(db: Session, campaign: EmailCampaign) -> Iterator[Tuple[str, str | None]]:
+    """Yield (email, name) per distinct lower-cased address, after the campaign cursor."""
+    if campaign.segment == "orders":
+        email = func.lower(Order.shipping_email)
+        stmt = select(email.label("email"), func.max(Order.shipping_name)).where(Order.shipping_email.isnot(None))
+        if campaign.order_status:
+            stmt = stmt.where(Order.status == campaign.order_status)
+        stmt = stmt.group_by(email)
+    else:
+        email = func.lower(Customer.email)
+        stmt = select(email.label("email"), Customer.name)
+    if campaign.cursor:
+        stmt = stmt.where(email > campaign.cursor)
+    stmt = stmt.order_by(email).execution_options(yield_per=YIELD_PER)
+    for address, name in db.execute(stmt):
+        if address:
+            yield address, name
+
+class _Pacer:
+    """Spaces sends 1/rate seconds apart across all sender threads."""
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next, now)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+class CampaignRunner:
+    def __init__(self, campaign_id: int):
+        self.campaign_id = campaign_id
+        self.stop_requested = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"campaign-{campaign_id}", daemon=True)
+        self._lock = threading.Lock()
+        self._window: deque = deque()  # [email, done] in send order, for the low-watermark
+        self._cursor: str | None = None
+        self._sent = 0
+        self._failed = 0
+        self._last_error: str | None = None
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def join(self, timeout: float | None = None) -> None:
+        self._thread.join(timeout)
+
+    def _done(self, entry: list, error: str | None) -> None:
+        with self._lock:
+            entry[1] = True
+            if error:
+                self._failed += 1
+                self._last_error = error
+            else:
+                self._sent += 1
+            while self._window and self._window[0][1]:
+                self._cursor = self._window.popleft()[0]
+
+    def _checkpoint(self, db: Session, **extra) -> EmailCampaign:
+        with self._lock:
+            values = {"cursor": self._cursor, "sent_count": EmailCampaign.sent_count + self._sent,
+                      "failed_count": EmailCampaign.failed_count + self._failed, "updated_at": datetime.utcnow()}
+            if self._last_error:
+                values["last_error"] = self._last_error[:1000]
+            self._sent = self._failed = 0
+            self._last_error = None
+        if values["cursor"] is None:
+            values.pop("cursor")
+        db.query(EmailCampaign).filter(EmailCampaign.id == self.campaign_id).update(values, synchronize_session=False)
+        if extra:
+            # a final status only replaces "running": a pause that landed since the last
+            # checkpoint must not be overwritten with "completed" or "failed"
+            db.query(EmailCampaign).filter(EmailCampaign.id == self.campaign_id, EmailCampaign.status == "running").update(
+                extra, synchronize_session=False)
+        db.commit()
+        return db.query(EmailCampaign).filter(EmailCampaign.id == self.campaign_id).populate_existing().one()
+
+    def _run(self) -> None:
+        try:
+            self._send_all()
+        except Exception as e:
+            logger.exception("campaign %s failed", self.campaign_id)
+            with SessionLocal() as db:
+                self._checkpoint(db, status="failed", last_error=f"{type(e).__name__}: {e}"[:1000], finished_at=datetime.utcnow())
+        finally:
+            with _runners_lock:
+                if _runners.get(self.campaign_id) is self:
+                    del _runners[self.campaign_id]
+
+    def _send_all(self) -> None:
+        with SessionLocal() as db, SessionLocal() as stream_db:
+            campaign = db.query(EmailCampaign).filter(EmailCampaign.id == self.campaign_id).one()
+            env = environment()
+            subject_tpl = env.from_string(campaign.subject)
+            html_tpl = env.from_string(campaign.html)
+            concurrency = max(1, min(campaign.concurrency, settings.CAMPAIGN_MAX_CONCURRENCY))
+            pacer = _Pacer(campaign.rate_per_second)
+            slots = threading.BoundedSemaphore(concurrency)
+            fatal: list = []
+
+            def send(entry: list, name: str | None) -> None:
+                address = entry[0]
+                try:
+                    context = {"email": address, "name": name or "Klient", "campaign": campaign.name}
+                    email_delivery.deliver_email([address], subject_tpl.render(context), html_tpl.render(context))
+                except email_delivery.EmailNotConfigured as e:
+                    # nothing can be sent: stop without advancing past this recipient
+                    fatal.append(str(e))
+                    self.stop_requested.set()
+                except Exception as e:
+                    self._done(entry, f"{address}: {type(e).__name__}: {e}")
+                else:
+                    self._done(entry, None)
+                finally:
+                    slots.release()
+
+            last_checkpoint = time.monotonic()
+            status = "completed"
+            with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix=f"campaign-{self.campaign_id}") as pool:
+                for address, name in iter_recipients(stream_db, campaign):
+                    if time.monotonic() - last_checkpoint >= CHECKPOINT_SECONDS:
+                        last_checkpoint = time.monotonic()
+                        if self._checkpoint(db).status != "running":
+                            self.stop_requested.set()
+                    if self.stop_requested.is_set():
+                        status = None
+                        break
+                    slots.acquire()
+                    pacer.wait()
+                    entry = [address, False]
+                    with self._lock:
+                        self._window.append(entry)
+                    pool.submit(send, entry, name)
+            if fatal:
+                self._checkpoint(db, status="failed", last_error=fatal[0])
+            elif status is None:
+                self._checkpoint(db)
+            else:
+                self._checkpoint(db, status=status, finished_at=datetime.utcnow())
+
+def _launch(campaign_id: int) -> None:
+    runner = CampaignRunner(campaign_id)
+    with _runners_lock:
+        if campaign_id in _runners:
+            return
+        _runners[campaign_id] = runner
+    runner.start()
+
+def start_campaign(db: Session, campaign: EmailCampaign) -> EmailCampaign:
+    """Start (or resume) a campaign in this worker; a running one is only taken over once its heartbeat is stale."""
+    stale_before = datetime.utcnow() - timedelta(seconds=settings.CAMPAIGN_LEASE_SECONDS)
+    claimed = db.query(EmailCampaign).filter(
+        EmailCampaign.id == campaign.id,
+        or_(EmailCampaign.status.in_(("draft", "paused", "failed")),
+            and_(EmailCampaign.status == "running", EmailCampaign.updated_at < stale_before)),
+    ).update({"status": "running", "updated_at": datetime.utcnow(),
+              "started_at": func.coalesce(EmailCampaign.started_at, datetime.utcnow())}, synchronize_session=False)
+    db.commit()
+    if not claimed:
+        raise HTTPException(status_code=409, detail=f"Campaign is {campaign.status}")
+    _launch(campaign.id)
+    db.refresh(campaign)
+    return campaign
+
+def pause_campaign(db: Session, campaign: EmailCampaign) -> EmailCampaign:
+    # the runner notices at its next checkpoint (whichever worker owns it)
+    db.query(EmailCampaign).filter(EmailCampaign.id == campaign.id, EmailCampaign.status == "running").update(
+        {"status": "paused"}, synchronize_session=False)
+    db.commit()
+    with _runners_lock:
+        runner = _runners.get(campaign.id)
+    if runner:
+        runner.stop_requested.set()
+    db.refresh(campaign)
+    return campaign
+
+def resume_interrupted() -> int:
+    """Take over running campaigns whose owner stopped heartbeating (e.g. after a restart)."""
+    resumed = 0
+    stale_before = datetime.utcnow() - timedelta(seconds=settings.CAMPAIGN_LEASE_SECONDS)
+    with SessionLocal() as db:
+        stale = db.query(EmailCampaign.id, EmailCampaign.updated_at).filter(
+            EmailCampaign.status == "running", EmailCampaign.updated_at < stale_before).all()
+        for campaign_id, heartbeat in stale:
+            won = db.query(EmailCampaign).filter(
+                EmailCampaign.id == campaign_id, EmailCampaign.updated_at == heartbeat
+            ).update({"updated_at": datetime.utcnow()}, synchronize_session=False)
+            db.commit()
+            if won:
+                _launch(campaign_id)
+                resumed += 1
+    return resumed
+
+def runner_for(campaign_id: int) -> CampaignRunner | None:
+    with _runners_lock:
+        return _runners.get(campaign_id)
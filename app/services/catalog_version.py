@@ -0,0 +1,104 @@
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterable, Set, Tuple
+from sqlalchemy import event, inspect
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from app.models.catalog_version import CatalogVersion
+from app.models.category import Category
+from app.models.product import Product
+from app.services.cache import catalog_cache
+
+# Shared write counters behind the catalog ETag/Last-Modified validators. Any ORM write
+# to Product or Category (flushed objects as well as bulk insert/update/delete
+# statements, deletes included) marks the session, and the counter row is bumped right
+# before that transaction commits. Every gunicorn worker therefore sees the new version
+# as soon as the write is visible. A worker that reads a version newer than the last
+# one it saw also drops its local catalog cache entries, so it doesn't serve a stale
+# body under the new ETag.
+#
+# Stock-only writes (checkout's reserve_stock, an admin restock) deliberately don't move
+# the counters: every checkout would otherwise queue on the same counter row and empty
+# the catalog cache in every worker. Stock in cached/validated catalog payloads is
+# therefore advisory (stale for at most the cache TTL or until the next catalog edit);
+# reserve_stock re-checks it under the row lock.
+
+PRODUCTS = "products"
+CATEGORIES = "categories"
+# product payloads embed their category, so category writes move both validators
+_TOUCHES = {Product: (PRODUCTS,), Category: (CATEGORIES, PRODUCTS)}
+_PENDING_KEY = "catalog_versions_pending"
+# Product columns whose changes alone don't invalidate catalog payloads
+_VOLATILE = frozenset({"stock", "updated_at"})
+
+_seen: Dict[str, int] = {}
+_seen_lock = threading.Lock()
+
+def _mark(session: Session, classes: Iterable[type]) -> None:
+    names: Set[str] = set()
+    for cls in classes:
+        names.update(_TOUCHES.get(cls, ()))
+    if names:
+        session.info.setdefault(_PENDING_KEY, set()).update(names)
+
+def _changed_attrs(obj: Any) -> Set[str]:
+    return {attr.key for attr in inspect(obj).attrs if attr.history.has_changes()}
+
+@event.listens_for(Session, "before_flush")
+def _on_flush(session: Session, flush_context, instances) -> None:
+    classes = {type(obj) for obj in (*session.new, *session.deleted)}
+    for obj in session.dirty:
+        if type(obj) not in classes and not (isinstance(obj, Product) and _changed_attrs(obj) <= _VOLATILE):
+            classes.add(type(obj))
+    _mark(session, classes)
+
+def _stock_only(statement: Any) -> bool:
+    values = getattr(statement, "_values", None)
+    if not values:
+        return False
+    return {getattr(key, "key", key) for key in values} <= _VOLATILE
+
+@event.listens_for(Session, "do_orm_execute")
+def _on_bulk(state) -> None:
+    if state.is_insert or state.is_delete:
+        _mark(state.session, {m.class_ for m in state.all_mappers})
+    elif state.is_update:
+        classes = {m.class_ for m in state.all_mappers}
+        if classes == {Product} and _stock_only(state.statement):
+            return
+        _mark(state.session, classes)
+
+@event.listens_for(Session, "before_commit")
+def _bump(session: Session) -> None:
+    session.flush()  # pending objects would otherwise be flushed after this hook
+    names = session.info.pop(_PENDING_KEY, None)
+    if names:
+        # taken as late as possible: the row lock is held only until the commit. Upserted,
+        # so a missing counter row is recreated instead of leaving the validators at 0.
+        table = CatalogVersion.__table__
+        conn = session.connection()
+        insert = pg_insert if conn.dialect.name == "postgresql" else sqlite_insert
+        now = datetime.utcnow()
+        stmt = insert(table).values([{"name": name, "version": 1, "changed_at": now} for name in sorted(names)])
+        conn.execute(stmt.on_conflict_do_update(
+            index_elements=[table.c.name],
+            set_={"version": table.c.version + 1, "changed_at": stmt.excluded.changed_at},
+        ))
+
+@event.listens_for(Session, "after_rollback")
+def _drop(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
+
+def current(db: Session, name: str) -> Tuple[Any, ...]:
+    """(version, changed_at) for ETag/Last-Modified; changed_at moves on deletes too."""
+    row = db.query(CatalogVersion.version, CatalogVersion.changed_at).filter(CatalogVersion.name == name).first()
+    if row is None:
+        return (0, None)
+    with _seen_lock:
+        stale = row.version > _seen.get(name, row.version)
+        _seen[name] = max(row.version, _seen.get(name, 0))
+    if stale:
+        # written through another worker: this worker's cached payloads may predate it
+        catalog_cache.clear()
+    return (row.version, row.changed_at)
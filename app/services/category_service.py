@@ -1,12 +1,34 @@
 from sqlalchemy.orm import Session
 from fastapi import HTTPException
 from app.models.category import Category
-from app.schemas.category import CategoryCreate
-from typing import List
+from app.schemas.category import CategoryCreate, CategoryOut
+from app.services.cache import catalog_cache, category_slug_key, invalidate_categories, CATEGORY_LIST_KEY
+from app.services import catalog_version as catalog_versions
+from pydantic_core import to_json
+from typing import Any, List, Tuple
 
 def list_categories(db: Session) -> List[Category]:
     return db.query(Category).order_by(Category.id).all()
 
+def list_categories_payload(db: Session) -> bytes:
+    """Serialized GET /categories/ response, served from the catalog cache when possible."""
+    return catalog_cache.get_or_load(
+        CATEGORY_LIST_KEY,
+        lambda: to_json([CategoryOut.model_validate(c) for c in list_categories(db)]),
+    )
+
+def categories_version(db: Session) -> Tuple[Any, ...]:
+    """(version, changed_at) of the shared category write counter; feeds ETag/Last-Modified."""
+    return catalog_versions.current(db, catalog_versions.CATEGORIES)
+
+def get_category_by_slug_payload(db: Session, slug: str) -> bytes | None:
+    def load() -> bytes | None:
+        cat = db.query(Category).filter(Category.slug == slug).first()
+        if not cat:
+            return None
+        return to_json({"category": {"id": cat.id, "name": cat.name, "slug": cat.slug, "productCount": 0}})
+    return catalog_cache.get_or_load(category_slug_key(slug), load)
+
 def create_category(db: Session, payload: CategoryCreate) -> Category:
     exists = db.query(Category).filter((Category.slug == payload.slug) | (Category.name == payload.name)).first()
     if exists:
@@ -15,4 +37,5 @@ def create_category(db: Session, payload: CategoryCreate) -> Category:
     db.add(cat)
     db.commit()
     db.refresh(cat)
+    invalidate_categories(cat.slug)
     return cat
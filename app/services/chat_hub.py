@@ -0,0 +1,201 @@
+import asyncio
+import json
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Set, Tuple
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+from app.core.config import get_settings
+from app.db.database import engine
+
+# Publish/subscribe for chat events. Handlers call `hub().publish(db, channel, payload)`
+# inside their transaction and delivery happens only if it commits:
+#
+# - InMemoryHub (sqlite, tests, single worker): the payload is parked on the session
+#   and handed to local subscribers from an after_commit hook.
+# - PostgresHub: the payload goes out with pg_notify() in the same transaction;
+#   Postgres delivers it on commit to the LISTEN connection of every worker
+#   (including this one), which fans it out to that worker's subscribers.
+#
+# Subscribers are asyncio queues (WebSocket handlers, long-polls); deliveries arrive
+# from other threads and are handed over with call_soon_threadsafe. A subscriber that
+# falls a full queue behind gets its queue replaced by a single RESYNC marker and
+# re-reads what it missed from the database.
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+PG_CHANNEL = "chat_events"
+PG_PAYLOAD_LIMIT = 7900  # NOTIFY payloads must stay under 8000 bytes
+_PENDING_KEY = "chat_hub_pending"
+LAST_ID_CHANNELS = 10000
+RESYNC: Dict[str, Any] = {"resync": True}
+
+class Subscription:
+    def __init__(self, channel: str, maxsize: int = 1000):
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+
+    def push(self, payload: Dict[str, Any]) -> None:
+        self.loop.call_soon_threadsafe(self._put, payload)
+
+    def _put(self, payload: Dict[str, Any]) -> None:
+        if self.queue.full():
+            # slow consumer: drop everything queued and tell it to catch up from the DB,
+            # which also covers this payload
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            payload = RESYNC
+        self.queue.put_nowait(payload)
+
+    async def get(self, timeout: float | None = None) -> Dict[str, Any] | None:
+        """Next event, or None if `timeout` passes first."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+class InMemoryHub:
+    def __init__(self):
+        self._subs: Dict[str, Set[Subscription]] = {}
+        self._lock = threading.Lock()
+        # newest event id seen per channel (bounded LRU); lets long-polls skip the DB when
+        # idle. Only kept while this hub provably sees every worker's commits, i.e. while
+        # a LISTEN connection is up: the in-memory hub can't know whether other processes
+        # write to the same database, so it never records them.
+        self._last_ids: "OrderedDict[str, int]" = OrderedDict()
+        self._tracking = False
+
+    @contextmanager
+    def subscribe(self, channel: str) -> Iterator[Subscription]:
+        sub = Subscription(channel)
+        with self._lock:
+            self._subs.setdefault(channel, set()).add(sub)
+        try:
+            yield sub
+        finally:
+            with self._lock:
+                subs = self._subs.get(channel)
+                if subs:
+                    subs.discard(sub)
+                    if not subs:
+                        del self._subs[channel]
+
+    def subscriber_count(self, channel: str) -> int:
+        with self._lock:
+            return len(self._subs.get(channel, ()))
+
+    def last_seen(self, channel: str) -> int | None:
+        """Newest event id delivered on `channel` since the hub started tracking, or None if unknown."""
+        with self._lock:
+            return self._last_ids.get(channel) if self._tracking else None
+
+    def _set_tracking(self, on: bool) -> None:
+        # ids recorded before a (re)connect may have missed notifications: start over
+        with self._lock:
+            self._tracking = on
+            self._last_ids.clear()
+
+    def deliver(self, channel: str, payload: Dict[str, Any]) -> None:
+        with self._lock:
+            event_id = payload.get("id")
+            if self._tracking and isinstance(event_id, int) and event_id > self._last_ids.get(channel, 0):
+                self._last_ids[channel] = event_id
+                self._last_ids.move_to_end(channel)
+                if len(self._last_ids) > LAST_ID_CHANNELS:
+                    self._last_ids.popitem(last=False)
+            subs = list(self._subs.get(channel, ()))
+        for sub in subs:
+            sub.push(payload)
+
+    def publish(self, db: Session, channel: str, payload: Dict[str, Any]) -> None:
+        db.info.setdefault(_PENDING_KEY, []).append((channel, payload))
+
+    def start(self) -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
+
+class PostgresHub(InMemoryHub):
+    def __init__(self):
+        super().__init__()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def publish(self, db: Session, channel: str, payload: Dict[str, Any]) -> None:
+        message = json.dumps({"channel": channel, "payload": payload}, default=str, separators=(",", ":"))
+        if len(message.encode()) > PG_PAYLOAD_LIMIT:
+            # too big for NOTIFY: subscribers get a stub and re-read the row themselves
+            message = json.dumps({"channel": channel, "payload": {"id": payload.get("id"), "truncated": True}})
+        db.execute(text("SELECT pg_notify(:ch, :msg)"), {"ch": PG_CHANNEL, "msg": message})
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._listen, name="chat-listen", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(5)
+
+    def _listen(self) -> None:
+        import psycopg
+
+        conninfo = engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+        backoff = 1.0
+        while not self._stop.is_set():
+            try:
+                with psycopg.connect(conninfo, autocommit=True) as conn:
+                    conn.execute(f"LISTEN {PG_CHANNEL}")
+                    # every commit from here on reaches us, so ids delivered from now are trustworthy
+                    self._set_tracking(True)
+                    backoff = 1.0
+                    while not self._stop.is_set():
+                        for notify in conn.notifies(timeout=1.0):
+                            try:
+                                msg = json.loads(notify.payload)
+                                self.deliver(msg["channel"], msg["payload"])
+                            except (ValueError, KeyError):
+                                logger.warning("ignoring malformed chat notification")
+            except Exception:
+                logger.exception("chat LISTEN connection failed; retrying in %.0fs", backoff)
+                self._set_tracking(False)
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, 30.0)
+        self._set_tracking(False)
+
+_hub: InMemoryHub | None = None
+_hub_lock = threading.Lock()
+
+def hub() -> InMemoryHub:
+    global _hub
+    if _hub is None:
+        with _hub_lock:
+            if _hub is None:
+                backend = settings.CHAT_HUB_BACKEND
+                if backend == "auto":
+                    backend = "postgres" if engine.dialect.name == "postgresql" else "memory"
+                _hub = PostgresHub() if backend == "postgres" else InMemoryHub()
+    return _hub
+
+@event.listens_for(Session, "after_commit")
+def _flush_pending(session: Session) -> None:
+    pending: List[Tuple[str, Dict[str, Any]]] = session.info.pop(_PENDING_KEY, None)
+    if pending:
+        h = hub()
+        for channel, payload in pending:
+            h.deliver(channel, payload)
+
+@event.listens_for(Session, "after_rollback")
+def _drop_pending(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
+
+def session_channel(session_id: str) -> str:
+    return f"chat:{session_id}"
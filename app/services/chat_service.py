@@ -0,0 +1,93 @@
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+from fastapi import HTTPException
+from sqlalchemy import and_, func, select
+from sqlalchemy.orm import Session
+from app.models.chat import ChatMessage, ChatSession
+from app.services.chat_hub import hub, session_channel
+from app.services.pagination import keyset_filter, trim_page
+
+INBOX_SORT = "activity"
+
+def list_inbox(db: Session, limit: int = 50, cursor: str | None = None) -> Tuple[List[dict], str | None]:
+    """One keyset page of sessions (most recent activity first) with each session's last
+    message and message count, in a single statement:
+
+    page    = the next limit+1 sessions after the cursor
+    ranked  = messages of those sessions with row_number() / count() windows per session
+    result  = page LEFT JOIN ranked ON rn = 1
+    """
+    page = keyset_filter(db.query(ChatSession.id), ChatSession, ChatSession.last_activity_at, True,
+                         INBOX_SORT, cursor).limit(limit + 1).subquery()
+    ranked = select(
+        ChatMessage.id, ChatMessage.session_id, ChatMessage.role, ChatMessage.content, ChatMessage.created_at,
+        func.row_number().over(partition_by=ChatMessage.session_id, order_by=ChatMessage.id.desc()).label("rn"),
+        func.count().over(partition_by=ChatMessage.session_id).label("message_count"),
+    ).where(ChatMessage.session_id.in_(select(page.c.id))).subquery()
+    rows = (
+        db.query(ChatSession, ranked.c.id, ranked.c.role, ranked.c.content, ranked.c.created_at, ranked.c.message_count)
+        .join(page, page.c.id == ChatSession.id)
+        .outerjoin(ranked, and_(ranked.c.session_id == ChatSession.id, ranked.c.rn == 1))
+        .order_by(ChatSession.last_activity_at.desc(), ChatSession.id.desc())
+        .all()
+    )
+    rows, next_cursor = trim_page(rows, limit, INBOX_SORT, lambda r: (r[0].last_activity_at, r[0].id))
+    items = []
+    for sess, msg_id, role, content, created_at, count in rows:
+        items.append({
+            "id": sess.id,
+            "session_id": sess.session_id,
+            "customer_email": sess.customer_email,
+            "customer_name": sess.customer_name,
+            "created_at": sess.created_at,
+            "last_activity_at": sess.last_activity_at,
+            "message_count": count or 0,
+            "last_message": {"id": msg_id, "role": role, "content": content, "created_at": created_at} if msg_id else None,
+        })
+    return items, next_cursor
+
+def get_session_or_404(db: Session, session_id: str) -> ChatSession:
+    sess = db.query(ChatSession).filter(ChatSession.session_id == session_id).first()
+    if not sess:
+        raise HTTPException(status_code=404, detail="Not found")
+    return sess
+
+def page_messages(db: Session, sess: ChatSession, limit: int = 50,
+                  before_id: int | None = None, after_id: int | None = None) -> Tuple[List[ChatMessage], bool]:
+    """Messages in ascending id order plus whether more exist in the paging direction.
+
+    after_id pages forward (newer); otherwise the newest `limit` messages older than
+    before_id (or the newest overall) are returned, and has_more refers to older ones.
+    """
+    if before_id is not None and after_id is not None:
+        raise HTTPException(status_code=400, detail="Use either before_id or after_id")
+    q = db.query(ChatMessage).filter(ChatMessage.session_id == sess.id)
+    if after_id is not None:
+        rows = q.filter(ChatMessage.id > after_id).order_by(ChatMessage.id.asc()).limit(limit + 1).all()
+        return rows[:limit], len(rows) > limit
+    if before_id is not None:
+        q = q.filter(ChatMessage.id < before_id)
+    rows = q.order_by(ChatMessage.id.desc()).limit(limit + 1).all()
+    return list(reversed(rows[:limit])), len(rows) > limit
+
+def message_event(sess: ChatSession, msg: ChatMessage) -> Dict[str, Any]:
+    return {"id": msg.id, "session_id": sess.session_id, "role": msg.role, "content": msg.content,
+            "created_at": msg.created_at.isoformat()}
+
+def post_message(db: Session, sess: ChatSession, role: str, content: str) -> ChatMessage:
+    """Store a message and publish it to the session's subscribers once the transaction commits."""
+    msg = ChatMessage(session_id=sess.id, role=role, content=content, created_at=datetime.utcnow())
+    sess.last_activity_at = msg.created_at
+    db.add(msg)
+    db.flush()
+    hub().publish(db, session_channel(sess.session_id), message_event(sess, msg))
+    db.commit()
+    return msg
+
+def messages_after(db: Session, session_id: str, after_id: int, limit: int = 200) -> Tuple[ChatSession | None, List[ChatMessage]]:
+    sess = db.query(ChatSession).filter(ChatSession.session_id == session_id).first()
+    if sess is None:
+        return None, []
+    rows = (db.query(ChatMessage).filter(ChatMessage.session_id == sess.id, ChatMessage.id > after_id)
+            .order_by(ChatMessage.id.asc()).limit(limit).all())
+    return sess, rows
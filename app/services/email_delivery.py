@@ -0,0 +1,52 @@
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from typing import Optional
+from app.services import smtp_pool
+from app.services.settings_service import get_setting
+from app.services.smtp_pool import SmtpConfig
+
+# Sending one email with the SMTP admin settings over the pooled sessions. Shared by the
+# outbox worker, bulk campaigns and the admin /emails endpoints.
+
+class EmailNotConfigured(Exception):
+    pass
+
+def smtp_config() -> Optional[SmtpConfig]:
+    host = get_setting("smtp_host")
+    port_str = get_setting("smtp_port") or "587"
+    secure_str = get_setting("smtp_secure") or "false"
+    user = get_setting("smtp_user")
+    password = get_setting("smtp_password")
+    if not host or not user or not password:
+        return None
+    try:
+        port = int(port_str)
+    except ValueError:
+        port = 587
+    secure = str(secure_str).lower() in ("1", "true", "yes", "on")
+    return SmtpConfig(host=host, port=port, secure=secure, user=user, password=password)
+
+def build_message(subject: str, html: str, from_email: str, from_name: str, to: list[str]) -> str:
+    msg = MIMEMultipart("alternative")
+    msg["Subject"] = subject
+    msg["From"] = f"{from_name} <{from_email}>"
+    msg["To"] = ", ".join(to)
+    msg.attach(MIMEText(html, "html", _charset="utf-8"))
+    return msg.as_string()
+
+def deliver_email(
+    to: list[str],
+    subject: str,
+    html: str,
+    from_email: Optional[str] = None,
+    from_name: Optional[str] = None,
+) -> None:
+    """Send one message with the SMTP admin settings; raises on any failure."""
+    config = smtp_config()
+    from_email = from_email or get_setting("smtp_from_email") or (config.user if config else None)
+    from_name = from_name or get_setting("smtp_from_name") or "ProudShop"
+
+    if not config or not from_email:
+        raise EmailNotConfigured("SMTP settings are not configured")
+
+    smtp_pool.get_pool(config).sendmail(from_email, to, build_message(subject, html, from_email, from_name, to))
@@ -0,0 +1,107 @@
+import csv
+import io
+import json
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Iterator, List, Sequence
+from sqlalchemy import select
+from app.db.database import SessionLocal
+from app.models.order import Order, OrderItem
+from app.models.product import Product
+
+# Streaming exports. Each generator opens its own session (the request-scoped one is
+# closed before a StreamingResponse body is sent) and reads with yield_per, which is a
+# server-side cursor on Postgres, so memory stays flat and the first bytes go out at once.
+
+YIELD_PER = 1000
+FLUSH_ROWS = 500
+
+PRODUCT_COLUMNS = [
+    "id", "title", "slug", "description", "price_eur", "price_lek", "stock", "category_id",
+    "images", "is_featured", "is_offer", "discount_price_eur", "discount_price_lek",
+    "source_url", "is_draft", "created_at", "updated_at",
+]
+ORDER_COLUMNS = [
+    "id", "order_number", "customer_id", "status", "total_eur", "total_lek",
+    "shipping_name", "shipping_email", "shipping_phone", "shipping_address",
+    "shipping_city", "shipping_zip", "shipping_country", "created_at",
+]
+ITEM_COLUMNS = ["id", "product_id", "quantity", "price_eur", "price_lek"]
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if hasattr(value, "value"):  # enums
+        return value.value
+    return value
+
+def _csv_chunks(header: Sequence[str], rows: Iterator[Sequence[Any]]) -> Iterator[str]:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(header)
+    n = 0
+    for row in rows:
+        writer.writerow([_plain(v) for v in row])
+        n += 1
+        if n % FLUSH_ROWS == 0:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue()
+
+def _ndjson_chunks(objs: Iterator[dict]) -> Iterator[str]:
+    lines: List[str] = []
+    for obj in objs:
+        lines.append(json.dumps(obj, ensure_ascii=False, default=str))
+        if len(lines) >= FLUSH_ROWS:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+def export_products(fmt: str) -> Iterator[str]:
+    cols = [getattr(Product, c) for c in PRODUCT_COLUMNS]
+    with SessionLocal() as db:
+        result = db.execute(select(*cols).order_by(Product.id).execution_options(yield_per=YIELD_PER))
+        if fmt == "csv":
+            yield from _csv_chunks(PRODUCT_COLUMNS, iter(result))
+        else:
+            yield from _ndjson_chunks({c: _plain(v) for c, v in zip(PRODUCT_COLUMNS, row)} for row in result)
+
+def _order_rows(db, status: str | None) -> Iterator[Sequence[Any]]:
+    # one streaming query: orders LEFT JOIN items, ordered so each order's items are contiguous
+    stmt = (
+        select(*[getattr(Order, c) for c in ORDER_COLUMNS], *[getattr(OrderItem, c) for c in ITEM_COLUMNS])
+        .outerjoin(OrderItem, OrderItem.order_id == Order.id)
+        .order_by(Order.id, OrderItem.id)
+        .execution_options(yield_per=YIELD_PER)
+    )
+    if status:
+        stmt = stmt.where(Order.status == status)
+    return iter(db.execute(stmt))
+
+def _group_orders(rows: Iterator[Sequence[Any]]) -> Iterator[dict]:
+    n = len(ORDER_COLUMNS)
+    current: dict | None = None
+    for row in rows:
+        if current is None or current["id"] != row[0]:
+            if current is not None:
+                yield current
+            current = {c: _plain(v) for c, v in zip(ORDER_COLUMNS, row[:n])}
+            current["items"] = []
+        if row[n] is not None:
+            current["items"].append({c: _plain(v) for c, v in zip(ITEM_COLUMNS, row[n:])})
+    if current is not None:
+        yield current
+
+def export_orders(fmt: str, status: str | None = None) -> Iterator[str]:
+    with SessionLocal() as db:
+        rows = _order_rows(db, status)
+        if fmt == "csv":
+            # one line per order item (order columns repeated); orders without items get one line
+            header = ORDER_COLUMNS + [f"item_{c}" for c in ITEM_COLUMNS]
+            yield from _csv_chunks(header, rows)
+        else:
+            yield from _ndjson_chunks(_group_orders(rows))
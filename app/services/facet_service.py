@@ -0,0 +1,52 @@
+from typing import Any, Dict
+from sqlalchemy import case, func
+from sqlalchemy.orm import Query
+from app.models.category import Category
+from app.models.product import Product
+
+# Lower bounds (EUR) of the price buckets shown next to search results; the last bucket is open-ended.
+PRICE_BUCKETS = [0, 10, 25, 50, 100, 250, 500]
+
+def _bucket_expr():
+    whens = [(Product.price_eur >= lo, i) for i, lo in reversed(list(enumerate(PRICE_BUCKETS)))]
+    return case(*whens, else_=None)
+
+def compute_facets(query: Query) -> Dict[str, Any]:
+    """Category, price-bucket and featured/offer counts for an already-filtered product query.
+
+    Everything comes from one GROUP BY over (category, bucket, featured, offer); the
+    handful of resulting rows are folded into the individual facets in Python.
+    """
+    bucket = _bucket_expr().label("bucket")
+    rows = (
+        query.order_by(None)
+        .outerjoin(Category, Category.id == Product.category_id)
+        .with_entities(Product.category_id, Category.name, Category.slug, bucket,
+                       Product.is_featured, Product.is_offer, func.count(Product.id))
+        .group_by(Product.category_id, Category.name, Category.slug, bucket, Product.is_featured, Product.is_offer)
+        .all()
+    )
+    categories: Dict[Any, Dict[str, Any]] = {}
+    prices = [0] * len(PRICE_BUCKETS)
+    featured = offers = total = 0
+    for cat_id, cat_name, cat_slug, b, is_featured, is_offer, n in rows:
+        total += n
+        cat = categories.setdefault(cat_id, {"id": cat_id, "name": cat_name, "slug": cat_slug, "count": 0})
+        cat["count"] += n
+        if b is not None:
+            prices[b] += n
+        if is_featured:
+            featured += n
+        if is_offer:
+            offers += n
+    price_facets = []
+    for i, lo in enumerate(PRICE_BUCKETS):
+        hi = PRICE_BUCKETS[i + 1] if i + 1 < len(PRICE_BUCKETS) else None
+        price_facets.append({"min": lo, "max": hi, "count": prices[i]})
+    return {
+        "total": total,
+        "categories": sorted(categories.values(), key=lambda c: -c["count"]),
+        "price": price_facets,
+        "featured": featured,
+        "offers": offers,
+    }
@@ -0,0 +1,42 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Iterable
+from fastapi import Request, Response
+
+# Conditional GET helpers for catalog endpoints. Validators come from a cheap
+# aggregate "version" tuple (row count, max(updated_at), max(id)) that is itself
+# kept in the catalog cache, so a 304 costs no serialization and usually no query.
+
+def make_etag(version: Iterable[Any], request: Request) -> str:
+    raw = "|".join(str(v) for v in version) + "|" + request.url.path + "?" + str(request.url.query)
+    return 'W/"' + hashlib.sha1(raw.encode()).hexdigest()[:20] + '"'
+
+def validator_headers(etag: str, last_modified: datetime | None) -> dict[str, str]:
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(last_modified.replace(tzinfo=timezone.utc, microsecond=0), usegmt=True)
+    return headers
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in header.split(","))
+
+def not_modified(request: Request, etag: str, last_modified: datetime | None) -> Response | None:
+    """Return a bodyless 304 if the client's validators are still current, else None."""
+    headers = validator_headers(etag, last_modified)
+    inm = request.headers.get("if-none-match")
+    if inm is not None:
+        # If-None-Match takes precedence over If-Modified-Since (RFC 9110 13.2.2)
+        return Response(status_code=304, headers=headers) if _etag_matches(inm, etag) else None
+    ims = request.headers.get("if-modified-since")
+    if ims and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(ims)
+        except (TypeError, ValueError):
+            return None
+        if since.tzinfo is not None and last_modified.replace(tzinfo=timezone.utc, microsecond=0) <= since:
+            return Response(status_code=304, headers=headers)
+    return None
@@ -0,0 +1,149 @@
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict
+import httpx
+from app.core.config import get_settings
+
+# Shared outbound HTTP client. One httpx.AsyncClient per process, opened and closed by
+# the app lifespan, so calls to OpenAI and scraped hosts reuse keep-alive (and, when
+# the optional `h2` package is installed, HTTP/2) connections instead of paying
+# DNS + TCP + TLS on every request. A transport wrapper caps concurrent requests
+# per host and counts new connections vs requests through httpcore's trace hook,
+# which is what GET /stats/http reports as reuse. Outside the lifespan (scripts,
+# tests) client() hands out a short-lived client instead, closed after use.
+# Redirects are not followed unless a call asks for it (follow_redirects=True).
+
+settings = get_settings()
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:  # pragma: no cover - optional dependency
+    HTTP2_AVAILABLE = False
+
+class _Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.connections = 0
+        self.tls_handshakes = 0
+        self.http2_requests = 0
+
+    def incr(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            reused = max(self.requests - self.connections, 0)
+            return {
+                "requests": self.requests,
+                "new_connections": self.connections,
+                "reused_connections": reused,
+                "reuse_ratio": round(reused / self.requests, 3) if self.requests else None,
+                "tls_handshakes": self.tls_handshakes,
+                "http2_requests": self.http2_requests,
+            }
+
+metrics = _Metrics()
+
+async def _trace(event: str, info: dict) -> None:
+    if event == "connection.connect_tcp.complete":
+        metrics.incr("connections")
+    elif event == "connection.start_tls.complete":
+        metrics.incr("tls_handshakes")
+    elif event == "http11.send_request_headers.started":
+        metrics.incr("requests")
+    elif event == "http2.send_request_headers.started":
+        metrics.incr("requests")
+        metrics.incr("http2_requests")
+
+class _ReleasingStream(httpx.AsyncByteStream):
+    def __init__(self, stream: httpx.AsyncByteStream, release):
+        self._stream = stream
+        self._release = release
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            self._release()
+
+class HostLimitedTransport(httpx.AsyncBaseTransport):
+    """At most `per_host` in-flight requests per host; the slot is held until the body is closed."""
+    def __init__(self, inner: httpx.AsyncBaseTransport, per_host: int):
+        self._inner = inner
+        self._per_host = per_host
+        self._slots: Dict[str, asyncio.Semaphore] = {}
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        slot = self._slots.setdefault(request.url.host, asyncio.Semaphore(self._per_host))
+        await slot.acquire()
+        released = False
+
+        def release() -> None:
+            nonlocal released
+            if not released:
+                released = True
+                slot.release()
+
+        request.extensions.setdefault("trace", _trace)
+        try:
+            response = await self._inner.handle_async_request(request)
+        except BaseException:
+            release()
+            raise
+        response.stream = _ReleasingStream(response.stream, release)
+        return response
+
+    async def aclose(self) -> None:
+        await self._inner.aclose()
+
+def build_client(per_host: int | None = None) -> httpx.AsyncClient:
+    limits = httpx.Limits(
+        max_connections=settings.HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY_SECONDS,
+    )
+    http2 = settings.HTTP_CLIENT_HTTP2 and HTTP2_AVAILABLE
+    transport = HostLimitedTransport(httpx.AsyncHTTPTransport(limits=limits, http2=http2, retries=1),
+                                     per_host or settings.HTTP_MAX_CONNECTIONS_PER_HOST)
+    timeout = httpx.Timeout(settings.HTTP_TIMEOUT_SECONDS, connect=settings.HTTP_CONNECT_TIMEOUT_SECONDS)
+    return httpx.AsyncClient(transport=transport, timeout=timeout)
+
+_client: httpx.AsyncClient | None = None
+_client_loop: asyncio.AbstractEventLoop | None = None
+
+async def startup() -> None:
+    global _client, _client_loop
+    _client, _client_loop = build_client(), asyncio.get_running_loop()
+
+async def shutdown() -> None:
+    global _client, _client_loop
+    client, _client, _client_loop = _client, None, None
+    if client is not None:
+        await client.aclose()
+
+def get_client() -> httpx.AsyncClient:
+    """The shared client; only available on the event loop of the app lifespan."""
+    if _client is None or _client_loop is not asyncio.get_running_loop():
+        # pooled connections belong to the loop that opened them
+        raise RuntimeError("The shared HTTP client is only available inside the app lifespan")
+    return _client
+
+@asynccontextmanager
+async def client() -> AsyncIterator[httpx.AsyncClient]:
+    """The shared client inside the app lifespan, otherwise a fresh one closed on exit."""
+    if _client is not None and _client_loop is asyncio.get_running_loop():
+        yield _client
+        return
+    async with build_client() as c:
+        yield c
+
+def stats() -> dict:
+    return {"http2": settings.HTTP_CLIENT_HTTP2 and HTTP2_AVAILABLE, **metrics.snapshot()}
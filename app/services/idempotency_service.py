@@ -0,0 +1,158 @@
+import hashlib
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable
+from fastapi import HTTPException
+from fastapi.responses import Response
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.core.config import get_settings
+from app.models.idempotency import IdempotencyKey
+
+# Idempotency-Key support. The first request with a key claims a row
+# (status in_progress) before doing any work; a successful response is stored
+# on completion. Replays with the same key and body get the stored response,
+# a different body with the same key is rejected, and duplicates arriving while
+# the original is still running wait for it instead of executing again. The stored
+# response is written in the handler's own transaction, so the work and its
+# completion row commit (or roll back) together. A request that fails before that
+# commit releases its claim: errors such as insufficient stock may not hold on
+# retry, so the retry (or a waiting duplicate) runs the request itself.
+
+settings = get_settings()
+
+_waiters: dict[tuple[str, str], threading.Event] = {}
+_waiters_lock = threading.Lock()
+
+def fingerprint(payload: Any) -> str:
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str).encode()).hexdigest()
+
+def _replay(row: IdempotencyKey) -> Response:
+    return Response(
+        content=row.response_body or "",
+        status_code=row.response_status or 200,
+        media_type="application/json",
+        headers={"Idempotent-Replayed": "true"},
+    )
+
+def _hold(scope: str, key: str) -> None:
+    with _waiters_lock:
+        _waiters[(scope, key)] = threading.Event()
+
+def _release(scope: str, key: str) -> None:
+    with _waiters_lock:
+        ev = _waiters.pop((scope, key), None)
+    if ev:
+        ev.set()
+
+def _claim(db: Session, scope: str, key: str, request_hash: str) -> IdempotencyKey | None:
+    """Insert an in_progress row for (scope, key); returns the existing row if someone else holds it."""
+    now = datetime.utcnow()
+    if random.random() < 0.01:
+        db.query(IdempotencyKey).filter(IdempotencyKey.expires_at < now).delete(synchronize_session=False)
+        db.commit()
+    row = IdempotencyKey(scope=scope, key=key, request_hash=request_hash, status="in_progress",
+                         created_at=now, expires_at=now + timedelta(hours=settings.IDEMPOTENCY_TTL_HOURS))
+    db.add(row)
+    try:
+        db.commit()
+        _hold(scope, key)
+        return None
+    except IntegrityError:
+        db.rollback()
+    existing = db.query(IdempotencyKey).filter(IdempotencyKey.scope == scope, IdempotencyKey.key == key).first()
+    if existing is None:
+        return _claim(db, scope, key, request_hash)
+    stale = existing.status == "in_progress" and existing.created_at < now - timedelta(seconds=settings.IDEMPOTENCY_LOCK_SECONDS)
+    if existing.expires_at < now or stale:
+        # take over an expired or abandoned key (conditional on the old timestamp so only one wins)
+        taken = db.query(IdempotencyKey).filter(
+            IdempotencyKey.id == existing.id, IdempotencyKey.created_at == existing.created_at
+        ).update({
+            "request_hash": request_hash, "status": "in_progress", "response_status": None,
+            "response_body": None, "created_at": now, "expires_at": row.expires_at,
+        }, synchronize_session=False)
+        db.commit()
+        if taken:
+            _hold(scope, key)
+            return None
+        db.expire_all()
+        existing = db.query(IdempotencyKey).filter(IdempotencyKey.id == existing.id).first()
+    return existing
+
+def _wait_for(db: Session, row: IdempotencyKey) -> IdempotencyKey | None:
+    """Wait for a concurrent duplicate to finish: woken in-process, polling the DB for other workers.
+
+    Returns the completed row, or None when the original failed and released the key."""
+    row_id = row.id  # read once: expire_all() below would reload a deleted row
+    with _waiters_lock:
+        ev = _waiters.get((row.scope, row.key))
+    deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+    while time.monotonic() < deadline:
+        if ev is not None:
+            ev.wait(0.1)
+        else:
+            time.sleep(0.1)
+        db.expire_all()
+        current = db.query(IdempotencyKey).filter(IdempotencyKey.id == row_id).first()
+        if current is None or current.status == "completed":
+            return current
+    raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is still in progress")
+
+def run_idempotent(db: Session, scope: str, key: str, payload: Any,
+                   handler: Callable[[Callable[[Any], None]], Any], serialize: Callable[[Any], str]) -> Response:
+    """Execute `handler` at most once per (scope, key) and return its (stored) JSON response.
+
+    `handler` receives a `complete(result)` callback and must call it inside its
+    transaction, before committing: it stages the stored response on the claim row so
+    both commit at once."""
+    if len(key) > 255:
+        raise HTTPException(status_code=400, detail="Idempotency-Key too long")
+    request_hash = fingerprint(payload)
+    while True:
+        existing = _claim(db, scope, key, request_hash)
+        if existing is None:
+            break
+        if existing.request_hash != request_hash:
+            raise HTTPException(status_code=422, detail="Idempotency-Key was already used with a different request")
+        if existing.status != "completed":
+            row, existing = existing, _wait_for(db, existing)
+            if existing is None:
+                # the original failed and let go of the key: claim it and run. Drop the deleted
+                # row first, as the database may hand its id to our own claim.
+                db.expunge(row)
+                continue
+        return _replay(existing)
+
+    body: str | None = None
+
+    def complete(result: Any) -> None:
+        nonlocal body
+        body = serialize(result)
+        db.query(IdempotencyKey).filter(IdempotencyKey.scope == scope, IdempotencyKey.key == key).update(
+            {"status": "completed", "response_status": 200, "response_body": body}, synchronize_session=False)
+
+    try:
+        handler(complete)
+        if body is None:
+            raise RuntimeError(f"idempotent handler for {scope} returned without calling complete()")
+        db.commit()  # no-op when the handler already committed
+    except Exception:
+        _forget(db, scope, key)
+        raise
+    _release(scope, key)
+    return Response(content=body, status_code=200, media_type="application/json",
+                    headers={"Idempotent-Replayed": "false"})
+
+def _forget(db: Session, scope: str, key: str) -> None:
+    # failed request: drop the claim so the client's retry (or a waiting duplicate) can run.
+    # A claim already committed as completed stays: the work it records went through.
+    db.rollback()
+    db.query(IdempotencyKey).filter(
+        IdempotencyKey.scope == scope, IdempotencyKey.key == key, IdempotencyKey.status == "in_progress"
+    ).delete(synchronize_session=False)
+    db.commit()
+    _release(scope, key)
@@ -0,0 +1,125 @@
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Any, BinaryIO, Dict, Iterator, List, Tuple
+from pydantic import ValidationError
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from app.models.product import Product
+from app.schemas.product import ProductImportRow
+from app.services.cache import invalidate_products
+
+# Streaming bulk import: rows are parsed one at a time from the uploaded file,
+# validated, and flushed every `batch_size` rows as a single multi-row
+# INSERT ... ON CONFLICT (key) DO UPDATE, so memory stays bounded by the batch.
+
+UPSERT_KEYS = ("slug", "source_url")
+MAX_REPORTED_ERRORS = 1000
+
+def _iter_rows(fileobj: BinaryIO, fmt: str) -> Iterator[Tuple[int, Dict[str, Any] | None, str | None]]:
+    """Yield (line_no, raw_row, parse_error) without reading the whole file."""
+    text = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+    if fmt == "csv":
+        reader = csv.DictReader(text)
+        for row in reader:
+            # blank cells mean "not provided"
+            yield reader.line_num, {k: v for k, v in row.items() if k and v not in (None, "")}, None
+    else:
+        for line_no, line in enumerate(text, start=1):
+            if not line.strip():
+                continue
+            try:
+                obj = json.loads(line)
+            except ValueError as e:
+                yield line_no, None, f"Invalid JSON: {e}"
+                continue
+            if not isinstance(obj, dict):
+                yield line_no, None, "Expected a JSON object"
+                continue
+            yield line_no, obj, None
+
+def _insert_for(db: Session):
+    return pg_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+
+class ImportReport:
+    def __init__(self):
+        self.processed = 0
+        self.upserted = 0
+        self.error_count = 0
+        self.errors: List[Dict[str, Any]] = []
+
+    def error(self, row: int, message: str) -> None:
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row, "error": message})
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "processed": self.processed,
+            "upserted": self.upserted,
+            "error_count": self.error_count,
+            "errors": self.errors,
+            "errors_truncated": self.error_count > len(self.errors),
+        }
+
+def _flush(db: Session, key: str, batch: Dict[Any, Tuple[int, Dict[str, Any]]], report: ImportReport) -> None:
+    if not batch:
+        return
+    insert = _insert_for(db)
+    key_col = getattr(Product, key)
+    # rows in one statement must share a column set; group by the provided columns
+    groups: Dict[frozenset, List[Tuple[int, Dict[str, Any]]]] = {}
+    for line_no, values in batch.values():
+        groups.setdefault(frozenset(values), []).append((line_no, values))
+    for cols, rows in groups.items():
+        stmt = insert(Product).values([v for _, v in rows])
+        update_cols = {c: stmt.excluded[c] for c in cols if c != key}
+        update_cols["updated_at"] = stmt.excluded.updated_at
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[key_col],
+            index_where=key_col.isnot(None),
+            set_=update_cols,
+        ).returning(Product.id)
+        try:
+            ids = db.execute(stmt).scalars().all()
+            db.commit()
+        except SQLAlchemyError as e:
+            db.rollback()
+            msg = f"Batch failed: {type(e.orig or e).__name__}: {str(e.orig or e)[:200]}"
+            for line_no, _ in rows:
+                report.error(line_no, msg)
+            continue
+        report.upserted += len(ids)
+        invalidate_products(ids)
+
+def import_products(db: Session, fileobj: BinaryIO, fmt: str, key: str = "slug", batch_size: int = 500) -> Dict[str, Any]:
+    report = ImportReport()
+    batch: Dict[Any, Tuple[int, Dict[str, Any]]] = {}
+    for line_no, raw, parse_error in _iter_rows(fileobj, fmt):
+        report.processed += 1
+        if parse_error:
+            report.error(line_no, parse_error)
+            continue
+        try:
+            row = ProductImportRow.model_validate(raw)
+        except ValidationError as e:
+            report.error(line_no, "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()))
+            continue
+        values = row.model_dump(exclude_unset=True)
+        # required fields are always written, even when they came from defaults
+        values.update({f: getattr(row, f) for f in ("title", "price_eur", "stock")})
+        # no fallback key: rows sharing a derived key (e.g. the same title) would overwrite each other
+        if not values.get(key):
+            report.error(line_no, f"Missing upsert key '{key}'")
+            continue
+        values["updated_at"] = datetime.utcnow()
+        # a key repeated inside one statement would hit ON CONFLICT twice; last row wins
+        batch[values[key]] = (line_no, values)
+        if len(batch) >= batch_size:
+            _flush(db, key, batch, report)
+            batch = {}
+    _flush(db, key, batch, report)
+    return report.as_dict()
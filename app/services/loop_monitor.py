@@ -0,0 +1,97 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from app.core.config import get_settings
+
+# Event-loop stall detector (enabled in DEBUG). A heartbeat task on the loop sleeps
+# for `interval` and measures how late it wakes up; anything later than `threshold`
+# means some callback held the loop, i.e. blocking I/O or CPU work inside an async
+# route. A watchdog thread notices the missed heartbeat while the stall is still in
+# progress and logs the loop thread's stack, which points at the blocking call.
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+class LoopStallMonitor:
+    def __init__(self, threshold: float, interval: float | None = None):
+        self.threshold = threshold
+        self.interval = interval or max(threshold / 4, 0.01)
+        self.stalls = 0
+        self.max_stall_ms = 0.0
+        self.last_stack: str | None = None
+        self._beat = time.monotonic()
+        self._loop_thread: int | None = None
+        self._task: asyncio.Task | None = None
+        self._stop = threading.Event()
+        self._watchdog: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """Call from inside the running loop to be watched."""
+        self._loop_thread = threading.get_ident()
+        self._beat = time.monotonic()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self._stop.clear()
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self._watchdog:
+            self._watchdog.join(1)
+
+    async def _heartbeat(self) -> None:
+        while True:
+            started = time.monotonic()
+            self._beat = started
+            await asyncio.sleep(self.interval)
+            lag = time.monotonic() - started - self.interval
+            if lag > self.threshold:
+                with self._lock:
+                    self.stalls += 1
+                    self.max_stall_ms = max(self.max_stall_ms, lag * 1000)
+                logger.warning("event loop was blocked for %.0f ms", lag * 1000)
+
+    def _watch(self) -> None:
+        reported = None
+        while not self._stop.wait(self.interval):
+            beat = self._beat
+            if beat == reported or time.monotonic() - beat < self.interval + self.threshold:
+                continue
+            reported = beat  # one stack per stall
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is None:
+                continue
+            stack = "".join(traceback.format_stack(frame))
+            with self._lock:
+                self.last_stack = stack
+            logger.warning("event loop blocked for over %.0f ms, currently in:\n%s", self.threshold * 1000, stack)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"enabled": True, "threshold_ms": round(self.threshold * 1000), "stalls": self.stalls,
+                    "max_stall_ms": round(self.max_stall_ms, 1), "last_stack": self.last_stack}
+
+monitor: LoopStallMonitor | None = None
+
+def start() -> None:
+    global monitor
+    if settings.DEBUG and settings.LOOP_STALL_THRESHOLD_MS > 0:
+        monitor = LoopStallMonitor(settings.LOOP_STALL_THRESHOLD_MS / 1000)
+        monitor.start()
+
+async def stop() -> None:
+    if monitor is not None:
+        await monitor.stop()
+
+def stats() -> dict:
+    return monitor.stats() if monitor is not None else {"enabled": False}
@@ -0,0 +1,47 @@
+from typing import Tuple
+from app.models.order import Order
+from app.services.templates import render
+
+# Customer notification emails for orders, returned as (subject, html) so callers can
+# queue them in the outbox inside the same transaction as the order change. Bodies are
+# rendered from the template registry (app/templates/emails/).
+
+_STATUS_SUBJECTS = {
+    'PROCESSING': "Porosia #{n} është në proces",
+    'SHIPPED': "Porosia #{n} u nis",
+    'DELIVERED': "Porosia #{n} u dorëzua",
+    'CANCELLED': "Porosia #{n} u anulua",
+    'CANCELED': "Porosia #{n} u anulua",
+    'CONFIRMED': "Porosia #{n} u konfirmua",
+    'PENDING': "Porosia #{n} është në pritje",
+    'PAID': "Porosia #{n} u pagua",
+    'COMPLETED': "Porosia #{n} u përfundua",
+}
+
+_STATUS_MESSAGES = {
+    'PROCESSING': 'Porosia juaj është marrë në proces dhe po përgatitet.',
+    'SHIPPED': 'Porosia juaj është nisur dhe është në rrugë drejt jush.',
+    'DELIVERED': 'Porosia juaj është dorëzuar. Shpresojmë të kënaqeni!',
+    'CANCELLED': 'Porosia juaj është anuluar sipas kërkesës ose për shkak të një problemi.',
+    'CANCELED': 'Porosia juaj është anuluar.',
+    'CONFIRMED': 'Porosia juaj u konfirmua dhe do të vazhdojë përpunimin.',
+    'PENDING': 'Porosia juaj është regjistruar dhe pret konfirmim.',
+    'PAID': 'Pagesa u pranua. Faleminderit!',
+    'COMPLETED': 'Porosia u përfundua me sukses. Faleminderit!',
+}
+
+def confirmation_email(order: Order) -> Tuple[str, str]:
+    subject = f"Faleminderit për porosinë #{order.order_number}" if order.order_number else "Faleminderit për porosinë tuaj"
+    html = render("emails/order_confirmation.html", {
+        "name": order.shipping_name, "order_number": order.order_number,
+        "total_eur": order.total_eur, "total_lek": order.total_lek,
+    })
+    return subject, html
+
+def status_update_email(order: Order, status: str) -> Tuple[str, str]:
+    status_value = status.upper()
+    name = order.shipping_name or 'Klient'
+    subject = _STATUS_SUBJECTS.get(status_value, "Përditësim i porosisë #{n}").format(n=order.order_number)
+    message = _STATUS_MESSAGES.get(status_value, f"Statusi i porosisë suaj është: {status_value}.")
+    html = render("emails/order_status.html", {"name": name, "message": message, "order_number": order.order_number})
+    return subject, html
@@ -1,21 +1,82 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import case, func, update
+from datetime import datetime
+from typing import Callable, Dict, List, Tuple
 from fastapi import HTTPException
 from uuid import uuid4
 from app.models.order import Order, OrderItem
 from app.models.product import Product
 from app.schemas.order import OrderCreate
+from app.services.cache import invalidate_products
+from app.services import outbox_service
+from app.services.order_emails import confirmation_email
+from app.services.pagination import keyset_page
 
-def list_orders(db: Session):
-    return db.query(Order).order_by(Order.id.desc()).all()
+def list_orders(db: Session,
+                limit: int = 50,
+                cursor: str | None = None,
+                status: str | None = None,
+                date_from: datetime | None = None,
+                date_to: datetime | None = None,
+                customer_id: int | None = None,
+                email: str | None = None,
+                include_items: bool = True) -> Tuple[List[Order], str | None]:
+    """Newest-first keyset page of orders; items are batch-loaded with one extra SELECT ... IN."""
+    q = db.query(Order)
+    if status:
+        q = q.filter(Order.status == status)
+    if date_from:
+        q = q.filter(Order.created_at >= date_from)
+    if date_to:
+        q = q.filter(Order.created_at < date_to)
+    if customer_id:
+        q = q.filter(Order.customer_id == customer_id)
+    if email:
+        q = q.filter(func.lower(Order.shipping_email) == email.strip().lower())
+    if include_items:
+        q = q.options(selectinload(Order.items))
+    return keyset_page(q, Order, Order.created_at, True, "newest", cursor, limit)
 
-def create_order(db: Session, payload: OrderCreate) -> Order:
+def reserve_stock(db: Session, quantities: Dict[int, int]) -> None:
+    """Atomically decrement stock for every product in one conditional UPDATE.
+
+    UPDATE products SET stock = stock - CASE id ... END
+    WHERE id IN (...) AND stock >= CASE id ... END
+
+    The database re-checks `stock >= qty` under the row lock, so concurrent checkouts
+    cannot oversell. If fewer rows than products were updated, something ran out: the
+    transaction is rolled back and the first short product is reported.
+    """
+    qty = case(quantities, value=Product.id)
+    result = db.execute(
+        update(Product)
+        .where(Product.id.in_(quantities.keys()), Product.stock >= qty)
+        .values(stock=Product.stock - qty)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != len(quantities):
+        db.rollback()
+        stocks = dict(db.query(Product.id, Product.stock).filter(Product.id.in_(quantities.keys())).all())
+        short = next((pid for pid, q in quantities.items() if (stocks.get(pid) or 0) < q), next(iter(quantities)))
+        raise HTTPException(status_code=400, detail=f"Insufficient stock for product {short}")
+
+def create_order(db: Session, payload: OrderCreate, before_commit: Callable[[Order], None] | None = None) -> Order:
+    """Reserve stock and place the order in one transaction.
+
+    `before_commit` is called with the flushed order just before the commit, so callers
+    can stage rows that must commit with it (the Idempotency-Key completion)."""
     if not payload.items:
         raise HTTPException(status_code=400, detail="No items")
-    product_ids = [i.product_id for i in payload.items]
-    products = {p.id: p for p in db.query(Product).filter(Product.id.in_(product_ids)).all()}
-    if len(products) != len(set(product_ids)):
+    if any(i.quantity < 1 for i in payload.items):
+        raise HTTPException(status_code=400, detail="Invalid quantity")
+    quantities: Dict[int, int] = {}
+    for i in payload.items:
+        quantities[i.product_id] = quantities.get(i.product_id, 0) + i.quantity
+    products = {p.id: p for p in db.query(Product).filter(Product.id.in_(quantities.keys())).all()}
+    if len(products) != len(quantities):
         raise HTTPException(status_code=400, detail="Invalid product")
 
+    reserve_stock(db, quantities)
     order = Order(
         order_number=str(uuid4())[:12],
         customer_id=payload.customer_id,
@@ -33,19 +94,23 @@ def create_order(db: Session, payload: OrderCreate) -> Order:
     db.flush()
     for item in payload.items:
         prod = products[item.product_id]
-        # Basic stock check
-        if prod.stock < item.quantity:
-            raise HTTPException(status_code=400, detail=f"Insufficient stock for product {prod.id}")
         line_eur = float(prod.price_eur) * item.quantity
         line_lek = float(prod.price_lek) * item.quantity
         total_eur += line_eur
         total_lek += line_lek
         order_item = OrderItem(order_id=order.id, product_id=prod.id, quantity=item.quantity, price_eur=prod.price_eur, price_lek=prod.price_lek)
         db.add(order_item)
-        # Decrement stock
-        prod.stock = prod.stock - item.quantity
     order.total_eur = total_eur
     order.total_lek = total_lek
+    if order.shipping_email:
+        # queued in the order's transaction; the outbox worker delivers it after commit
+        subject, html = confirmation_email(order)
+        outbox_service.enqueue(db, [order.shipping_email], subject, html)
+    if before_commit is not None:
+        db.flush()
+        before_commit(order)
     db.commit()
     db.refresh(order)
+    # stock changed -> cached product payloads are stale
+    invalidate_products(products.keys())
     return order
@@ -0,0 +1,150 @@
+import json
+import logging
+import random
+import threading
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.core.config import get_settings
+from app.db.database import SessionLocal
+from app.models.email_outbox import EmailOutbox
+from app.services import email_delivery
+
+# Transactional email outbox. Request handlers only `enqueue()` a row inside their own
+# transaction (so the email exists iff the order/status change committed); a background
+# thread delivers due rows with exponential backoff and dead-letters them after
+# EMAIL_OUTBOX_MAX_ATTEMPTS failures. Rows are claimed one at a time, right before they
+# are sent, with a conditional UPDATE, so several gunicorn workers can run the loop
+# against the same table and a lease only has to cover a single SMTP send.
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+LEASE_SECONDS = 120  # minimum lease; a `sending` row whose worker died becomes due again after it
+# connect, greeting, EHLO, STARTTLS, AUTH and DATA may each take a full SMTP timeout
+SMTP_PHASES = 6
+MAX_BACKOFF_SECONDS = 3600
+
+_wakeup = threading.Event()
+
+def wake(*_args) -> None:
+    _wakeup.set()
+
+def enqueue(db: Session, to: List[str], subject: str, html: str,
+            from_email: Optional[str] = None, from_name: Optional[str] = None) -> EmailOutbox:
+    """Add an email to the caller's transaction; nothing is sent until it commits."""
+    row = EmailOutbox(recipients=json.dumps(to), subject=subject[:255], html=html,
+                      from_email=from_email, from_name=from_name, status="pending",
+                      attempts=0, next_attempt_at=datetime.utcnow())
+    db.add(row)
+    # poke this process's worker as soon as the row is visible
+    event.listen(db, "after_commit", wake, once=True)
+    return row
+
+def backoff_seconds(attempts: int) -> float:
+    delay = min(settings.EMAIL_OUTBOX_BACKOFF_SECONDS * (2 ** max(attempts - 1, 0)), MAX_BACKOFF_SECONDS)
+    return delay * random.uniform(0.8, 1.2)
+
+def lease_seconds() -> float:
+    """How long one claimed row stays `sending`: longer than a single send can block."""
+    return max(LEASE_SECONDS, SMTP_PHASES * settings.SMTP_TIMEOUT_SECONDS)
+
+def _due(db: Session, now: datetime) -> List[Tuple[int, datetime, str]]:
+    return (
+        db.query(EmailOutbox.id, EmailOutbox.next_attempt_at, EmailOutbox.status)
+        .filter(EmailOutbox.status.in_(("pending", "sending")), EmailOutbox.next_attempt_at <= now)
+        .order_by(EmailOutbox.next_attempt_at)
+        .limit(settings.EMAIL_OUTBOX_BATCH_SIZE)
+        .all()
+    )
+
+def _claim(db: Session, row_id: int, due_at: datetime, status: str) -> EmailOutbox | None:
+    values = {"status": "sending", "next_attempt_at": datetime.utcnow() + timedelta(seconds=lease_seconds())}
+    if status == "sending":
+        # the previous worker's lease ran out mid-send and the email may have gone out:
+        # count that as an attempt so a crash loop still ends in the dead letters
+        values["attempts"] = EmailOutbox.attempts + 1
+    # compare-and-set on the due time: exactly one worker wins the row
+    won = db.query(EmailOutbox).filter(EmailOutbox.id == row_id, EmailOutbox.next_attempt_at == due_at).update(
+        values, synchronize_session=False)
+    db.commit()
+    if not won:
+        return None
+    # sessions don't expire on commit; refresh any instance this session already holds
+    return db.query(EmailOutbox).filter(EmailOutbox.id == row_id).populate_existing().one()
+
+def process_due(db: Session) -> int:
+    """Deliver every due row once; returns how many were handled (sent, retried or dead-lettered)."""
+    handled = 0
+    for row_id, due_at, status in _due(db, datetime.utcnow()):
+        row = _claim(db, row_id, due_at, status)
+        if row is None:
+            continue
+        handled += 1
+        if row.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+            row.status = "dead"
+            row.last_error = row.last_error or "lease expired while sending"
+            logger.warning("email %s dead-lettered after %s attempts: %s", row.id, row.attempts, row.last_error)
+            db.commit()
+            continue
+        try:
+            email_delivery.deliver_email(json.loads(row.recipients), row.subject, row.html,
+                          from_email=row.from_email, from_name=row.from_name)
+        except Exception as e:
+            row.attempts += 1
+            row.last_error = f"{type(e).__name__}: {e}"[:1000]
+            if row.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+                row.status = "dead"
+                logger.warning("email %s dead-lettered after %s attempts: %s", row.id, row.attempts, row.last_error)
+            else:
+                row.status = "pending"
+                row.next_attempt_at = datetime.utcnow() + timedelta(seconds=backoff_seconds(row.attempts))
+        else:
+            row.attempts += 1
+            row.status = "sent"
+            row.sent_at = datetime.utcnow()
+            row.last_error = None
+        db.commit()
+    return handled
+
+def retry(db: Session, row: EmailOutbox) -> EmailOutbox:
+    row.status = "pending"
+    row.attempts = 0
+    row.next_attempt_at = datetime.utcnow()
+    db.commit()
+    wake()
+    return row
+
+class OutboxWorker:
+    def __init__(self):
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="email-outbox", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        _wakeup.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            handled = 0
+            try:
+                with SessionLocal() as db:
+                    handled = process_due(db)
+            except Exception:
+                logger.exception("email outbox pass failed")
+            if handled:
+                continue  # there may be more due rows
+            _wakeup.wait(settings.EMAIL_OUTBOX_POLL_SECONDS)
+            _wakeup.clear()
+
+worker = OutboxWorker()
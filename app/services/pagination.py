@@ -0,0 +1,76 @@
+import base64
+import json
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Callable, List, Tuple
+from fastapi import HTTPException
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Query
+
+# Keyset (cursor) pagination helpers. A cursor is an opaque urlsafe token that
+# carries the sort name plus the sort key and id of the last row on the page,
+# so the next page is a plain indexed range scan instead of OFFSET n.
+
+def encode_cursor(sort: str, value: Any, last_id: int) -> str:
+    if isinstance(value, Decimal):
+        value = str(value)
+    elif isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps([sort, value, last_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(token: str, sort: str, column) -> Tuple[Any, int]:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        cur_sort, value, last_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if cur_sort != sort:
+            raise ValueError("sort mismatch")
+        if value is not None:
+            py_type = column.type.python_type
+            value = py_type.fromisoformat(value) if py_type is datetime else py_type(value)
+        return value, int(last_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def _order(col, descending: bool):
+    expr = col.desc() if descending else col.asc()
+    # Keep NULL sort keys at the end on every backend (Postgres and SQLite disagree by default)
+    if getattr(col, "nullable", False):
+        expr = expr.nulls_last()
+    return expr
+
+def keyset_filter(q: Query, model, column, descending: bool, sort: str, cursor: str | None) -> Query:
+    """Restrict `q` to rows after `cursor` and order it by (column, id)."""
+    id_col = model.id
+    if cursor:
+        value, last_id = decode_cursor(cursor, sort, column)
+        after_id = id_col < last_id if descending else id_col > last_id
+        if column is id_col:
+            q = q.filter(after_id)
+        elif value is None:
+            # Already inside the trailing NULL block: only the id tie-breaker moves forward
+            q = q.filter(column.is_(None), after_id)
+        else:
+            beyond = column < value if descending else column > value
+            conds = [beyond, and_(column == value, after_id)]
+            if getattr(column, "nullable", False):
+                conds.append(column.is_(None))
+            q = q.filter(or_(*conds))
+    order = [_order(column, descending)]
+    if column is not id_col:
+        order.append(_order(id_col, descending))
+    return q.order_by(None).order_by(*order)
+
+def trim_page(rows: List[Any], limit: int, sort: str, key: Callable[[Any], Tuple[Any, int]]) -> Tuple[List[Any], str | None]:
+    """Cut a limit+1 fetch down to `limit` rows; `key(row)` gives the (sort value, id) of a row."""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    value, last_id = key(rows[-1])
+    return rows, encode_cursor(sort, value, last_id)
+
+def keyset_page(q: Query, model, column, descending: bool, sort: str,
+                cursor: str | None, limit: int) -> Tuple[List[Any], str | None]:
+    """Return one page of `q` ordered by (column, id) and the cursor for the next page."""
+    rows = keyset_filter(q, model, column, descending, sort, cursor).limit(limit + 1).all()
+    return trim_page(rows, limit, sort, lambda last: (getattr(last, column.key), last.id))
@@ -1,21 +1,73 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import or_, desc, asc
+from sqlalchemy.orm import Session, Query
+from fastapi import HTTPException
+from functools import lru_cache
+from pydantic import TypeAdapter, create_model
+from sqlalchemy import desc, asc
+from sqlalchemy.exc import IntegrityError
 from app.models.product import Product
-from app.schemas.product import ProductCreate
-from typing import List, Tuple
+from app.schemas.product import ProductCreate, ProductOut, PRODUCT_SUMMARY_FIELDS
+from app.services.pagination import keyset_page
+from app.services.search_index import apply_search
+from app.services.cache import catalog_cache, product_key, list_key, invalidate_products, PRODUCT_LIST_PREFIX
+from app.services import catalog_version as catalog_versions
+from pydantic_core import to_json
+from typing import Any, List, Tuple
 
-def list_products(db: Session,
-                  page: int = 1,
-                  limit: int = 20,
-                  search: str | None = None,
-                  category: int | None = None,
-                  sort: str | None = None,
-                  featured: bool | None = None,
-                  offers: bool | None = None) -> Tuple[List[Product], int]:
+# sort param -> (column, descending) used by keyset pagination
+PRODUCT_SORTS = {
+    'price_asc': (Product.price_eur, False),
+    'price_desc': (Product.price_eur, True),
+    'newest': (Product.id, True),
+    'title': (Product.title, False),
+}
+
+_full_adapter = TypeAdapter(List[ProductOut])
+
+def resolve_fields(view: str | None, fields: str | None) -> Tuple[str, ...] | None:
+    """Columns to load for `?view=summary` / `?fields=a,b`; None means the full ProductOut."""
+    wanted: set[str] = set()
+    if view == 'summary':
+        wanted.update(PRODUCT_SUMMARY_FIELDS)
+    elif view not in (None, 'full'):
+        raise HTTPException(status_code=400, detail="Invalid view")
+    if fields:
+        requested = {f.strip() for f in fields.split(',') if f.strip()}
+        unknown = requested - set(ProductOut.model_fields)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+        wanted.update(requested)
+    if not wanted:
+        return None
+    wanted.add('id')
+    return tuple(f for f in ProductOut.model_fields if f in wanted)
+
+@lru_cache(maxsize=64)
+def _projection_adapter(fields: Tuple[str, ...]) -> TypeAdapter:
+    model = create_model("ProductFieldsOut", **{f: (ProductOut.model_fields[f].annotation, ProductOut.model_fields[f]) for f in fields})
+    return TypeAdapter(List[model])  # type: ignore[valid-type]
+
+def project(q: Query, fields: Tuple[str, ...] | None, *extra) -> Query:
+    """Select only the given Product columns (plus `extra`, e.g. the keyset sort column)."""
+    if fields is None:
+        return q
+    cols = dict.fromkeys([getattr(Product, f) for f in fields] + list(extra))
+    return q.with_entities(*cols)
+
+def serialize_products(items: List[Any], fields: Tuple[str, ...] | None) -> List[Any]:
+    """Validate a page in one TypeAdapter pass: ORM objects for the full view, row tuples for projections."""
+    if fields is None:
+        return _full_adapter.validate_python(items, from_attributes=True)
+    return _projection_adapter(fields).validate_python([r._asdict() for r in items])
+
+def _filtered_query(db: Session,
+                    search: str | None = None,
+                    category: int | None = None,
+                    featured: bool | None = None,
+                    offers: bool | None = None) -> Tuple[Query, Any]:
     q = db.query(Product)
+    rank = None
     if search:
-        like = f"%{search}%"
-        q = q.filter(or_(Product.title.ilike(like), Product.description.ilike(like)))
+        q, rank = apply_search(db, q, search)
     if category:
         q = q.filter(Product.category_id == category)
     if featured is not None:
@@ -28,6 +80,19 @@ def list_products(db: Session,
             q = q.filter(Product.is_offer == True)  # noqa: E712
         else:
             q = q.filter(Product.is_offer == False)  # noqa: E712
+    return q, rank
+
+def list_products(db: Session,
+                  page: int = 1,
+                  limit: int = 20,
+                  search: str | None = None,
+                  category: int | None = None,
+                  sort: str | None = None,
+                  featured: bool | None = None,
+                  offers: bool | None = None,
+                  fields: Tuple[str, ...] | None = None) -> Tuple[List[Any], int]:
+    q, rank = _filtered_query(db, search=search, category=category, featured=featured, offers=offers)
+    q = project(q, fields)
     # Count without selecting additional columns that might not exist in older DBs
     total = q.order_by(None).count()
     # Sorting
@@ -37,17 +102,95 @@ def list_products(db: Session,
         q = q.order_by(desc(Product.price_eur))
     elif sort == 'newest':
         q = q.order_by(desc(Product.id))
+    elif rank is not None and sort in (None, 'relevance'):
+        q = q.order_by(desc(rank), desc(Product.id))
     else:
         q = q.order_by(asc(Product.title))
     items = q.offset((page - 1) * limit).limit(limit).all()
     return items, total
 
+def list_products_keyset(db: Session,
+                         cursor: str | None = None,
+                         limit: int = 20,
+                         search: str | None = None,
+                         category: int | None = None,
+                         sort: str | None = None,
+                         featured: bool | None = None,
+                         offers: bool | None = None,
+                         with_total: bool = False,
+                         fields: Tuple[str, ...] | None = None) -> Tuple[List[Any], str | None, int | None]:
+    """Cursor-paginated variant of list_products; the count is only run when asked for."""
+    q, _ = _filtered_query(db, search=search, category=category, featured=featured, offers=offers)
+    total = q.order_by(None).count() if with_total else None
+    sort_key = sort if sort in PRODUCT_SORTS else 'title'
+    column, descending = PRODUCT_SORTS[sort_key]
+    q = project(q, fields, column)
+    items, next_cursor = keyset_page(q, Product, column, descending, sort_key, cursor, limit)
+    return items, next_cursor, total
+
+def list_products_payload(db: Session,
+                          page: int = 1,
+                          limit: int = 20,
+                          search: str | None = None,
+                          category: int | None = None,
+                          sort: str | None = None,
+                          featured: bool | None = None,
+                          offers: bool | None = None,
+                          paginated: bool = False,
+                          cursor: str | None = None,
+                          include_total: bool = False,
+                          fields: Tuple[str, ...] | None = None) -> bytes:
+    """Serialized GET /products/ response, served from the catalog cache when possible."""
+    params = dict(page=page, limit=limit, search=search, category=category, sort=sort, featured=featured,
+                  offers=offers, paginated=paginated, cursor=cursor, include_total=include_total,
+                  fields=",".join(fields) if fields else None)
+
+    def load() -> bytes:
+        filters = dict(limit=limit, search=search, category=category, sort=sort, featured=featured, offers=offers, fields=fields)
+        if cursor is not None:
+            # Cursor mode: constant-time pages, count only on request
+            items, next_cursor, total = list_products_keyset(db, cursor=cursor or None, with_total=include_total, **filters)
+            pagination: dict[str, Any] = {"limit": limit, "next_cursor": next_cursor, "has_more": next_cursor is not None}
+            if total is not None:
+                pagination["total"] = total
+            return to_json({"products": serialize_products(items, fields), "pagination": pagination})
+        items, total = list_products(db, page=page, **filters)
+        if not paginated:
+            return to_json(serialize_products(items, fields))
+        pages = (total + limit - 1) // limit
+        return to_json({
+            "products": serialize_products(items, fields),
+            "pagination": {"page": page, "limit": limit, "total": total, "pages": pages}
+        })
+
+    return catalog_cache.get_or_load(list_key(PRODUCT_LIST_PREFIX, params), load)
+
+def catalog_version(db: Session) -> Tuple[Any, ...]:
+    """(version, changed_at) of the shared product write counter; feeds ETag/Last-Modified."""
+    return catalog_versions.current(db, catalog_versions.PRODUCTS)
+
+def commit_product(db: Session) -> None:
+    """Commit a product write; a source_url already used by another product is a 409."""
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="A product with this source_url already exists")
+
 def create_product(db: Session, payload: ProductCreate) -> Product:
     prod = Product(**payload.model_dump())
     db.add(prod)
-    db.commit()
+    commit_product(db)
     db.refresh(prod)
+    invalidate_products([prod.id])
     return prod
 
 def get_product(db: Session, product_id: int) -> Product | None:
     return db.query(Product).filter(Product.id == product_id).first()
+
+def get_product_payload(db: Session, product_id: int) -> bytes | None:
+    """Serialized ProductOut for the public detail endpoint (None if missing, not cached)."""
+    def load() -> bytes | None:
+        prod = get_product(db, product_id)
+        return to_json(ProductOut.model_validate(prod)) if prod else None
+    return catalog_cache.get_or_load(product_key(product_id), load)
@@ -0,0 +1,206 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Dict, List
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from app.core.config import get_settings
+from app.db.database import SessionLocal
+from app.models.product import Product
+from app.models.scrape_job import ScrapeJob
+from app.services import http_clients, scraper
+from app.services.cache import invalidate_products
+
+# Bulk scraping of post URLs into draft products. A job thread runs its own event loop
+# and client: up to SCRAPE_CONCURRENCY fetches at once, at most SCRAPE_MAX_PER_HOST per
+# host, each body capped at SCRAPE_MAX_BYTES. Pages are parsed in the scraper process
+# pool as they arrive. Drafts are upserted on source_url SCRAPE_INSERT_BATCH at a time
+# (one multi-row INSERT ... ON CONFLICT per transaction, so a URL imported meanwhile by
+# /scrape-facebook or another job is refreshed instead of failing the batch), together
+# with the job counters that GET /products/ai/scrape-jobs/{id} reports and a
+# low-watermark URL index. The checkpoint doubles as a heartbeat: a running job whose
+# heartbeat is older than SCRAPE_LEASE_SECONDS (its worker died or restarted) is taken
+# over by resume_interrupted() and continues from that index. URLs that were in flight
+# at the interruption are fetched again; the upsert on source_url keeps that harmless.
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+CHECKPOINT_SECONDS = 1.0
+ERRORS_KEPT = 50
+
+_runners: Dict[int, "ScrapeJobRunner"] = {}
+_runners_lock = threading.Lock()
+
+def save_drafts(db: Session, drafts: List[dict]) -> List[int]:
+    """Upsert drafts on source_url without committing; returns the product ids.
+
+    New URLs are inserted as drafts. Already-imported products only get their scraped
+    content refreshed (the scraper.refresh_fields columns) and keep their draft state,
+    stock, price and category."""
+    insert = pg_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+    now = datetime.utcnow()
+    # one row per URL: a statement may not upsert the same row twice
+    rows = {d["source_url"]: {**d, "is_draft": True, "created_at": now, "updated_at": now} for d in drafts}
+    stmt = insert(Product).values(list(rows.values()))
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Product.source_url],
+        index_where=Product.source_url.isnot(None),
+        set_={
+            "title": stmt.excluded.title,
+            "description": stmt.excluded.description,
+            "images": stmt.excluded.images,
+            "price_eur": func.coalesce(stmt.excluded.price_eur, Product.price_eur),
+            "category_id": func.coalesce(stmt.excluded.category_id, Product.category_id),
+            "updated_at": stmt.excluded.updated_at,
+        },
+    ).returning(Product)
+    # refresh any instance of these products the session already holds
+    return [p.id for p in db.scalars(stmt, execution_options={"populate_existing": True})]
+
+class ScrapeJobRunner:
+    def __init__(self, job_id: int):
+        self.job_id = job_id
+        self._thread = threading.Thread(target=self._run, name=f"scrape-{job_id}", daemon=True)
+        self._window: deque = deque()  # [url index, done] in dispatch order, for the low-watermark
+        self._cursor: int | None = None
+        self._drafts: List[dict] = []
+        self._processed = 0
+        self._failed = 0
+        self._errors: List[dict] = []
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def join(self, timeout: float | None = None) -> None:
+        self._thread.join(timeout)
+
+    def _done(self, entry: list) -> None:
+        entry[1] = True
+        while self._window and self._window[0][1]:
+            self._cursor = self._window.popleft()[0] + 1
+
+    def _checkpoint(self, db: Session, **extra) -> None:
+        drafts, self._drafts = self._drafts, []
+        ids = save_drafts(db, drafts) if drafts else []
+        job = db.query(ScrapeJob).filter(ScrapeJob.id == self.job_id).populate_existing().one()
+        job.processed_count += self._processed
+        job.saved_count += len(drafts)
+        job.failed_count += self._failed
+        if self._errors:
+            job.errors = json.dumps((json.loads(job.errors or "[]") + self._errors)[:ERRORS_KEPT])
+        if self._cursor is not None:
+            job.cursor = self._cursor
+        job.updated_at = datetime.utcnow()
+        if job.status == "running":
+            for k, v in extra.items():
+                setattr(job, k, v)
+        db.commit()
+        self._processed = self._failed = 0
+        self._errors = []
+        if ids:
+            invalidate_products(ids)
+
+    def _run(self) -> None:
+        try:
+            asyncio.run(self._scrape_all())
+        except Exception as e:
+            logger.exception("scrape job %s failed", self.job_id)
+            with SessionLocal() as db:
+                self._errors.append({"url": None, "error": f"{type(e).__name__}: {e}"[:500]})
+                self._checkpoint(db, status="failed", finished_at=datetime.utcnow())
+        finally:
+            with _runners_lock:
+                if _runners.get(self.job_id) is self:
+                    del _runners[self.job_id]
+
+    async def _scrape_all(self) -> None:
+        with SessionLocal() as db:
+            job = db.query(ScrapeJob).filter(ScrapeJob.id == self.job_id).one()
+            urls = json.loads(job.urls)
+            start = job.cursor or 0
+            price = float(job.price_eur) if job.price_eur is not None else None
+            slots = asyncio.Semaphore(settings.SCRAPE_CONCURRENCY)
+
+            async with http_clients.build_client(per_host=settings.SCRAPE_MAX_PER_HOST) as client:
+                async def scrape(entry: list, url: str):
+                    async with slots:
+                        try:
+                            # shared post links usually redirect to the canonical page
+                            body = await scraper.fetch_capped(client, url, follow_redirects=True)
+                        except Exception as e:
+                            return entry, url, None, f"{type(e).__name__}: {e}"
+                    try:
+                        return entry, url, await scraper.parse_in_pool(body), None
+                    except Exception as e:
+                        return entry, url, None, f"{type(e).__name__}: {e}"
+
+                pending = set()
+                for index in range(start, len(urls)):
+                    entry = [index, False]
+                    self._window.append(entry)
+                    pending.add(asyncio.create_task(scrape(entry, urls[index])))
+                last_checkpoint = time.monotonic()
+                while pending:
+                    # wake up at least once per interval so the heartbeat keeps going during slow fetches
+                    done, pending = await asyncio.wait(pending, timeout=CHECKPOINT_SECONDS,
+                                                       return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        entry, url, post, error = task.result()
+                        self._processed += 1
+                        if error:
+                            self._failed += 1
+                            if len(self._errors) < ERRORS_KEPT:
+                                self._errors.append({"url": url, "error": error[:500]})
+                        else:
+                            self._drafts.append(scraper.draft_fields(url, post, price, job.category_id))
+                        self._done(entry)
+                    if len(self._drafts) >= settings.SCRAPE_INSERT_BATCH or time.monotonic() - last_checkpoint >= CHECKPOINT_SECONDS:
+                        last_checkpoint = time.monotonic()
+                        self._checkpoint(db)
+            self._checkpoint(db, status="completed", finished_at=datetime.utcnow())
+
+def _launch(job_id: int) -> None:
+    runner = ScrapeJobRunner(job_id)
+    with _runners_lock:
+        if job_id in _runners:
+            return
+        _runners[job_id] = runner
+    runner.start()
+
+def start_job(db: Session, urls: List[str], price_eur: float | None = None, category_id: int | None = None) -> ScrapeJob:
+    unique = list(dict.fromkeys(u.strip() for u in urls if u and u.strip()))
+    job = ScrapeJob(urls=json.dumps(unique), price_eur=price_eur, category_id=category_id,
+                    status="running", total=len(unique))
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    _launch(job.id)
+    return job
+
+def resume_interrupted() -> int:
+    """Take over running jobs whose owner stopped heartbeating (e.g. after a restart)."""
+    resumed = 0
+    stale_before = datetime.utcnow() - timedelta(seconds=settings.SCRAPE_LEASE_SECONDS)
+    with SessionLocal() as db:
+        stale = db.query(ScrapeJob.id, ScrapeJob.updated_at).filter(
+            ScrapeJob.status == "running", ScrapeJob.updated_at < stale_before).all()
+        for job_id, heartbeat in stale:
+            won = db.query(ScrapeJob).filter(
+                ScrapeJob.id == job_id, ScrapeJob.updated_at == heartbeat
+            ).update({"updated_at": datetime.utcnow()}, synchronize_session=False)
+            db.commit()
+            if won:
+                _launch(job_id)
+                resumed += 1
+    return resumed
+
+def runner_for(job_id: int) -> ScrapeJobRunner | None:
+    with _runners_lock:
+        return _runners.get(job_id)
@@ -0,0 +1,158 @@
+import asyncio
+import json
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List
+import httpx
+from bs4 import BeautifulSoup
+from app.core.config import get_settings
+
+# Fetching and parsing public post pages for draft products (POST /products/ai/scrape-facebook
+# and the bulk scrape jobs). Bodies are streamed and cut off at SCRAPE_MAX_BYTES. Pages
+# are parsed with lxml when it is installed, since it is much faster than the pure-Python
+# html.parser. Bulk jobs parse in a small process pool, so parsing hundreds of pages
+# neither holds the GIL nor competes with request handling. This module is imported in
+# the pool's (spawned) worker processes, so keep its imports light.
+
+settings = get_settings()
+
+try:
+    import lxml  # noqa: F401
+    PARSER = "lxml"
+except ImportError:  # pragma: no cover - optional dependency
+    PARSER = "html.parser"
+
+USER_AGENT = "Mozilla/5.0"
+
+class ScrapeError(Exception):
+    pass
+
+async def fetch_capped(client: httpx.AsyncClient, url: str, max_bytes: int | None = None,
+                       follow_redirects: bool = False) -> bytes:
+    """The page body; raises ScrapeError on an error status or a body over `max_bytes`."""
+    limit = max_bytes or settings.SCRAPE_MAX_BYTES
+    async with client.stream("GET", url, headers={"User-Agent": USER_AGENT}, timeout=30,
+                             follow_redirects=follow_redirects) as r:
+        if r.status_code >= 400:
+            raise ScrapeError(f"Nuk mund të lexoj postin ({r.status_code})")
+        declared = r.headers.get("content-length", "")
+        if declared.isdigit() and int(declared) > limit:
+            raise ScrapeError(f"Faqja është shumë e madhe ({declared} bytes)")
+        chunks, size = [], 0
+        async for chunk in r.aiter_bytes():
+            size += len(chunk)
+            if size > limit:
+                raise ScrapeError(f"Faqja është shumë e madhe (> {limit} bytes)")
+            chunks.append(chunk)
+    return b"".join(chunks)
+
+def parse_post(html: str | bytes) -> dict:
+    """Text, media and title of a public post page (CPU-bound; run it off the event loop)."""
+    soup = BeautifulSoup(html, PARSER)
+    # Heuristics for extracting text & images
+    text_parts = []
+    for sel in ['meta[property="og:description"]', 'meta[name="description"]']:
+        tag = soup.select_one(sel)
+        if tag and tag.get('content'):
+            text_parts.append(tag['content'])
+    # Fallback: gather paragraphs
+    if not text_parts:
+        for p in soup.find_all('p'):
+            t = (p.get_text() or '').strip()
+            if t and len(t) > 20:
+                text_parts.append(t)
+                if len(text_parts) >= 3:
+                    break
+    full_text = '\n'.join(dict.fromkeys(text_parts))[:4000]
+
+    images: List[str] = []
+    videos: List[str] = []
+    for meta_img in soup.select('meta[property="og:image"]'):
+        c = meta_img.get('content')
+        if c and c not in images:
+            images.append(c)
+        if len(images) >= 5:
+            break
+    if not images:
+        for img in soup.find_all('img'):
+            src = img.get('src') or img.get('data-src')
+            if src and 'data:' not in src and src.startswith('http') and src not in images:
+                images.append(src)
+                if len(images) >= 5:
+                    break
+
+    # Collect video URLs (best-effort, public pages only)
+    for sel in ['meta[property="og:video"]', 'meta[property="og:video:url"]', 'meta[property="og:video:secure_url"]']:
+        tag = soup.select_one(sel)
+        if tag and tag.get('content'):
+            url = tag['content']
+            if url not in videos and url.startswith('http'):
+                videos.append(url)
+    # <video> tags
+    for v in soup.find_all('video'):
+        src = v.get('src')
+        if src and src.startswith('http') and src not in videos:
+            videos.append(src)
+        for source in v.find_all('source'):
+            s2 = source.get('src')
+            if s2 and s2.startswith('http') and s2 not in videos:
+                videos.append(s2)
+        if len(videos) >= 3:
+            break
+
+    # Simple title heuristic
+    title_tag = soup.select_one('meta[property="og:title"]') or soup.find('title')
+    raw_title = (title_tag.get('content') if title_tag and title_tag.has_attr('content') else title_tag.string) if title_tag else 'Produkt'
+    raw_title = (raw_title or 'Produkt').strip()[:120]
+    return {"title": raw_title, "text": full_text, "images": images, "videos": videos}
+
+def draft_fields(url: str, post: dict, price_eur: float | None = None, category_id: int | None = None) -> dict:
+    """Product column values for a scraped post."""
+    # Build unified media list for storage (annotate type)
+    media_objects = [{"url": u, "type": "image"} for u in post["images"]]
+    media_objects += [{"url": v, "type": "video"} for v in post["videos"]]
+    return dict(
+        title=post["title"],
+        description=post["text"][:2000] or None,
+        price_eur=price_eur,
+        price_lek=None,
+        stock=0,
+        category_id=category_id,
+        images=json.dumps(media_objects) if media_objects else None,
+        source_url=url
+    )
+
+def refresh_fields(fields: dict) -> dict:
+    """The draft_fields written onto an already-imported product: the scraped content, plus
+    price and category only when given. Stock, draft state and admin edits are kept."""
+    refreshed = {k: fields[k] for k in ("title", "description", "images")}
+    refreshed.update({k: fields[k] for k in ("price_eur", "category_id") if fields.get(k) is not None})
+    return refreshed
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+def parse_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn, not fork: the app process runs threads (workers, job runners)
+            _pool = ProcessPoolExecutor(max_workers=settings.SCRAPE_PARSE_WORKERS,
+                                        mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+def shutdown_pool() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+async def parse_in_pool(html: bytes) -> dict:
+    try:
+        return await asyncio.get_running_loop().run_in_executor(parse_pool(), parse_post, html)
+    except BrokenProcessPool:
+        shutdown_pool()  # a worker died; the next call starts a fresh pool
+        raise
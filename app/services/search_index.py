@@ -0,0 +1,61 @@
+import re
+from typing import Any, Tuple
+from sqlalchemy import Float, Integer, func, inspect, literal_column, or_, text
+from sqlalchemy.orm import Query, Session
+from app.models.product import Product
+
+# Full-text search over product title + description.
+#  - Postgres: generated `products.search_vector` tsvector column with a GIN index
+#  - SQLite: external-content FTS5 table `products_fts` kept in sync by triggers
+# Both are created by migration 0009 and maintained by the database itself, so every
+# write path (API, imports, scraping) stays indexed. If the index is missing we fall
+# back to the old ILIKE scan.
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_backend_cache: dict[str, str | None] = {}
+
+def fulltext_backend(db: Session) -> str | None:
+    bind = db.get_bind()
+    key = str(bind.url)
+    if key not in _backend_cache:
+        backend = None
+        try:
+            insp = inspect(bind)
+            if bind.dialect.name == "postgresql":
+                if "search_vector" in {c["name"] for c in insp.get_columns("products")}:
+                    backend = "postgresql"
+            elif bind.dialect.name == "sqlite":
+                if "products_fts" in insp.get_table_names():
+                    backend = "sqlite"
+        except Exception:
+            backend = None
+        _backend_cache[key] = backend
+    return _backend_cache[key]
+
+def _tokens(term: str) -> list[str]:
+    return _TOKEN_RE.findall(term.lower())[:8]
+
+def _ilike(q: Query, term: str) -> Query:
+    like = f"%{term}%"
+    return q.filter(or_(Product.title.ilike(like), Product.description.ilike(like)))
+
+def apply_search(db: Session, q: Query, term: str) -> Tuple[Query, Any]:
+    """Restrict `q` to products matching `term`; returns the query and a rank expression (higher is better, None on fallback)."""
+    tokens = _tokens(term)
+    backend = fulltext_backend(db) if tokens else None
+    if backend == "postgresql":
+        # prefix match on every token so search-as-you-type keeps working
+        tsq = func.to_tsquery("simple", " & ".join(f"{t}:*" for t in tokens))
+        vector = literal_column("products.search_vector")
+        return q.filter(vector.op("@@")(tsq)), func.ts_rank(vector, tsq)
+    if backend == "sqlite":
+        match = " ".join('"' + t.replace('"', '') + '"*' for t in tokens)
+        fts = (
+            text("SELECT rowid AS product_id, bm25(products_fts, 10.0, 1.0) AS rank FROM products_fts WHERE products_fts MATCH :match")
+            .bindparams(match=match)
+            .columns(product_id=Integer, rank=Float)
+            .subquery("fts")
+        )
+        # bm25() is lower-is-better; negate so callers can always sort rank DESC
+        return q.join(fts, fts.c.product_id == Product.id), -fts.c.rank
+    return _ilike(q, term), None
@@ -0,0 +1,80 @@
+import threading
+import time
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Mapping, Optional
+from sqlalchemy.orm import Session
+from app.core.config import get_settings
+from app.db.database import SessionLocal
+from app.models.admin import AdminSetting, SettingsVersion
+
+# Admin settings (SMTP, OpenAI key, Facebook pixel, ...) as an immutable in-memory
+# snapshot. Reads are dict lookups. At most once per SETTINGS_POLL_SECONDS a reader
+# checks the single-row settings_version counter and reloads every row only when it
+# moved. Writes go through set_setting, which bumps the counter in the same
+# transaction, so other gunicorn workers pick the change up on their next poll.
+
+settings = get_settings()
+
+@dataclass(frozen=True)
+class SettingsSnapshot:
+    version: int
+    values: Mapping[str, Optional[str]]
+
+    def get(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        value = self.values.get(key)
+        return value if value is not None else default
+
+_snapshot: SettingsSnapshot | None = None
+_checked_at = 0.0
+_lock = threading.Lock()
+
+def _current_version(db: Session) -> int:
+    return db.query(SettingsVersion.version).filter(SettingsVersion.id == 1).scalar() or 0
+
+def snapshot() -> SettingsSnapshot:
+    global _snapshot, _checked_at
+    snap = _snapshot
+    if snap is not None and time.monotonic() - _checked_at < settings.SETTINGS_POLL_SECONDS:
+        return snap
+    with _lock:
+        snap = _snapshot
+        if snap is not None and time.monotonic() - _checked_at < settings.SETTINGS_POLL_SECONDS:
+            return snap
+        with SessionLocal() as db:
+            version = _current_version(db)
+            if snap is None or snap.version != version:
+                rows = db.query(AdminSetting.key, AdminSetting.value).all()
+                snap = SettingsSnapshot(version=version, values=MappingProxyType(dict(rows)))
+        _snapshot = snap
+        _checked_at = time.monotonic()
+        return snap
+
+def get_setting(key: str, default: Optional[str] = None) -> Optional[str]:
+    return snapshot().get(key, default)
+
+def invalidate() -> None:
+    """Drop this process's snapshot; the next read reloads it."""
+    global _snapshot
+    with _lock:
+        _snapshot = None
+
+def bump_version(db: Session) -> None:
+    """Advance the shared counter inside the caller's transaction."""
+    updated = db.query(SettingsVersion).filter(SettingsVersion.id == 1).update(
+        {SettingsVersion.version: SettingsVersion.version + 1}, synchronize_session=False)
+    if not updated:
+        db.add(SettingsVersion(id=1, version=1))
+
+def set_setting(db: Session, key: str, value: Optional[str]) -> AdminSetting:
+    setting = db.query(AdminSetting).filter(AdminSetting.key == key).first()
+    if setting:
+        setting.value = value
+    else:
+        setting = AdminSetting(key=key, value=value)
+        db.add(setting)
+    bump_version(db)
+    db.commit()
+    db.refresh(setting)
+    invalidate()
+    return setting
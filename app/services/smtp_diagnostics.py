@@ -0,0 +1,174 @@
+import smtplib
+import socket
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Dict, List
+
+# Concurrent SMTP strategy probing for GET /emails/auth-matrix. Every strategy runs in
+# its own thread under one overall deadline. As soon as one of them logs in (or the
+# deadline passes) the rest are cancelled: their sockets are shut down so blocked
+# reads return at once. Every SMTP step also gets at most the time left before the
+# deadline as its socket timeout, so no attempt outlives it even uncancelled. Each attempt
+# reports connect / TLS / auth timings separately.
+
+@dataclass(frozen=True)
+class Strategy:
+    name: str
+    mode: str  # 'SSL' (implicit TLS) or 'PLAIN' (optionally upgraded with STARTTLS)
+    port: int
+    starttls: bool
+
+class _Cancelled(Exception):
+    pass
+
+def _ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000, 1)
+
+class _TimedSMTP_SSL(smtplib.SMTP_SSL):
+    """SMTP_SSL that times the TCP connect and the TLS handshake separately."""
+    def __init__(self, timings: Dict[str, float], **kwargs):
+        self.timings = timings
+        super().__init__(**kwargs)
+
+    def _get_socket(self, host, port, timeout):
+        start = time.perf_counter()
+        raw = smtplib.SMTP._get_socket(self, host, port, timeout)
+        self.timings["connect_ms"] = _ms(start)
+        self.sock = raw  # visible to cancel() while the handshake runs
+        start = time.perf_counter()
+        sock = self.context.wrap_socket(raw, server_hostname=self._host)
+        self.timings["tls_ms"] = _ms(start)
+        return sock
+
+class _Probe:
+    def __init__(self, host: str, user: str, password: str, timeout: float, end: float):
+        self.host = host
+        self.user = user
+        self.password = password
+        self.timeout = timeout
+        self.end = end  # time.monotonic() deadline shared by every attempt
+        self.cancelled = threading.Event()
+        self._live: set = set()
+        self._lock = threading.Lock()
+
+    def _track(self, server: smtplib.SMTP, live: bool) -> None:
+        with self._lock:
+            (self._live.add if live else self._live.discard)(server)
+        if live and self.cancelled.is_set():
+            raise _Cancelled()
+
+    def cancel(self) -> None:
+        self.cancelled.set()
+        with self._lock:
+            servers = list(self._live)
+        for server in servers:
+            sock = getattr(server, "sock", None)
+            if sock is not None:
+                try:
+                    sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+
+    def _checkpoint(self, server: smtplib.SMTP) -> None:
+        """Stop if cancelled; otherwise bound the next step by the time left before the deadline."""
+        if self.cancelled.is_set():
+            raise _Cancelled()
+        remaining = self.end - time.monotonic()
+        if remaining <= 0:
+            raise socket.timeout("probe deadline exceeded")
+        server.timeout = min(self.timeout, remaining)  # used by connect()
+        if getattr(server, "sock", None) is not None:
+            server.sock.settimeout(server.timeout)
+
+    def attempt(self, s: Strategy) -> dict:
+        timings: Dict[str, float] = {}
+        started = time.perf_counter()
+        server = None
+        status, err = "success", None
+        try:
+            if self.cancelled.is_set():
+                raise _Cancelled()
+            if s.mode == 'SSL':
+                server = _TimedSMTP_SSL(timings, timeout=self.timeout)
+                self._track(server, True)
+                self._checkpoint(server)
+                server.connect(self.host, s.port)
+            else:
+                server = smtplib.SMTP(timeout=self.timeout)
+                self._track(server, True)
+                self._checkpoint(server)
+                t = time.perf_counter()
+                server.connect(self.host, s.port)
+                timings["connect_ms"] = _ms(t)
+                self._checkpoint(server)
+                server.ehlo()
+                if s.starttls:
+                    self._checkpoint(server)
+                    t = time.perf_counter()
+                    server.starttls()
+                    server.ehlo()
+                    timings["tls_ms"] = _ms(t)
+            self._checkpoint(server)
+            t = time.perf_counter()
+            server.login(self.user, self.password)
+            timings["auth_ms"] = _ms(t)
+        except Exception as e:  # broad for diagnostics only
+            if self.cancelled.is_set():
+                status = "cancelled"
+            else:
+                status, err = "failed", f"{type(e).__name__}: {e}"[:300]
+        finally:
+            if server is not None:
+                self._track(server, False)
+                try:
+                    server.close()
+                except Exception:
+                    pass
+        timings["total_ms"] = _ms(started)
+        return {
+            'name': s.name,
+            'host': self.host,
+            'port': s.port,
+            'mode': s.mode,
+            'starttls': s.starttls,
+            'success': status == "success",
+            'status': status,
+            'error': err,
+            'timings': timings,
+        }
+
+def probe(host: str, user: str, password: str, strategies: List[Strategy],
+          deadline: float, attempt_timeout: float = 15.0) -> List[dict]:
+    """Run all strategies concurrently; returns one result per strategy, in the given order."""
+    if not strategies:
+        return []
+    end = time.monotonic() + deadline
+    probe = _Probe(host, user, password, min(attempt_timeout, deadline), end)
+    results: Dict[Strategy, dict] = {}
+    pool = ThreadPoolExecutor(max_workers=len(strategies), thread_name_prefix="smtp-probe")
+    futures = {pool.submit(probe.attempt, s): s for s in strategies}
+    pending = set(futures)
+    try:
+        while pending:
+            remaining = end - time.monotonic()
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for f in done:
+                results[futures[f]] = f.result()
+            if any(r["success"] for r in results.values()):
+                break
+    finally:
+        probe.cancel()
+        pool.shutdown(wait=False, cancel_futures=True)
+    timed_out = not any(r["success"] for r in results.values())
+    for s in strategies:
+        if s not in results:
+            results[s] = {
+                'name': s.name, 'host': host, 'port': s.port, 'mode': s.mode, 'starttls': s.starttls,
+                'success': False, 'status': "timeout" if timed_out else "cancelled",
+                'error': f"deadline of {deadline:g}s exceeded" if timed_out else None, 'timings': {},
+            }
+    return [results[s] for s in strategies]
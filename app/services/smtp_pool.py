@@ -0,0 +1,185 @@
+import logging
+import os
+import smtplib
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import List, Tuple
+from app.core.config import get_settings
+
+# Pooled SMTP sessions. Opening a connection costs a TCP/TLS handshake plus EHLO,
+# STARTTLS and AUTH round trips, so authenticated sessions are kept and reused.
+# Idle sessions are checked with NOOP before reuse and dropped after
+# SMTP_POOL_IDLE_SECONDS. A reused session that turns out to be dead before DATA
+# was sent is replaced and the send retried once; after DATA the server may
+# already have accepted the message, so that failure is raised instead. The pool is keyed by the full SMTP config, so editing
+# any smtp_* admin setting swaps in a fresh pool on the next send.
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+NOOP_AFTER_SECONDS = 5.0  # sessions idle for less than this skip the health check
+
+@dataclass(frozen=True)
+class SmtpConfig:
+    host: str
+    port: int
+    secure: bool
+    user: str
+    password: str = field(repr=False)
+
+    @property
+    def implicit_tls(self) -> bool:
+        return self.secure and self.port == 465
+
+class _TracksData:
+    """Records whether DATA went out, i.e. whether a failed send may have been delivered."""
+    data_sent = False
+
+    def data(self, msg):
+        self.data_sent = True
+        return super().data(msg)
+
+class _SMTP(_TracksData, smtplib.SMTP):
+    pass
+
+class _SMTP_SSL(_TracksData, smtplib.SMTP_SSL):
+    pass
+
+def _close(conn: smtplib.SMTP) -> None:
+    try:
+        conn.quit()
+    except Exception:
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+class SmtpPool:
+    def __init__(self, config: SmtpConfig, max_size: int, max_idle: float):
+        self.config = config
+        self.max_idle = max_idle
+        self._idle: List[Tuple[smtplib.SMTP, float]] = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._closed = False
+        self.created = 0
+        self.reused = 0
+        self.reconnects = 0
+
+    def _connect(self) -> smtplib.SMTP:
+        cfg = self.config
+        timeout = settings.SMTP_TIMEOUT_SECONDS
+        conn = _SMTP_SSL(cfg.host, cfg.port, timeout=timeout) if cfg.implicit_tls else _SMTP(cfg.host, cfg.port, timeout=timeout)
+        try:
+            if os.getenv('SMTP_DEBUG') in ('1', 'true', 'True'):
+                conn.set_debuglevel(1)
+            conn.ehlo()
+            if not cfg.implicit_tls and conn.has_extn("starttls"):
+                # as before pooling: a server whose STARTTLS fails still gets a plain login
+                try:
+                    conn.starttls()
+                    conn.ehlo()
+                except smtplib.SMTPException as e:
+                    logger.warning("STARTTLS failed (%s); continuing without TLS", e)
+            conn.login(cfg.user, cfg.password)
+        except Exception:
+            _close(conn)
+            raise
+        with self._lock:
+            self.created += 1
+        return conn
+
+    def _checkout(self) -> Tuple[smtplib.SMTP, bool]:
+        """Return (connection, reused)."""
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                conn, last_used = self._idle.pop()
+            idle_for = time.monotonic() - last_used
+            if idle_for > self.max_idle:
+                _close(conn)
+                continue
+            if idle_for > NOOP_AFTER_SECONDS:
+                try:
+                    healthy = conn.noop()[0] == 250
+                except Exception:
+                    healthy = False
+                if not healthy:
+                    _close(conn)
+                    continue
+            with self._lock:
+                self.reused += 1
+            return conn, True
+        return self._connect(), False
+
+    def _checkin(self, conn: smtplib.SMTP) -> None:
+        with self._lock:
+            if not self._closed:
+                self._idle.append((conn, time.monotonic()))
+                return
+        _close(conn)
+
+    def sendmail(self, from_addr: str, to: List[str], message: str) -> None:
+        with self._slots:
+            conn, reused = self._checkout()
+            conn.data_sent = False
+            try:
+                conn.sendmail(from_addr, to, message)
+            except (smtplib.SMTPServerDisconnected, ConnectionError) as e:
+                _close(conn)
+                if not reused or conn.data_sent:
+                    raise
+                # the pooled session died during the envelope, before DATA: nothing was accepted
+                logger.info("SMTP session dropped (%s); reconnecting", type(e).__name__)
+                with self._lock:
+                    self.reconnects += 1
+                conn = self._connect()
+                try:
+                    conn.sendmail(from_addr, to, message)
+                except Exception:
+                    _close(conn)
+                    raise
+            except Exception:
+                _close(conn)
+                raise
+            self._checkin(conn)
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            _close(conn)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"host": self.config.host, "port": self.config.port, "idle": len(self._idle),
+                    "created": self.created, "reused": self.reused, "reconnects": self.reconnects}
+
+_pool: SmtpPool | None = None
+_pool_lock = threading.Lock()
+
+def get_pool(config: SmtpConfig) -> SmtpPool:
+    """The pool for `config`, replacing (and draining) the previous one if the settings changed."""
+    global _pool
+    old = None
+    with _pool_lock:
+        if _pool is None or _pool.config != config:
+            old, _pool = _pool, SmtpPool(config, settings.SMTP_POOL_SIZE, settings.SMTP_POOL_IDLE_SECONDS)
+        pool = _pool
+    if old is not None:
+        old.close()
+    return pool
+
+def reset() -> None:
+    global _pool
+    with _pool_lock:
+        old, _pool = _pool, None
+    if old is not None:
+        old.close()
+
+def stats() -> dict | None:
+    pool = _pool
+    return pool.stats() if pool else None
@@ -0,0 +1,157 @@
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from app.core.config import get_settings
+from app.models.ai_cache import AiSuggestionCache
+
+# Persistent cache for /products/ai/suggest. The key is a sha256 of the normalized
+# request (whitespace/case folded, features de-duplicated and sorted) plus the model
+# and prompt version, so changing either one starts a fresh keyspace. Entries expire
+# after AI_SUGGEST_CACHE_TTL_HOURS; beyond AI_SUGGEST_CACHE_MAX_ENTRIES the least
+# recently used rows are deleted. Identical requests already in flight in this worker
+# share one OpenAI call (single-flight) instead of each paying for their own.
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+def _norm(value: str | None) -> str:
+    return " ".join((value or "").split()).casefold()
+
+def normalize(data: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "title": _norm(data.get("title")),
+        "features": sorted({_norm(f) for f in data.get("features") or [] if _norm(f)}),
+        "language": _norm(data.get("language")),
+        "tone": _norm(data.get("tone")),
+    }
+
+def cache_key(data: Dict[str, Any], model: str, prompt_version: str) -> str:
+    payload = json.dumps({"input": normalize(data), "model": model, "prompt": prompt_version},
+                         sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+class _Counters:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0  # requests served by another request's in-flight call
+        self.evictions = 0
+
+    def incr(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + n)
+
+counters = _Counters()
+
+def lookup(db: Session, key: str) -> Dict[str, Any] | None:
+    now = datetime.utcnow()
+    row = db.get(AiSuggestionCache, key)
+    if row is None or row.expires_at <= now:
+        counters.incr("misses")
+        return None
+    row.hits += 1
+    row.last_used_at = now
+    db.commit()
+    counters.incr("hits")
+    return json.loads(row.response)
+
+def store(db: Session, key: str, model: str, prompt_version: str, value: Dict[str, Any]) -> None:
+    """Upsert one entry. Best effort: a failed write is logged and the caller's result is still returned."""
+    now = datetime.utcnow()
+    insert = pg_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+    stmt = insert(AiSuggestionCache).values(
+        key=key, model=model, prompt_version=prompt_version, response=json.dumps(value), hits=0,
+        created_at=now, last_used_at=now, expires_at=now + timedelta(hours=settings.AI_SUGGEST_CACHE_TTL_HOURS),
+    )
+    # another worker may store the same key concurrently: last write wins
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[AiSuggestionCache.key],
+        set_={c: stmt.excluded[c] for c in ("model", "prompt_version", "response", "hits",
+                                             "created_at", "last_used_at", "expires_at")},
+    )
+    try:
+        db.execute(stmt)
+        evict(db, now)
+        db.commit()
+    except SQLAlchemyError:
+        db.rollback()
+        logger.warning("could not store AI suggestion %s", key, exc_info=True)
+
+def evict(db: Session, now: datetime | None = None) -> int:
+    """Delete expired rows, then the least recently used ones above the size bound."""
+    removed = db.query(AiSuggestionCache).filter(AiSuggestionCache.expires_at <= (now or datetime.utcnow())) \
+        .delete(synchronize_session=False)
+    overflow = db.query(AiSuggestionCache).count() - settings.AI_SUGGEST_CACHE_MAX_ENTRIES
+    if overflow > 0:
+        oldest = select(AiSuggestionCache.key).order_by(AiSuggestionCache.last_used_at.asc()).limit(overflow)
+        removed += db.query(AiSuggestionCache).filter(AiSuggestionCache.key.in_(oldest)) \
+            .delete(synchronize_session=False)
+    if removed:
+        counters.incr("evictions", removed)
+    return removed
+
+class SingleFlight:
+    """Concurrent callers with the same key await the first caller's result."""
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Future] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        loop = asyncio.get_running_loop()
+        while True:
+            pending = self._calls.get(key)
+            if pending is None or pending.get_loop() is not loop:
+                break
+            counters.incr("shared")
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                # the first caller was cancelled (client went away), not us: make the call ourselves
+                if pending.cancelled() and not asyncio.current_task().cancelling():
+                    continue
+                raise
+        future = loop.create_future()
+        self._calls[key] = future
+        try:
+            result = await fn()
+        except BaseException as e:
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+                future.exception()  # waiters re-raise it; don't log it as unretrieved
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+single_flight = SingleFlight()
+
+def stats() -> dict:
+    with counters._lock:
+        lookups = counters.hits + counters.misses
+        return {
+            "hits": counters.hits,
+            "misses": counters.misses,
+            "shared_in_flight": counters.shared,
+            "evictions": counters.evictions,
+            "hit_ratio": round(counters.hits / lookups, 4) if lookups else 0.0,
+            "in_flight": single_flight.in_flight(),
+            "max_entries": settings.AI_SUGGEST_CACHE_MAX_ENTRIES,
+            "ttl_hours": settings.AI_SUGGEST_CACHE_TTL_HOURS,
+        }
@@ -0,0 +1,63 @@
+import os
+import stat
+from functools import lru_cache
+from typing import Any, Mapping
+from jinja2 import BaseLoader, Environment, FileSystemBytecodeCache, FileSystemLoader, select_autoescape
+from jinja2.sandbox import SandboxedEnvironment
+from app.core.config import get_settings
+from app.services.settings_service import get_setting
+
+# Template registry. One Jinja Environment per process: each template is compiled on
+# first use, kept in the environment's cache, and its bytecode is written to a
+# FileSystemBytecodeCache so other workers (and restarts) skip the compile step.
+# Defaults live in app/templates/; an admin setting named "template:<name>" (e.g.
+# "template:emails/order_status.html") overrides one without a deploy. The override
+# is checked against the settings snapshot on every lookup, so a change recompiles that
+# template on its next render. Overrides and campaign bodies are admin-editable text,
+# so the environment is sandboxed: templates can't reach Python internals through
+# attributes such as __class__ or __globals__.
+
+settings = get_settings()
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "templates")
+SETTING_PREFIX = "template:"
+
+class SettingsOverrideLoader(BaseLoader):
+    def __init__(self, fallback: BaseLoader):
+        self.fallback = fallback
+
+    def get_source(self, environment: Environment, template: str):
+        key = SETTING_PREFIX + template
+        override = get_setting(key)
+        if override is not None:
+            return override, None, lambda: get_setting(key) == override
+        source, filename, uptodate = self.fallback.get_source(environment, template)
+        return source, filename, lambda: get_setting(key) is None and (uptodate is None or uptodate())
+
+def _private_dir(path: str) -> str:
+    """Create `path` as 0700 if needed and refuse it unless only this user can write it:
+    cached bytecode is executed, so nobody else may be able to plant files there."""
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    st = os.lstat(path)
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid() or st.st_mode & 0o077:
+        raise RuntimeError(f"TEMPLATE_BYTECODE_DIR {path!r} must be a directory owned by this user with mode 0700")
+    return path
+
+def _bytecode_cache() -> FileSystemBytecodeCache:
+    if settings.TEMPLATE_BYTECODE_DIR:
+        return FileSystemBytecodeCache(_private_dir(settings.TEMPLATE_BYTECODE_DIR))
+    # Jinja's default: a per-user 0700 directory under the temp dir, owner-checked on use
+    return FileSystemBytecodeCache()
+
+@lru_cache
+def environment() -> Environment:
+    return SandboxedEnvironment(
+        loader=SettingsOverrideLoader(FileSystemLoader(TEMPLATE_DIR)),
+        bytecode_cache=_bytecode_cache(),
+        autoescape=select_autoescape(["html"]),
+        auto_reload=True,
+        cache_size=400,
+    )
+
+def render(name: str, context: Mapping[str, Any]) -> str:
+    return environment().get_template(name).render(context)
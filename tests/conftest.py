@@ -0,0 +1,69 @@
+import os
+import shutil
+import tempfile
+import threading
+from http.server import ThreadingHTTPServer
+import pytest
+
+# Every test run gets its own SQLite database, migrated from scratch. This has to happen
+# before anything imports app.*, since settings and the engine are created at import time.
+_DB_DIR = tempfile.mkdtemp(prefix="proudshop-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_DB_DIR, 'test.db')}"
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def pytest_sessionstart(session):
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config(os.path.join(ROOT, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(ROOT, "alembic"))
+    command.upgrade(config, "head")
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(_DB_DIR, ignore_errors=True)
+
+@pytest.fixture
+def http_server():
+    """`http_server(handler_class)` serves a stand-in on a free local port and returns its
+    base URL; every server started by the test is shut down afterwards."""
+    servers = []
+
+    def start(handler) -> str:
+        server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_address[1]}"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+@pytest.fixture
+def openai_server(http_server, monkeypatch):
+    """`openai_server(handler_class)`: like http_server, with the OpenAI client pointed at it."""
+    from app.core.config import get_settings
+
+    def start(handler) -> str:
+        base = http_server(handler)
+        monkeypatch.setattr(get_settings(), "OPENAI_BASE_URL", base)
+        monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+        return base
+
+    return start
+
+@pytest.fixture
+def suggestion_cache_rows():
+    """Removes the AI suggestion cache rows the test created, leaving everyone else's."""
+    from app.db.database import SessionLocal
+    from app.models.ai_cache import AiSuggestionCache
+
+    with SessionLocal() as db:
+        before = {key for (key,) in db.query(AiSuggestionCache.key)}
+    yield
+    with SessionLocal() as db:
+        created = [key for (key,) in db.query(AiSuggestionCache.key) if key not in before]
+        if created:
+            db.query(AiSuggestionCache).filter(AiSuggestionCache.key.in_(created)).delete(synchronize_session=False)
+            db.commit()
@@ -0,0 +1,194 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+from uuid import uuid4
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.db.database import SessionLocal
+from app.models.ai_copy_job import AiCopyJob
+from app.models.category import Category
+from app.models.product import Product
+from app.services import ai_copy_jobs
+
+client = TestClient(app)
+
+EMAIL = "prodadmin@example.com"
+PWD = "testpass123"
+
+def get_token():
+    r = client.post("/api/v1/auth/login", json={"email": EMAIL, "password": PWD})
+    if r.status_code != 200:
+        r = client.post("/api/v1/auth/register", json={"email": EMAIL, "password": PWD})
+    return r.json()["access_token"]
+
+class _OpenAI(BaseHTTPRequestHandler):
+    """Chat-completions stand-in: rate limits the first `throttle` calls, then echoes the title."""
+    throttle = 0
+    reject = ""  # titles containing this get a (non-retryable) 400
+    deny = False  # answer every call with 401, as for a revoked key
+    calls = 0
+    in_flight = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def _send(self, status: int, body: dict, headers: dict | None = None) -> None:
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        cls = type(self)
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with cls.lock:
+            cls.calls += 1
+            if cls.throttle > 0:
+                cls.throttle -= 1
+                limited = True
+            else:
+                limited = False
+                cls.in_flight += 1
+                cls.peak = max(cls.peak, cls.in_flight)
+        if cls.deny:
+            return self._send(401, {"error": {"message": "Incorrect API key provided"}})
+        if limited:
+            return self._send(429, {"error": {"message": "Rate limit reached"}}, {"Retry-After": "0.2"})
+        time.sleep(0.05)
+        title = body["messages"][1]["content"].split("\n")[1].removeprefix("Title: ")
+        if cls.reject and cls.reject in title:
+            with cls.lock:
+                cls.in_flight -= 1
+            return self._send(400, {"error": {"message": "Bad request"}})
+        content = json.dumps({"title": f"{title} (new)", "description": f"Copy for {title}", "tags": []})
+        with cls.lock:
+            cls.in_flight -= 1
+        self._send(200, {"choices": [{"message": {"content": content}}]})
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def openai(openai_server):
+    _OpenAI.throttle = _OpenAI.calls = _OpenAI.in_flight = _OpenAI.peak = 0
+    _OpenAI.reject = ""
+    _OpenAI.deny = False
+    openai_server(_OpenAI)
+    return _OpenAI
+
+@pytest.fixture
+def category(suggestion_cache_rows):
+    tag = uuid4().hex[:8]
+    with SessionLocal() as db:
+        cat = Category(name=f"Copy {tag}", slug=f"copy-{tag}")
+        db.add(cat)
+        db.flush()
+        db.add_all([Product(title=f"Item {tag} {i}", category_id=cat.id, description=None if i < 5 else "Has copy")
+                    for i in range(6)])
+        db.commit()
+        cat_id = cat.id
+    yield cat_id
+    with SessionLocal() as db:
+        db.query(Product).filter(Product.category_id == cat_id).delete()
+        db.query(AiCopyJob).filter(AiCopyJob.category_id == cat_id).delete()
+        db.query(Category).filter(Category.id == cat_id).delete()
+        db.commit()
+
+def _products(cat_id: int) -> list[Product]:
+    with SessionLocal() as db:
+        return db.query(Product).filter(Product.category_id == cat_id).order_by(Product.id).all()
+
+def _run(headers: dict, job_id: int) -> dict:
+    r = client.post(f"/api/v1/products/ai/copy-jobs/{job_id}/start", headers=headers)
+    assert r.status_code == 200 and r.json()["status"] == "running", r.text
+    runner = ai_copy_jobs.runner_for(job_id)
+    if runner:
+        runner.join(20)
+    return client.get(f"/api/v1/products/ai/copy-jobs/{job_id}", headers=headers).json()
+
+def test_job_fills_missing_descriptions_with_bounded_concurrency(openai, category):
+    openai.throttle = 2
+    headers = {"Authorization": f"Bearer {get_token()}"}
+    job = client.post("/api/v1/products/ai/copy-jobs", headers=headers,
+                      json={"category_id": category, "concurrency": 2, "update_title": True}).json()
+    assert job["status"] == "draft"
+    result = _run(headers, job["id"])
+    assert result["status"] == "completed", result
+    assert (result["total"], result["processed_count"], result["updated_count"], result["failed_count"]) == (5, 5, 5, 0)
+    products = _products(category)
+    assert all(p.description == f"Copy for {p.title.removesuffix(' (new)')}" for p in products[:5])
+    assert products[5].description == "Has copy" and not products[5].title.endswith("(new)")
+    assert openai.calls == 7 and openai.peak <= 2  # two rate-limited attempts were retried
+
+def test_job_resumes_after_its_cursor(openai, category):
+    headers = {"Authorization": f"Bearer {get_token()}"}
+    job_id = client.post("/api/v1/products/ai/copy-jobs", headers=headers, json={"category_id": category}).json()["id"]
+    products = _products(category)
+    with SessionLocal() as db:
+        # a previous run got through the first two products before it was paused
+        db.query(AiCopyJob).filter(AiCopyJob.id == job_id).update(
+            {"status": "paused", "cursor": products[1].id, "started_at": products[0].created_at,
+             "total": 5, "processed_count": 2, "updated_count": 2})
+        db.commit()
+    result = _run(headers, job_id)
+    assert result["status"] == "completed" and result["processed_count"] == 5
+    assert [p.description is None for p in _products(category)[:5]] == [True, True, False, False, False]
+    assert openai.calls == 3
+
+def test_final_checkpoint_keeps_a_pause(category):
+    headers = {"Authorization": f"Bearer {get_token()}"}
+    job_id = client.post("/api/v1/products/ai/copy-jobs", headers=headers, json={"category_id": category}).json()["id"]
+    with SessionLocal() as db:
+        db.query(AiCopyJob).filter(AiCopyJob.id == job_id).update({"status": "paused"})
+        db.commit()
+        runner = ai_copy_jobs.CopyJobRunner(job_id)
+        runner._processed = 3
+        job = runner._checkpoint(db, status="completed", finished_at=None)
+    assert job.status == "paused" and job.processed_count == 3
+
+def test_failed_products_are_retried_on_the_next_start(openai, category):
+    headers = {"Authorization": f"Bearer {get_token()}"}
+    products = _products(category)
+    openai.reject = products[1].title
+    job_id = client.post("/api/v1/products/ai/copy-jobs", headers=headers, json={"category_id": category}).json()["id"]
+    result = _run(headers, job_id)
+    assert (result["status"], result["processed_count"], result["failed_count"]) == ("completed", 5, 1)
+    assert _products(category)[1].description is None
+
+    openai.reject = ""
+    openai.calls = 0
+    result = _run(headers, job_id)
+    assert (result["status"], result["processed_count"], result["failed_count"]) == ("completed", 5, 0)
+    assert _products(category)[1].description == f"Copy for {products[1].title}"
+    assert openai.calls == 1
+
+def test_rejected_key_fails_the_job_without_calling_for_every_product(openai, category):
+    openai.deny = True
+    headers = {"Authorization": f"Bearer {get_token()}"}
+    job_id = client.post("/api/v1/products/ai/copy-jobs", headers=headers,
+                         json={"category_id": category, "concurrency": 1}).json()["id"]
+    result = _run(headers, job_id)
+    assert result["status"] == "failed" and "401" in result["last_error"]
+    assert openai.calls == 1
+    assert all(p.description is None for p in _products(category)[:5])
+
+def test_copy_written_meanwhile_is_not_overwritten(category):
+    headers = {"Authorization": f"Bearer {get_token()}"}
+    job_id = client.post("/api/v1/products/ai/copy-jobs", headers=headers, json={"category_id": category}).json()["id"]
+    products = _products(category)
+    with SessionLocal() as db:
+        # an admin typed a description while the OpenAI call for products[0] was in flight
+        db.query(Product).filter(Product.id == products[0].id).update({"description": "Written by hand"})
+        db.commit()
+        runner = ai_copy_jobs.CopyJobRunner(job_id)
+        runner._only_missing = True
+        runner._updated = 2
+        runner._writes = [{"id": products[0].id, "description": "Generated"}, {"id": products[1].id, "description": "Generated"}]
+        job = runner._checkpoint(db)
+    assert job.updated_count == 1
+    assert [p.description for p in _products(category)[:2]] == ["Written by hand", "Generated"]
@@ -0,0 +1,125 @@
+import time
+from uuid import uuid4
+from sqlalchemy import delete, update
+from fastapi.testclient import TestClient
+from app.main import app
+from app.db.database import engine, SessionLocal
+from app.models.catalog_version import CatalogVersion
+from app.services.cache import PRODUCT_LIST_PREFIX, catalog_cache, TTLCache
+from app.services import catalog_version as catalog_versions
+from app.services.order_service import reserve_stock
+
+client = TestClient(app)
+
+EMAIL = "prodadmin@example.com"
+PWD = "testpass123"
+
+def get_token():
+    r = client.post("/api/v1/auth/login", json={"email": EMAIL, "password": PWD})
+    if r.status_code != 200:
+        r = client.post("/api/v1/auth/register", json={"email": EMAIL, "password": PWD})
+    return r.json()["access_token"]
+
+def test_product_detail_cached_and_invalidated_on_update():
+    headers = {"Authorization": f"Bearer {get_token()}"}
+    r = client.post("/api/v1/products/", json={"title": "Cache mug", "price_eur": 3, "stock": 2}, headers=headers)
+    pid = r.json()["id"]
+
+    client.get(f"/api/v1/products/{pid}")
+    hits = catalog_cache.hits
+    r = client.get(f"/api/v1/products/{pid}")
+    assert r.json()["title"] == "Cache mug"
+    assert catalog_cache.hits > hits
+
+    client.put(f"/api/v1/products/{pid}", json={"title": "Cache cup", "price_eur": 3, "stock": 2}, headers=headers)
+    assert client.get(f"/api/v1/products/{pid}").json()["title"] == "Cache cup"
+
+    stats = client.get("/api/v1/stats/cache", headers=headers).json()["catalog"]
+    assert stats["hits"] >= 1 and stats["size"] >= 1
+
+def test_conditional_get_returns_304_until_catalog_changes():
+    headers = {"Authorization": f"Bearer {get_token()}"}
+    r = client.post("/api/v1/products/", json={"title": "Etag lamp", "price_eur": 3, "stock": 2}, headers=headers)
+    pid = r.json()["id"]
+
+    first = client.get("/api/v1/products/", params={"limit": 5})
+    etag = first.headers["etag"]
+    assert etag.startswith('W/"') and "last-modified" in first.headers
+    again = client.get("/api/v1/products/", params={"limit": 5}, headers={"If-None-Match": etag})
+    assert again.status_code == 304 and again.content == b""
+    # different query -> different validator
+    assert client.get("/api/v1/products/", params={"limit": 6}, headers={"If-None-Match": etag}).status_code == 200
+
+    client.patch(f"/api/v1/products/{pid}/flags", json={"is_offer": True}, headers=headers)
+    changed = client.get("/api/v1/products/", params={"limit": 5}, headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.headers["etag"] != etag
+
+    cats = client.get("/api/v1/categories/")
+    assert client.get("/api/v1/categories/", headers={"If-None-Match": cats.headers["etag"]}).status_code == 304
+    s = client.get("/api/v1/search/", params={"q": "lamp"})
+    assert client.get("/api/v1/search/", params={"q": "lamp"}, headers={"If-None-Match": s.headers["etag"]}).status_code == 304
+
+def test_ttl_cache_lru_and_expiry():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)  # evicts least recently used "b"
+    assert cache.get("b") is None and cache.get("a") == 1
+    cache.ttl = -1
+    cache.set("d", 4)
+    assert cache.get("d") is None
+
+def test_category_delete_drops_cached_product_lists():
+    headers = {"Authorization": f"Bearer {get_token()}"}
+    tag = uuid4().hex[:8]
+    cat = client.post("/api/v1/categories/", json={"name": f"Gone {tag}", "slug": f"gone-{tag}"}, headers=headers).json()
+    client.get("/api/v1/products/", params={"category": cat["id"]})
+    assert any(k.startswith(PRODUCT_LIST_PREFIX) for k in catalog_cache._data)
+    assert client.delete(f"/api/v1/categories/{cat['id']}", headers=headers).status_code == 200
+    assert not any(k.startswith(PRODUCT_LIST_PREFIX) for k in catalog_cache._data)
+
+def test_delete_and_other_workers_move_the_catalog_validators():
+    headers = {"Authorization": f"Bearer {get_token()}"}
+    pid = client.post("/api/v1/products/", json={"title": "Gone vase", "price_eur": 3, "stock": 1}, headers=headers).json()["id"]
+    first = client.get("/api/v1/products/", params={"limit": 5})
+    time.sleep(1.1)  # Last-Modified has one-second resolution
+    assert client.delete(f"/api/v1/products/{pid}", headers=headers).status_code == 200
+    after = client.get("/api/v1/products/", params={"limit": 5},
+                       headers={"If-None-Match": first.headers["etag"], "If-Modified-Since": first.headers["last-modified"]})
+    assert after.status_code == 200 and after.headers["last-modified"] != first.headers["last-modified"]
+
+    # a write committed through another worker only shows up as a newer counter
+    client.get("/api/v1/products/", params={"limit": 5})
+    assert any(k.startswith(PRODUCT_LIST_PREFIX) for k in catalog_cache._data)
+    with engine.begin() as conn:
+        conn.execute(update(CatalogVersion.__table__).where(CatalogVersion.name == "products")
+                     .values(version=CatalogVersion.version + 1))
+    bumped = client.get("/api/v1/products/", params={"limit": 5}, headers={"If-None-Match": after.headers["etag"]})
+    assert bumped.status_code == 200 and bumped.headers["etag"] != after.headers["etag"]
+
+def test_stock_only_writes_leave_the_catalog_version_alone():
+    headers = {"Authorization": f"Bearer {get_token()}"}
+    pid = client.post("/api/v1/products/", json={"title": "Busy kettle", "price_eur": 3, "stock": 5}, headers=headers).json()["id"]
+    db = SessionLocal()
+    try:
+        before = catalog_versions.current(db, catalog_versions.PRODUCTS)
+        reserve_stock(db, {pid: 2})
+        db.commit()
+        assert catalog_versions.current(db, catalog_versions.PRODUCTS) == before
+
+        # a missing counter row is recreated by the next catalog write
+        with engine.begin() as conn:
+            conn.execute(delete(CatalogVersion.__table__).where(CatalogVersion.name == "categories"))
+        assert catalog_versions.current(db, catalog_versions.CATEGORIES) == (0, None)
+        db.commit()
+    finally:
+        db.close()
+    tag = uuid4().hex[:6]
+    assert client.post("/api/v1/categories/", json={"name": f"Kettles {tag}", "slug": f"kettles-{tag}"}, headers=headers).status_code == 200
+    db = SessionLocal()
+    try:
+        assert catalog_versions.current(db, catalog_versions.CATEGORIES)[0] >= 1
+        assert catalog_versions.current(db, catalog_versions.PRODUCTS)[0] > before[0]
+    finally:
+        db.close()
@@ -0,0 +1,50 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from app.main import app
+from app.db.database import engine
+
+client = TestClient(app)
+
+EMAIL = "prodadmin@example.com"
+PWD = "testpass123"
+
+def get_token():
+    r = client.post("/api/v1/auth/login", json={"email": EMAIL, "password": PWD})
+    if r.status_code != 200:
+        r = client.post("/api/v1/auth/register", json={"email": EMAIL, "password": PWD})
+    return r.json()["access_token"]
+
+def _session(n_messages: int) -> str:
+    sid = client.post("/api/v1/chat/sessions", json={"customer_name": "Inbox"}).json()["session_id"]
+    for i in range(n_messages):
+        client.post(f"/api/v1/chat/sessions/{sid}/messages", json={"content": f"m{i}"})
+    return sid
+
+def test_inbox_returns_last_message_and_count_in_one_query():
+    headers = {"Authorization": f"Bearer {get_token()}"}
+    older = _session(1)  # so the first page has a next one
+    quiet, busy = _session(0), _session(3)
+    statements = []
+    listener = lambda conn, cursor, stmt, *a: statements.append(stmt)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        r = client.get("/api/v1/chat/sessions", params={"limit": 2}, headers=headers)
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    assert r.status_code == 200
+    assert len([s for s in statements if "chat_messages" in s]) == 1
+    first, second = r.json()
+    assert first["session_id"] == busy and first["message_count"] == 3 and first["last_message"]["content"] == "m2"
+    assert second["session_id"] == quiet and second["message_count"] == 0 and second["last_message"] is None
+
+    nxt = client.get("/api/v1/chat/sessions", params={"limit": 2, "cursor": r.headers["X-Next-Cursor"]}, headers=headers).json()
+    assert {s["session_id"] for s in nxt}.isdisjoint({busy, quiet}) and older in {s["session_id"] for s in nxt}
+
+def test_session_messages_page_with_before_and_after_ids():
+    sid = _session(5)
+    latest = client.get(f"/api/v1/chat/sessions/{sid}", params={"limit": 2}).json()
+    assert [m["content"] for m in latest["messages"]] == ["m3", "m4"] and latest["has_more"]
+    older = client.get(f"/api/v1/chat/sessions/{sid}", params={"limit": 2, "before_id": latest["messages"][0]["id"]}).json()
+    assert [m["content"] for m in older["messages"]] == ["m1", "m2"]
+    newer = client.get(f"/api/v1/chat/sessions/{sid}", params={"after_id": older["messages"][-1]["id"]}).json()
+    assert [m["content"] for m in newer["messages"]] == ["m3", "m4"] and not newer["has_more"]
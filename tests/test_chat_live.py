@@ -0,0 +1,81 @@
+import asyncio
+import threading
+import time
+from fastapi.testclient import TestClient
+from app.main import app
+from app.routers import chat as chat_router
+from app.services.chat_hub import RESYNC, InMemoryHub, Subscription
+
+client = TestClient(app)
+
+def _session() -> str:
+    return client.post("/api/v1/chat/sessions", json={"customer_name": "Live"}).json()["session_id"]
+
+def test_websocket_receives_posted_messages():
+    sid = _session()
+    with client.websocket_connect(f"/api/v1/chat/sessions/{sid}/ws") as ws:
+        posted = client.post(f"/api/v1/chat/sessions/{sid}/messages", json={"content": "hello"}).json()
+        event = ws.receive_json()
+        assert event["id"] == posted["id"] and event["content"] == "hello" and event["session_id"] == sid
+
+def test_websocket_catches_up_from_after_id():
+    sid = _session()
+    first = client.post(f"/api/v1/chat/sessions/{sid}/messages", json={"content": "one"}).json()
+    client.post(f"/api/v1/chat/sessions/{sid}/messages", json={"content": "two"})
+    with client.websocket_connect(f"/api/v1/chat/sessions/{sid}/ws?after_id={first['id']}") as ws:
+        assert ws.receive_json()["content"] == "two"
+        client.post(f"/api/v1/chat/sessions/{sid}/messages", json={"role": "admin", "content": "three"})
+        event = ws.receive_json()
+        assert event["content"] == "three" and event["role"] == "admin"
+
+def test_long_poll_returns_only_the_delta():
+    sid = _session()
+    first = client.post(f"/api/v1/chat/sessions/{sid}/messages", json={"content": "one"}).json()
+    client.post(f"/api/v1/chat/sessions/{sid}/messages", json={"content": "two"})
+    r = client.get(f"/api/v1/chat/sessions/{sid}/messages", params={"after_id": first["id"], "wait": 5})
+    assert [m["content"] for m in r.json()] == ["two"]
+
+def test_long_poll_wakes_on_new_message():
+    sid = _session()
+    last = client.post(f"/api/v1/chat/sessions/{sid}/messages", json={"content": "seen"}).json()
+    timer = threading.Timer(0.3, lambda: client.post(f"/api/v1/chat/sessions/{sid}/messages", json={"content": "new"}))
+    started = time.monotonic()
+    timer.start()
+    r = client.get(f"/api/v1/chat/sessions/{sid}/messages", params={"after_id": last["id"], "wait": 10})
+    assert time.monotonic() - started < 5
+    assert [m["content"] for m in r.json()] == ["new"]
+
+def test_idle_long_poll_times_out_empty():
+    sid = _session()
+    last = client.post(f"/api/v1/chat/sessions/{sid}/messages", json={"content": "only"}).json()
+    r = client.get(f"/api/v1/chat/sessions/{sid}/messages", params={"after_id": last["id"], "wait": 0.2})
+    assert r.status_code == 200 and r.json() == []
+    assert client.get("/api/v1/chat/sessions/missing/messages", params={"after_id": 0, "wait": 0}).status_code == 404
+
+def test_websocket_backlog_is_not_capped_at_one_page(monkeypatch):
+    monkeypatch.setattr(chat_router, "BACKLOG_PAGE", 2)
+    sid = _session()
+    for n in range(5):
+        client.post(f"/api/v1/chat/sessions/{sid}/messages", json={"content": f"m{n}"})
+    with client.websocket_connect(f"/api/v1/chat/sessions/{sid}/ws?after_id=0") as ws:
+        assert [ws.receive_json()["content"] for _ in range(5)] == [f"m{n}" for n in range(5)]
+
+def test_full_subscription_queue_asks_for_a_resync():
+    async def scenario():
+        sub = Subscription("chat:slow", maxsize=2)
+        for n in range(3):
+            sub._put({"id": n})
+        return [await sub.get(0.1), await sub.get(0.1)]
+    assert asyncio.run(scenario()) == [RESYNC, None]
+
+def test_last_seen_is_only_trusted_while_listening():
+    h = InMemoryHub()
+    h.deliver("chat:x", {"id": 7})
+    assert h.last_seen("chat:x") is None  # no LISTEN: other workers' commits are invisible
+    h._set_tracking(True)
+    h.deliver("chat:x", {"id": 8})
+    assert h.last_seen("chat:x") == 8
+    h._set_tracking(False)  # connection dropped: notifications may be missed from here on
+    assert h.last_seen("chat:x") is None
+    h._set_tracking(True)
+    assert h.last_seen("chat:x") is None
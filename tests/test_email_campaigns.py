@@ -0,0 +1,89 @@
+import time
+import pytest
+from uuid import uuid4
+from fastapi.testclient import TestClient
+from app.main import app
+from app.db.database import SessionLocal
+from app.models.customer import Customer
+from app.models.email_campaign import EmailCampaign
+from app.services import campaign_service, email_delivery
+
+client = TestClient(app)
+
+EMAIL = "prodadmin@example.com"
+PWD = "testpass123"
+
+def get_token():
+    r = client.post("/api/v1/auth/login", json={"email": EMAIL, "password": PWD})
+    if r.status_code != 200:
+        r = client.post("/api/v1/auth/register", json={"email": EMAIL, "password": PWD})
+    return r.json()["access_token"]
+
+@pytest.fixture
+def customers():
+    # sorts after every other address, so a cursor just below the prefix isolates the test
+    prefix = f"zzzz-{uuid4().hex[:8]}"
+
+    def make(n: int) -> list[str]:
+        emails = [f"{prefix}-{i:02d}@example.com" for i in range(n)]
+        with SessionLocal() as db:
+            db.add_all([Customer(email=e, name=f"C{i}") for i, e in enumerate(emails)])
+            db.commit()
+        return emails
+
+    yield make
+    with SessionLocal() as db:
+        db.query(Customer).filter(Customer.email.like("zzzz-%")).delete(synchronize_session=False)
+        db.commit()
+
+def _run(campaign_id: int, cursor: str) -> dict:
+    headers = {"Authorization": f"Bearer {get_token()}"}
+    with SessionLocal() as db:
+        db.query(EmailCampaign).filter(EmailCampaign.id == campaign_id).update({"cursor": cursor})
+        db.commit()
+    r = client.post(f"/api/v1/emails/campaigns/{campaign_id}/start", headers=headers)
+    assert r.status_code == 200 and r.json()["status"] == "running"
+    runner = campaign_service.runner_for(campaign_id)
+    if runner:
+        runner.join(10)
+    return client.get(f"/api/v1/emails/campaigns/{campaign_id}", headers=headers).json()
+
+def _create(**overrides) -> int:
+    body = {"name": "Autumn", "subject": "Hi {{ name }}", "html": "<p>{{ campaign }} for {{ email }}</p>",
+            "rate_per_second": 50, "concurrency": 3, **overrides}
+    r = client.post("/api/v1/emails/campaigns", json=body, headers={"Authorization": f"Bearer {get_token()}"})
+    assert r.status_code == 200, r.text
+    return r.json()["id"]
+
+def test_campaign_renders_per_recipient_and_is_rate_limited(monkeypatch, customers):
+    sent = []
+    monkeypatch.setattr(email_delivery, "deliver_email", lambda to, subject, html, **kw: sent.append((to[0], subject, html)))
+    emails = customers(6)
+    campaign_id = _create(rate_per_second=20)
+    started = time.monotonic()
+    result = _run(campaign_id, emails[0][:13])
+    assert time.monotonic() - started >= 5 / 20
+    assert result["status"] == "completed"
+    mine = sorted(s for s in sent if s[0] in emails)
+    assert [s[0] for s in mine] == emails
+    assert mine[0][1] == "Hi C0" and "Autumn for " + emails[0] in mine[0][2]
+
+def test_campaign_resumes_after_its_cursor(monkeypatch, customers):
+    sent = []
+    monkeypatch.setattr(email_delivery, "deliver_email", lambda to, subject, html, **kw: sent.append(to[0]))
+    emails = customers(5)
+    campaign_id = _create()
+    result = _run(campaign_id, emails[2])  # recipients up to and including #2 were already handled
+    assert result["status"] == "completed"
+    assert [e for e in sent if e in emails] == emails[3:]
+    assert result["cursor"] >= emails[-1]
+
+def test_final_checkpoint_keeps_a_pause():
+    campaign_id = _create()
+    with SessionLocal() as db:
+        db.query(EmailCampaign).filter(EmailCampaign.id == campaign_id).update({"status": "paused"})
+        db.commit()
+        runner = campaign_service.CampaignRunner(campaign_id)
+        runner._sent = 2
+        campaign = runner._checkpoint(db, status="completed", finished_at=None)
+    assert campaign.status == "paused" and campaign.sent_count == 2
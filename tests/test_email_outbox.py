@@ -0,0 +1,75 @@
+import json
+from datetime import datetime, timedelta
+from app.main import app  # noqa: F401  (registers every model mapper)
+from app.db.database import SessionLocal
+from app.models.email_outbox import EmailOutbox
+from app.models.product import Product
+from app.schemas.order import OrderCreate, OrderItemIn
+from app.services import email_delivery, order_service, outbox_service
+
+def _drain(db):
+    while outbox_service.process_due(db):
+        pass
+
+def test_order_queues_confirmation_and_worker_sends_it(monkeypatch):
+    sent = []
+    monkeypatch.setattr(email_delivery, "deliver_email", lambda to, subject, html, **kw: sent.append((to, subject)))
+    db = SessionLocal()
+    try:
+        prod = Product(title="Outbox mug", price_eur=5, price_lek=500, stock=3)
+        db.add(prod)
+        db.commit()
+        order = order_service.create_order(db, OrderCreate(
+            items=[OrderItemIn(product_id=prod.id, quantity=1)], shipping_email="buyer@example.com"))
+        row = db.query(EmailOutbox).filter(EmailOutbox.recipients == json.dumps(["buyer@example.com"]),
+                                           EmailOutbox.subject.contains(order.order_number)).one()
+        assert row.status == "pending"
+
+        _drain(db)
+        db.expire_all()
+        assert row.status == "sent" and row.sent_at is not None
+        assert (["buyer@example.com"], row.subject) in sent
+    finally:
+        db.close()
+
+def test_failed_delivery_backs_off_then_dead_letters(monkeypatch):
+    def boom(*a, **kw):
+        raise ConnectionRefusedError("smtp down")
+    monkeypatch.setattr(email_delivery, "deliver_email", boom)
+    monkeypatch.setattr(outbox_service.settings, "EMAIL_OUTBOX_MAX_ATTEMPTS", 2)
+    db = SessionLocal()
+    try:
+        row = outbox_service.enqueue(db, ["nobody@example.com"], "retry me", "<p>x</p>")
+        db.commit()
+        _drain(db)
+        db.expire_all()
+        assert row.status == "pending" and row.attempts == 1
+        assert row.next_attempt_at > datetime.utcnow() + timedelta(seconds=10)
+        assert "smtp down" in row.last_error
+
+        row.next_attempt_at = datetime.utcnow()
+        db.commit()
+        _drain(db)
+        db.expire_all()
+        assert row.status == "dead" and row.attempts == 2
+    finally:
+        db.close()
+
+def test_expired_lease_counts_as_an_attempt(monkeypatch):
+    sent = []
+    monkeypatch.setattr(email_delivery, "deliver_email", lambda to, subject, html, **kw: sent.append(subject))
+    monkeypatch.setattr(outbox_service.settings, "EMAIL_OUTBOX_MAX_ATTEMPTS", 2)
+    assert outbox_service.lease_seconds() >= outbox_service.SMTP_PHASES * outbox_service.settings.SMTP_TIMEOUT_SECONDS
+    db = SessionLocal()
+    try:
+        row = outbox_service.enqueue(db, ["crash@example.com"], "crashed mid-send", "<p>x</p>")
+        db.commit()
+        # a worker claimed it and died: the lease has run out
+        row.status, row.attempts, row.next_attempt_at = "sending", 1, datetime.utcnow() - timedelta(seconds=1)
+        db.commit()
+        _drain(db)
+        db.expire_all()
+        assert row.status == "dead" and row.attempts == 2
+        assert "crashed mid-send" not in sent
+    finally:
+        db.close()
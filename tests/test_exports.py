@@ -0,0 +1,32 @@
+import csv
+import io
+import json
+from fastapi.testclient import TestClient
+from app.main import app
+
+client = TestClient(app)
+
+EMAIL = "prodadmin@example.com"
+PWD = "testpass123"
+
+def get_token():
+    r = client.post("/api/v1/auth/login", json={"email": EMAIL, "password": PWD})
+    if r.status_code != 200:
+        r = client.post("/api/v1/auth/register", json={"email": EMAIL, "password": PWD})
+    return r.json()["access_token"]
+
+def test_product_and_order_exports_stream():
+    headers = {"Authorization": f"Bearer {get_token()}"}
+    assert client.get("/api/v1/products/export").status_code == 401
+    p = client.post("/api/v1/products/", json={"title": "Export mug", "price_eur": 4, "price_lek": 400, "stock": 10}, headers=headers).json()
+    o = client.post("/api/v1/orders/", json={"items": [{"product_id": p["id"], "quantity": 2}]}).json()
+
+    r = client.get("/api/v1/products/export", params={"format": "csv"}, headers=headers)
+    assert r.status_code == 200 and r.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(r.text)))
+    assert any(row["id"] == str(p["id"]) and row["title"] == "Export mug" for row in rows)
+
+    r = client.get("/api/v1/orders/export", params={"format": "ndjson"}, headers=headers)
+    orders = [json.loads(line) for line in r.text.splitlines()]
+    mine = next(x for x in orders if x["id"] == o["id"])
+    assert [(i["product_id"], i["quantity"]) for i in mine["items"]] == [(p["id"], 2)]
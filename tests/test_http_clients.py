@@ -0,0 +1,150 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.db.database import SessionLocal
+from app.models.product import Product
+from app.services import http_clients
+
+client = TestClient(app)
+
+EMAIL = "prodadmin@example.com"
+PWD = "testpass123"
+
+def get_token():
+    r = client.post("/api/v1/auth/login", json={"email": EMAIL, "password": PWD})
+    if r.status_code != 200:
+        r = client.post("/api/v1/auth/register", json={"email": EMAIL, "password": PWD})
+    return r.json()["access_token"]
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    in_flight = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def _reply(self, body: dict) -> None:
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path.startswith("/post"):
+            html = (b'<html><head><meta property="og:title" content="Lamp"/>'
+                    b'<meta property="og:description" content="Brass desk lamp"/>'
+                    b'<meta property="og:image" content="http://img.example.com/lamp.jpg"/></head></html>')
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("Content-Length", str(len(html)))
+            self.end_headers()
+            self.wfile.write(html)
+            return
+        cls = type(self)
+        with cls.lock:
+            cls.in_flight += 1
+            cls.peak = max(cls.peak, cls.in_flight)
+        time.sleep(0.05)
+        with cls.lock:
+            cls.in_flight -= 1
+        self._reply({"path": self.path})
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        content = json.dumps({"title": "Mock title", "description": "Mock copy", "tags": ["a", "b"]})
+        self._reply({"choices": [{"message": {"content": content}}]})
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def mock_server(http_server):
+    _Handler.in_flight = _Handler.peak = 0
+    return http_server(_Handler)
+
+def test_sequential_requests_reuse_one_connection(mock_server):
+    async def run():
+        await http_clients.startup()
+        try:
+            for i in range(5):
+                r = await http_clients.get_client().get(f"{mock_server}/item/{i}")
+                assert r.json()["path"] == f"/item/{i}"
+        finally:
+            await http_clients.shutdown()
+
+    before = http_clients.metrics.snapshot()
+    asyncio.run(run())
+    after = http_clients.metrics.snapshot()
+    assert after["requests"] - before["requests"] == 5
+    assert after["new_connections"] - before["new_connections"] == 1
+
+def test_per_host_limit_caps_concurrency(mock_server, monkeypatch):
+    monkeypatch.setattr(http_clients.settings, "HTTP_MAX_CONNECTIONS_PER_HOST", 2)
+
+    async def run():
+        async with http_clients.build_client() as c:
+            await asyncio.gather(*(c.get(f"{mock_server}/slow/{i}") for i in range(6)))
+
+    asyncio.run(run())
+    assert _Handler.peak <= 2
+
+def test_suggest_goes_through_shared_client(openai_server):
+    openai_server(_Handler)
+    headers = {"Authorization": f"Bearer {get_token()}"}
+    before = http_clients.metrics.snapshot()["requests"]
+    r = client.post("/api/v1/products/ai/suggest", json={"title": "Mug", "force_refresh": True}, headers=headers)
+    assert r.status_code == 200, r.text
+    assert r.json() == {"suggested_title": "Mock title", "description": "Mock copy", "tags": ["a", "b"]}
+    stats = client.get("/api/v1/stats/http", headers=headers).json()
+    assert stats["requests"] == before + 1
+
+def test_scrape_saves_draft(mock_server):
+    url = f"{mock_server}/post/1"
+    r = client.post("/api/v1/products/ai/scrape-facebook", json={"url": url},
+                    headers={"Authorization": f"Bearer {get_token()}"})
+    try:
+        assert r.status_code == 200, r.text
+        body = r.json()
+        assert body["suggested_title"] == "Lamp" and body["description"] == "Brass desk lamp"
+        assert body["images"] == ["http://img.example.com/lamp.jpg"]
+
+        # a re-scrape refreshes the content but keeps what the admin set since
+        with SessionLocal() as db:
+            db.query(Product).filter(Product.id == body["product_id"]).update({"stock": 4, "price_eur": 25})
+            db.commit()
+        again = client.post("/api/v1/products/ai/scrape-facebook", json={"url": url},
+                            headers={"Authorization": f"Bearer {get_token()}"})
+        assert again.json()["product_id"] == body["product_id"]
+        with SessionLocal() as db:
+            prod = db.query(Product).filter(Product.id == body["product_id"]).one()
+            assert prod.stock == 4 and float(prod.price_eur) == 25 and prod.title == "Lamp"
+    finally:
+        with SessionLocal() as db:
+            db.query(Product).filter(Product.source_url == url).delete()
+            db.commit()
+
+def test_shared_client_is_tied_to_the_lifespan_loop():
+    async def outside():
+        with pytest.raises(RuntimeError):
+            http_clients.get_client()
+        async with http_clients.client() as c:
+            assert not c.is_closed
+        assert c.is_closed  # a short-lived client, closed after use
+
+    async def inside():
+        await http_clients.startup()
+        try:
+            async with http_clients.client() as c:
+                assert c is http_clients.get_client()
+            assert not c.is_closed
+        finally:
+            await http_clients.shutdown()
+
+    asyncio.run(outside())
+    asyncio.run(inside())
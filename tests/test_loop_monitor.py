@@ -0,0 +1,36 @@
+import asyncio
+import time
+from app.services.loop_monitor import LoopStallMonitor
+
+def _blocking_call():
+    time.sleep(0.3)
+
+def test_blocking_call_is_reported_with_its_stack():
+    async def run() -> dict:
+        monitor = LoopStallMonitor(threshold=0.05)
+        monitor.start()
+        try:
+            await asyncio.sleep(0.1)
+            _blocking_call()
+            await asyncio.sleep(0.1)
+        finally:
+            await monitor.stop()
+        return monitor.stats()
+
+    stats = asyncio.run(run())
+    assert stats["stalls"] >= 1 and stats["max_stall_ms"] >= 200
+    assert "_blocking_call" in stats["last_stack"]
+
+def test_awaiting_is_not_a_stall():
+    async def run() -> dict:
+        monitor = LoopStallMonitor(threshold=0.05)
+        monitor.start()
+        try:
+            await asyncio.gather(*(asyncio.sleep(0.05) for _ in range(50)))
+            await asyncio.sleep(0.2)
+        finally:
+            await monitor.stop()
+        return monitor.stats()
+
+    stats = asyncio.run(run())
+    assert stats["stalls"] == 0 and stats["last_stack"] is None
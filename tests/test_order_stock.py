@@ -0,0 +1,49 @@
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException
+from app.main import app  # noqa: F401  (registers every model mapper)
+from app.db.database import SessionLocal
+from app.models.product import Product
+from app.schemas.order import OrderCreate, OrderItemIn
+from app.services import order_service
+
+def _place_order(product_id: int) -> bool:
+    db = SessionLocal()
+    try:
+        order_service.create_order(db, OrderCreate(items=[OrderItemIn(product_id=product_id, quantity=1)]))
+        return True
+    except HTTPException as e:
+        assert e.status_code == 400
+        return False
+    finally:
+        db.close()
+
+def test_parallel_orders_never_oversell():
+    db = SessionLocal()
+    prod = Product(title="Limited sneaker", price_eur=50, price_lek=5000, stock=5)
+    db.add(prod)
+    db.commit()
+    pid = prod.id
+    try:
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(_place_order, [pid] * 12))
+        assert results.count(True) == 5
+        db.expire_all()
+        assert db.query(Product.stock).filter(Product.id == pid).scalar() == 0
+    finally:
+        db.close()
+
+def test_multi_line_order_is_all_or_nothing():
+    db = SessionLocal()
+    a = Product(title="Stock A", price_eur=1, price_lek=100, stock=3)
+    b = Product(title="Stock B", price_eur=1, price_lek=100, stock=1)
+    db.add_all([a, b])
+    db.commit()
+    payload = OrderCreate(items=[OrderItemIn(product_id=a.id, quantity=2), OrderItemIn(product_id=b.id, quantity=1), OrderItemIn(product_id=b.id, quantity=1)])
+    try:
+        order_service.create_order(db, payload)
+        raise AssertionError("expected insufficient stock")
+    except HTTPException as e:
+        assert str(b.id) in e.detail
+    stocks = dict(db.query(Product.id, Product.stock).filter(Product.id.in_([a.id, b.id])).all())
+    assert stocks == {a.id: 3, b.id: 1}
+    db.close()
@@ -0,0 +1,105 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from uuid import uuid4
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from app.main import app
+from app.db.database import SessionLocal
+from app.services import idempotency_service
+
+client = TestClient(app)
+
+EMAIL = "prodadmin@example.com"
+PWD = "testpass123"
+
+def get_token():
+    r = client.post("/api/v1/auth/login", json={"email": EMAIL, "password": PWD})
+    if r.status_code != 200:
+        r = client.post("/api/v1/auth/register", json={"email": EMAIL, "password": PWD})
+    return r.json()["access_token"]
+
+def _product(stock: int) -> int:
+    r = client.post("/api/v1/products/", json={"title": "Idem mug", "price_eur": 2, "price_lek": 200, "stock": stock}, headers={"Authorization": f"Bearer {get_token()}"})
+    return r.json()["id"]
+
+def _stock(pid: int) -> int:
+    return client.get(f"/api/v1/products/{pid}").json()["stock"]
+
+def test_replay_returns_same_order_without_decrementing_again():
+    pid = _product(10)
+    key = uuid4().hex
+    body = {"items": [{"product_id": pid, "quantity": 2}]}
+    r1 = client.post("/api/v1/orders/", json=body, headers={"Idempotency-Key": key})
+    r2 = client.post("/api/v1/orders/", json=body, headers={"Idempotency-Key": key})
+    assert r1.status_code == r2.status_code == 200
+    assert r1.json()["id"] == r2.json()["id"]
+    assert r2.headers["idempotent-replayed"] == "true"
+    assert _stock(pid) == 8
+
+    other = client.post("/api/v1/orders/", json={"items": [{"product_id": pid, "quantity": 1}]}, headers={"Idempotency-Key": key})
+    assert other.status_code == 422
+
+def test_concurrent_duplicates_execute_once():
+    pid = _product(10)
+    key = uuid4().hex
+    body = {"items": [{"product_id": pid, "quantity": 1}]}
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        responses = list(pool.map(lambda _: client.post("/api/v1/orders/", json=body, headers={"Idempotency-Key": key}), range(4)))
+    assert {r.status_code for r in responses} == {200}
+    assert len({r.json()["id"] for r in responses}) == 1
+    assert _stock(pid) == 9
+
+def test_failed_request_is_not_replayed():
+    pid = _product(1)
+    key = uuid4().hex
+    body = {"items": [{"product_id": pid, "quantity": 2}]}
+    assert client.post("/api/v1/orders/", json=body, headers={"Idempotency-Key": key}).status_code == 400
+    client.put(f"/api/v1/products/{pid}", json={"title": "Idem mug", "price_eur": 2, "price_lek": 200, "stock": 5},
+               headers={"Authorization": f"Bearer {get_token()}"})
+    retry = client.post("/api/v1/orders/", json=body, headers={"Idempotency-Key": key})
+    assert retry.status_code == 200 and retry.headers["idempotent-replayed"] == "false"
+    assert _stock(pid) == 3
+
+def test_waiter_runs_the_request_when_the_original_fails():
+    key = uuid4().hex
+    started = threading.Event()
+
+    def failing(complete):
+        started.set()
+        time.sleep(0.3)
+        raise HTTPException(status_code=400, detail="Insufficient stock")
+
+    def call(handler):
+        with SessionLocal() as db:
+            try:
+                return idempotency_service.run_idempotent(db, "tests.waiter", key, {"n": 1}, handler, json.dumps).status_code
+            except HTTPException as e:
+                return e.status_code
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        first = pool.submit(call, failing)
+        started.wait(5)
+        second = pool.submit(call, lambda complete: complete({"ok": True}))
+        assert first.result() == 400
+        assert second.result() == 200
+
+def test_failure_after_commit_keeps_the_completed_claim():
+    key = uuid4().hex
+
+    def commits_then_fails(db):
+        def handler(complete):
+            complete({"ok": True})
+            db.commit()
+            raise RuntimeError("post-commit hiccup")
+        return handler
+
+    with SessionLocal() as db:
+        try:
+            idempotency_service.run_idempotent(db, "tests.committed", key, {"n": 1}, commits_then_fails(db), json.dumps)
+        except RuntimeError:
+            pass
+    with SessionLocal() as db:
+        replay = idempotency_service.run_idempotent(db, "tests.committed", key, {"n": 1}, commits_then_fails(db), json.dumps)
+    assert replay.headers["idempotent-replayed"] == "true" and json.loads(replay.body) == {"ok": True}
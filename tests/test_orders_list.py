@@ -0,0 +1,52 @@
+from uuid import uuid4
+from fastapi.testclient import TestClient
+from app.main import app
+from app.db.database import SessionLocal
+from app.models.order import Order
+from app.routers.orders import ORDERS_PAGE_SIZE
+
+client = TestClient(app)
+
+EMAIL = "prodadmin@example.com"
+PWD = "testpass123"
+
+def get_token():
+    r = client.post("/api/v1/auth/login", json={"email": EMAIL, "password": PWD})
+    if r.status_code != 200:
+        r = client.post("/api/v1/auth/register", json={"email": EMAIL, "password": PWD})
+    return r.json()["access_token"]
+
+def test_order_list_is_keyset_paginated_and_filterable():
+    headers = {"Authorization": f"Bearer {get_token()}"}
+    p = client.post("/api/v1/products/", json={"title": "Order lamp", "price_eur": 4, "price_lek": 400, "stock": 50}, headers=headers).json()
+    email = f"buyer-{uuid4().hex[:8]}@example.com"
+    ids = [client.post("/api/v1/orders/", json={"items": [{"product_id": p["id"], "quantity": 1}], "shipping_email": email}).json()["id"] for _ in range(3)]
+
+    r = client.get("/api/v1/orders/", params={"email": email.upper(), "limit": 2}, headers=headers)
+    assert r.status_code == 200
+    page1 = r.json()
+    assert [o["id"] for o in page1] == ids[::-1][:2]
+    assert page1[0]["items"][0]["product_id"] == p["id"]
+
+    r = client.get("/api/v1/orders/", params={"email": email, "limit": 2, "cursor": r.headers["x-next-cursor"], "paginated": True, "include_items": False}, headers=headers)
+    body = r.json()
+    assert [o["id"] for o in body["orders"]] == [ids[0]]
+    assert "items" not in body["orders"][0]
+    assert body["pagination"]["has_more"] is False
+
+    assert client.get("/api/v1/orders/", params={"email": email, "status": "SHIPPED"}, headers=headers).json() == []
+
+def test_order_list_pages_by_default_and_gates_customer_filters():
+    headers = {"Authorization": f"Bearer {get_token()}"}
+    p = client.post("/api/v1/products/", json={"title": "Paged lamp", "price_eur": 4, "price_lek": 400, "stock": 200}, headers=headers).json()
+    with SessionLocal() as db:
+        missing = max(0, ORDERS_PAGE_SIZE + 1 - db.query(Order).count())
+    for _ in range(missing):
+        client.post("/api/v1/orders/", json={"items": [{"product_id": p["id"], "quantity": 1}]})
+
+    r = client.get("/api/v1/orders/", params={"include_items": False})
+    assert len(r.json()) == ORDERS_PAGE_SIZE
+    assert r.headers["x-next-cursor"]
+
+    assert client.get("/api/v1/orders/", params={"email": "someone@example.com"}).status_code == 401
+    assert client.get("/api/v1/orders/", params={"customer_id": 1}).status_code == 401
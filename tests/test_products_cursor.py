@@ -0,0 +1,60 @@
+from uuid import uuid4
+from fastapi.testclient import TestClient
+from app.main import app
+
+client = TestClient(app)
+
+EMAIL = "prodadmin@example.com"
+PWD = "testpass123"
+
+def get_token():
+    r = client.post("/api/v1/auth/login", json={"email": EMAIL, "password": PWD})
+    if r.status_code != 200:
+        r = client.post("/api/v1/auth/register", json={"email": EMAIL, "password": PWD})
+    return r.json()["access_token"]
+
+def test_cursor_pagination_walks_all_pages():
+    token = get_token()
+    tag = uuid4().hex[:8]
+    created = set()
+    for price in (5, 3, 3, 9, 1):
+        r = client.post("/api/v1/products/", json={"title": f"Cursor {tag}", "price_eur": price, "price_lek": price * 100, "stock": 1}, headers={"Authorization": f"Bearer {token}"})
+        assert r.status_code == 200, r.text
+        created.add(r.json()["id"])
+
+    seen, prices, cursor = [], [], ""
+    while True:
+        r = client.get("/api/v1/products/", params={"search": tag, "sort": "price_asc", "limit": 2, "cursor": cursor, "include_total": True})
+        assert r.status_code == 200, r.text
+        data = r.json()
+        assert data["pagination"]["total"] == 5
+        seen += [p["id"] for p in data["products"]]
+        prices += [p["price_eur"] for p in data["products"]]
+        cursor = data["pagination"]["next_cursor"]
+        if not cursor:
+            break
+    assert set(seen) == created and len(seen) == len(created)
+    assert prices == sorted(prices)
+
+    r = client.get("/api/v1/search/", params={"q": tag, "limit": 3, "cursor": ""})
+    assert r.status_code == 200
+    first = r.json()
+    assert first["pagination"]["hasNext"] is True
+    r = client.get("/api/v1/search/", params={"q": tag, "limit": 3, "cursor": first["pagination"]["nextCursor"]})
+    assert len(first["products"]) + len(r.json()["products"]) == 5
+
+    assert client.get("/api/v1/products/", params={"cursor": "garbage"}).status_code == 400
+
+def test_summary_view_and_sparse_fields():
+    token = get_token()
+    tag = uuid4().hex[:8]
+    r = client.post("/api/v1/products/", json={"title": f"Card {tag}", "description": "long text", "images": "[]", "price_eur": 2, "stock": 1}, headers={"Authorization": f"Bearer {token}"})
+    assert r.status_code == 200
+
+    card = client.get("/api/v1/products/", params={"search": tag, "view": "summary"}).json()[0]
+    assert card["title"] == f"Card {tag}" and "description" not in card and "images" not in card
+
+    sparse = client.get("/api/v1/search/", params={"q": tag, "fields": "title,images", "cursor": ""}).json()["products"][0]
+    assert set(sparse) == {"id", "title", "images"}
+
+    assert client.get("/api/v1/products/", params={"fields": "password"}).status_code == 400
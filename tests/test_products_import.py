@@ -0,0 +1,54 @@
+from uuid import uuid4
+from fastapi.testclient import TestClient
+from app.main import app
+
+client = TestClient(app)
+
+EMAIL = "prodadmin@example.com"
+PWD = "testpass123"
+
+def get_token():
+    r = client.post("/api/v1/auth/login", json={"email": EMAIL, "password": PWD})
+    if r.status_code != 200:
+        r = client.post("/api/v1/auth/register", json={"email": EMAIL, "password": PWD})
+    return r.json()["access_token"]
+
+def test_csv_import_upserts_by_slug_and_reports_bad_rows():
+    headers = {"Authorization": f"Bearer {get_token()}"}
+    tag = uuid4().hex[:8]
+    csv_body = (
+        "title,slug,price_eur,stock,is_featured\n"
+        f"Imported A {tag},imp-a-{tag},10,3,true\n"
+        f"Imported B {tag},imp-b-{tag},not-a-number,1,false\n"
+        f"Imported C {tag},,7.5,2,\n"
+    )
+    r = client.post("/api/v1/products/import", files={"file": ("feed.csv", csv_body, "text/csv")}, params={"batch_size": 2}, headers=headers)
+    assert r.status_code == 200, r.text
+    report = r.json()
+    assert report["processed"] == 3 and report["upserted"] == 1
+    # a row without its upsert key is rejected rather than keyed on its title
+    assert [e["row"] for e in report["errors"]] == [3, 4]
+    assert "Missing upsert key 'slug'" in report["errors"][1]["error"]
+
+    # second run updates in place instead of inserting duplicates
+    jsonl = f'{{"title": "Imported A {tag}", "slug": "imp-a-{tag}", "price_eur": 12, "stock": 9}}\n'
+    r = client.post("/api/v1/products/import", files={"file": ("feed.jsonl", jsonl, "application/x-ndjson")}, headers=headers)
+    assert r.json()["upserted"] == 1
+    found = client.get("/api/v1/products/", params={"search": f"Imported {tag}"}).json()
+    assert len(found) == 1
+    a = next(p for p in found if p["title"] == f"Imported A {tag}")
+    assert a["price_eur"] == 12 and a["stock"] == 9 and a["is_featured"] is True
+
+    assert client.post("/api/v1/products/import", files={"file": ("feed.txt", "x", "text/plain")}, headers=headers).status_code == 400
+
+def test_duplicate_source_url_is_a_conflict():
+    headers = {"Authorization": f"Bearer {get_token()}"}
+    url = f"https://example.com/posts/{uuid4().hex}"
+    first = client.post("/api/v1/products/", json={"title": "Src A", "price_eur": 1, "stock": 1, "source_url": url}, headers=headers)
+    assert first.status_code == 200
+    assert client.post("/api/v1/products/", json={"title": "Src B", "price_eur": 1, "stock": 1, "source_url": url}, headers=headers).status_code == 409
+    other = client.post("/api/v1/products/", json={"title": "Src C", "price_eur": 1, "stock": 1}, headers=headers).json()
+    r = client.put(f"/api/v1/products/{other['id']}", json={"title": "Src C", "price_eur": 1, "stock": 1, "source_url": url}, headers=headers)
+    assert r.status_code == 409
+    for pid in (first.json()["id"], other["id"]):
+        client.delete(f"/api/v1/products/{pid}", headers=headers)
@@ -0,0 +1,153 @@
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.db.database import SessionLocal
+from app.models.product import Product
+from app.models.scrape_job import ScrapeJob
+from app.services import scrape_jobs, scraper
+
+client = TestClient(app)
+
+EMAIL = "prodadmin@example.com"
+PWD = "testpass123"
+
+def get_token():
+    r = client.post("/api/v1/auth/login", json={"email": EMAIL, "password": PWD})
+    if r.status_code != 200:
+        r = client.post("/api/v1/auth/register", json={"email": EMAIL, "password": PWD})
+    return r.json()["access_token"]
+
+class _Pages(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    in_flight = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        cls = type(self)
+        with cls.lock:
+            cls.in_flight += 1
+            cls.peak = max(cls.peak, cls.in_flight)
+        time.sleep(0.05)
+        with cls.lock:
+            cls.in_flight -= 1
+        if self.path.startswith("/big"):
+            # no Content-Length: the cap has to trip while streaming
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+            for _ in range(20):
+                self.wfile.write(b"<p>" + b"x" * 1000 + b"</p>")
+            return
+        if not self.path.startswith("/post/"):
+            self.send_error(404)
+            return
+        n = self.path.rsplit("/", 1)[1]
+        html = (f'<html><head><title>Post {n}</title><meta property="og:title" content="Item {n}"/>'
+                f'<meta property="og:image" content="http://img.example.com/{n}.jpg"/></head>'
+                f'<body><p>Handmade item number {n}, ships in two days.</p></body></html>').encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(html)))
+        self.end_headers()
+        self.wfile.write(html)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def pages(monkeypatch, http_server):
+    _Pages.in_flight = _Pages.peak = 0
+    monkeypatch.setattr(scrape_jobs.settings, "SCRAPE_MAX_PER_HOST", 2)
+    monkeypatch.setattr(scrape_jobs.settings, "SCRAPE_INSERT_BATCH", 3)
+    monkeypatch.setattr(scrape_jobs.settings, "SCRAPE_MAX_BYTES", 10_000)
+    base = http_server(_Pages)
+    yield base
+    scraper.shutdown_pool()
+    with SessionLocal() as db:
+        db.query(Product).filter(Product.source_url.like(f"{base}/%")).delete(synchronize_session=False)
+        db.commit()
+
+def test_parse_post_extracts_title_text_and_media():
+    post = scraper.parse_post(b'<html><head><meta property="og:title" content="Lamp"/>'
+                              b'<meta property="og:video" content="http://v.example.com/a.mp4"/></head>'
+                              b'<body><p>A brass desk lamp with a linen shade.</p><img src="http://i.example.com/1.jpg"></body></html>')
+    assert post == {"title": "Lamp", "text": "A brass desk lamp with a linen shade.",
+                    "images": ["http://i.example.com/1.jpg"], "videos": ["http://v.example.com/a.mp4"]}
+
+def test_bulk_scrape_saves_drafts_in_batches(pages):
+    urls = [f"{pages}/post/{i}" for i in range(8)] + [f"{pages}/big", f"{pages}/missing", f"{pages}/post/0"]
+    headers = {"Authorization": f"Bearer {get_token()}"}
+    r = client.post("/api/v1/products/ai/scrape-bulk", json={"urls": urls, "price_eur": 12.5}, headers=headers)
+    assert r.status_code == 200, r.text
+    job = r.json()
+    assert job["status"] == "running" and job["total"] == 10
+    runner = scrape_jobs.runner_for(job["id"])
+    if runner:
+        runner.join(30)
+    job = client.get(f"/api/v1/products/ai/scrape-jobs/{job['id']}", headers=headers).json()
+    assert job["status"] == "completed", job
+    assert (job["processed_count"], job["saved_count"], job["failed_count"]) == (10, 8, 2)
+    assert sorted(e["url"] for e in job["errors"]) == [f"{pages}/big", f"{pages}/missing"]
+    assert _Pages.peak <= 2
+    with SessionLocal() as db:
+        products = db.query(Product).filter(Product.source_url.like(f"{pages}/post/%")).order_by(Product.source_url).all()
+        assert [p.title for p in products] == [f"Item {i}" for i in range(8)]
+        assert all(p.is_draft and float(p.price_eur) == 12.5 for p in products)
+        assert products[3].description == "Handmade item number 3, ships in two days."
+        db.query(ScrapeJob).filter(ScrapeJob.id == job["id"]).delete()
+        db.commit()
+
+def test_save_drafts_keeps_edits_on_existing_products(pages):
+    with SessionLocal() as db:
+        live = Product(title="Old", price_eur=30, stock=7, is_draft=False, source_url=f"{pages}/post/live")
+        db.add(live)
+        db.commit()
+        fields = [scraper.draft_fields(f"{pages}/post/{n}", {"title": f"Item {n}", "text": "", "images": [], "videos": []})
+                  for n in ("live", "new")]
+        scrape_jobs.save_drafts(db, fields)
+        db.commit()
+        by_url = {p.source_url: p for p in db.query(Product).filter(Product.source_url.like(f"{pages}/post/%"))}
+    live, new = by_url[f"{pages}/post/live"], by_url[f"{pages}/post/new"]
+    assert live.title == "Item live" and not live.is_draft and live.stock == 7 and float(live.price_eur) == 30
+    assert new.is_draft and new.stock == 0
+
+def test_save_drafts_upserts_urls_saved_concurrently(pages):
+    url = f"{pages}/post/raced"
+    with SessionLocal() as db, SessionLocal() as other:
+        # /scrape-facebook (another session) commits the URL while the job's batch is pending
+        other.add(Product(title="From the router", stock=3, source_url=url))
+        other.commit()
+        fields = scraper.draft_fields(url, {"title": "From the job", "text": "", "images": [], "videos": []})
+        ids = scrape_jobs.save_drafts(db, [fields, fields])
+        db.commit()
+        prod = db.query(Product).filter(Product.source_url == url).one()
+    assert ids == [prod.id] and prod.title == "From the job" and prod.stock == 3 and not prod.is_draft
+
+def test_interrupted_job_resumes_from_its_cursor(pages):
+    urls = [f"{pages}/post/r{i}" for i in range(6)]
+    with SessionLocal() as db:
+        # a worker died after handling the first four URLs
+        job = ScrapeJob(urls=json.dumps(urls), status="running", total=6, cursor=4, processed_count=4, saved_count=4,
+                        updated_at=datetime.utcnow() - timedelta(seconds=scrape_jobs.settings.SCRAPE_LEASE_SECONDS + 5))
+        db.add(job)
+        db.commit()
+        job_id = job.id
+    assert scrape_jobs.resume_interrupted() >= 1
+    runner = scrape_jobs.runner_for(job_id)
+    if runner:
+        runner.join(30)
+    with SessionLocal() as db:
+        job = db.query(ScrapeJob).filter(ScrapeJob.id == job_id).one()
+        assert (job.status, job.cursor, job.processed_count, job.saved_count) == ("completed", 6, 6, 6)
+        scraped = {p.source_url for p in db.query(Product).filter(Product.source_url.like(f"{pages}/post/r%"))}
+        assert scraped == set(urls[4:])
+        db.delete(job)
+        db.commit()
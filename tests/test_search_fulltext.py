@@ -0,0 +1,48 @@
+from uuid import uuid4
+from fastapi.testclient import TestClient
+from app.main import app
+
+client = TestClient(app)
+
+EMAIL = "prodadmin@example.com"
+PWD = "testpass123"
+
+def get_token():
+    r = client.post("/api/v1/auth/login", json={"email": EMAIL, "password": PWD})
+    if r.status_code != 200:
+        r = client.post("/api/v1/auth/register", json={"email": EMAIL, "password": PWD})
+    return r.json()["access_token"]
+
+def test_search_ranks_title_matches_first():
+    headers = {"Authorization": f"Bearer {get_token()}"}
+    tag = "fts" + uuid4().hex[:8]
+    r2 = client.post("/api/v1/products/", json={"title": f"{tag} desk", "price_eur": 7, "stock": 1}, headers=headers)
+    r1 = client.post("/api/v1/products/", json={"title": "Plain lamp", "description": f"Works with {tag} bulbs", "price_eur": 4, "stock": 1}, headers=headers)
+    assert r1.status_code == 200 and r2.status_code == 200
+
+    r = client.get("/api/v1/search/", params={"q": tag})
+    ids = [p["id"] for p in r.json()["products"]]
+    assert ids == [r2.json()["id"], r1.json()["id"]]
+
+    # prefix of a token still matches; updates are reindexed
+    r = client.get("/api/v1/products/", params={"search": tag[:6] + tag[6:9]})
+    assert {p["id"] for p in r.json()} >= {r1.json()["id"], r2.json()["id"]}
+    upd = client.put(f"/api/v1/products/{r2.json()['id']}", json={"title": "Renamed desk", "price_eur": 7, "stock": 1}, headers=headers)
+    assert upd.status_code == 200
+    r = client.get("/api/v1/products/", params={"search": tag})
+    assert [p["id"] for p in r.json()] == [r1.json()["id"]]
+
+def test_search_facets_single_query():
+    headers = {"Authorization": f"Bearer {get_token()}"}
+    tag = "facet" + uuid4().hex[:8]
+    for price, featured in ((5, True), (30, False), (30, False)):
+        r = client.post("/api/v1/products/", json={"title": f"{tag} item", "price_eur": price, "stock": 1, "is_featured": featured}, headers=headers)
+        assert r.status_code == 200
+    r = client.get("/api/v1/search/", params={"q": tag, "facets": True})
+    data = r.json()
+    facets = data["facets"]
+    assert facets["total"] == data["pagination"]["count"] == 3
+    assert facets["featured"] == 1 and facets["offers"] == 0
+    buckets = {b["min"]: b["count"] for b in facets["price"]}
+    assert buckets[0] == 1 and buckets[25] == 2
+    assert sum(c["count"] for c in facets["categories"]) == 3
@@ -0,0 +1,50 @@
+from uuid import uuid4
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from app.main import app
+from app.db.database import SessionLocal, engine
+from app.models.admin import AdminSetting
+from app.services import settings_service
+
+client = TestClient(app)
+
+EMAIL = "prodadmin@example.com"
+PWD = "testpass123"
+
+def get_token():
+    r = client.post("/api/v1/auth/login", json={"email": EMAIL, "password": PWD})
+    if r.status_code != 200:
+        r = client.post("/api/v1/auth/register", json={"email": EMAIL, "password": PWD})
+    return r.json()["access_token"]
+
+def test_upsert_is_visible_immediately_and_bumps_version():
+    before = settings_service.snapshot().version
+    key = f"test_{uuid4().hex[:8]}"
+    r = client.post("/api/v1/settings/", json={"key": key, "value": "one"}, headers={"Authorization": f"Bearer {get_token()}"})
+    assert r.status_code == 200
+    snap = settings_service.snapshot()
+    assert snap.get(key) == "one" and snap.version > before
+
+def test_reads_cost_no_queries_between_polls():
+    settings_service.snapshot()
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        for _ in range(50):
+            settings_service.get_setting("smtp_host")
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    assert statements == []
+
+def test_other_workers_pick_up_changes_by_polling_the_version(monkeypatch):
+    key = f"test_{uuid4().hex[:8]}"
+    settings_service.snapshot()
+    # another worker writes directly: only the shared counter tells us about it
+    with SessionLocal() as db:
+        db.add(AdminSetting(key=key, value="remote"))
+        settings_service.bump_version(db)
+        db.commit()
+    assert settings_service.get_setting(key) is None  # still inside the poll interval
+    monkeypatch.setattr(settings_service.settings, "SETTINGS_POLL_SECONDS", 0)
+    assert settings_service.get_setting(key) == "remote"
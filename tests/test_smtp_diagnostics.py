@@ -0,0 +1,62 @@
+import socket
+import time
+import pytest
+pytest.importorskip("aiosmtpd")
+from aiosmtpd.controller import Controller
+from aiosmtpd.smtp import AuthResult
+from app.services.smtp_diagnostics import Strategy, _Probe, probe
+
+class _Sink:
+    async def handle_DATA(self, server, session, envelope):
+        return "250 OK"
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+@pytest.fixture
+def smtp_port():
+    port = _free_port()
+    controller = Controller(_Sink(), hostname="127.0.0.1", port=port, auth_require_tls=False,
+                            authenticator=lambda *a: AuthResult(success=True))
+    controller.start()
+    yield port
+    controller.stop()
+
+@pytest.fixture
+def blackhole_port():
+    # accepts TCP connections but never sends the SMTP greeting
+    s = socket.socket()
+    s.bind(("127.0.0.1", 0))
+    s.listen(8)
+    yield s.getsockname()[1]
+    s.close()
+
+def test_first_success_cancels_slow_strategies(smtp_port, blackhole_port):
+    strategies = [
+        Strategy("hangs", "PLAIN", blackhole_port, False),
+        Strategy("works", "PLAIN", smtp_port, False),
+    ]
+    started = time.monotonic()
+    results = probe("127.0.0.1", "shop", "secret", strategies, deadline=10, attempt_timeout=10)
+    assert time.monotonic() - started < 5
+    assert [r["name"] for r in results] == ["hangs", "works"]
+    assert results[1]["status"] == "success"
+    assert {"connect_ms", "auth_ms", "total_ms"} <= set(results[1]["timings"])
+    assert results[0]["status"] == "cancelled"
+
+def test_overall_deadline_bounds_the_probe(blackhole_port):
+    strategies = [Strategy(f"hangs-{i}", "PLAIN", blackhole_port, False) for i in range(3)]
+    started = time.monotonic()
+    results = probe("127.0.0.1", "shop", "secret", strategies, deadline=1, attempt_timeout=15)
+    assert time.monotonic() - started < 3
+    assert all(r["status"] in ("timeout", "failed") and not r["success"] for r in results)
+
+def test_attempt_timeout_shrinks_to_the_remaining_deadline(blackhole_port):
+    # not cancelled by anyone: the socket timeout alone has to end the attempt on time
+    attempt = _Probe("127.0.0.1", "shop", "secret", 15, time.monotonic() + 0.5)
+    started = time.monotonic()
+    result = attempt.attempt(Strategy("hangs", "PLAIN", blackhole_port, False))
+    assert time.monotonic() - started < 2
+    assert result["status"] == "failed" and "timed out" in result["error"]
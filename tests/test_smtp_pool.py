@@ -0,0 +1,80 @@
+import smtplib
+import socket
+import pytest
+pytest.importorskip("aiosmtpd")
+from aiosmtpd.controller import Controller
+from aiosmtpd.smtp import AuthResult
+from app.services import smtp_pool
+from app.services.smtp_pool import SmtpConfig
+
+class _Inbox:
+    def __init__(self):
+        self.messages = []
+        self.logins = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append((envelope.mail_from, envelope.rcpt_tos))
+        return "250 OK"
+
+@pytest.fixture
+def smtp_server():
+    inbox = _Inbox()
+
+    def authenticator(server, session, envelope, mechanism, auth_data):
+        inbox.logins += 1
+        return AuthResult(success=auth_data.login == b"shop" and auth_data.password == b"secret")
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    controller = Controller(inbox, hostname="127.0.0.1", port=port, authenticator=authenticator, auth_require_tls=False)
+    controller.start()
+    try:
+        yield inbox, SmtpConfig(host="127.0.0.1", port=port, secure=False, user="shop", password="secret")
+    finally:
+        smtp_pool.reset()
+        controller.stop()
+
+def test_sessions_are_reused(smtp_server):
+    inbox, config = smtp_server
+    pool = smtp_pool.get_pool(config)
+    for i in range(3):
+        pool.sendmail("shop@example.com", [f"c{i}@example.com"], "Subject: hi\r\n\r\nbody")
+    assert len(inbox.messages) == 3
+    assert inbox.logins == 1
+    assert pool.stats()["created"] == 1 and pool.stats()["reused"] == 2
+
+def test_dead_session_reconnects_transparently(smtp_server):
+    inbox, config = smtp_server
+    pool = smtp_pool.get_pool(config)
+    pool.sendmail("shop@example.com", ["a@example.com"], "Subject: one\r\n\r\nbody")
+    # the server (or a NAT box) drops the idle session behind our back
+    pool._idle[0][0].sock.shutdown(socket.SHUT_RDWR)
+    pool.sendmail("shop@example.com", ["b@example.com"], "Subject: two\r\n\r\nbody")
+    assert [m[1] for m in inbox.messages] == [["a@example.com"], ["b@example.com"]]
+    assert pool.stats()["reconnects"] == 1
+
+def test_settings_change_rebuilds_pool(smtp_server):
+    _, config = smtp_server
+    pool = smtp_pool.get_pool(config)
+    assert smtp_pool.get_pool(config) is pool
+    changed = SmtpConfig(host=config.host, port=config.port, secure=False, user="shop", password="rotated")
+    assert smtp_pool.get_pool(changed) is not pool
+
+def test_drop_after_data_is_not_retried(smtp_server, monkeypatch):
+    inbox, config = smtp_server
+    pool = smtp_pool.get_pool(config)
+    pool.sendmail("shop@example.com", ["a@example.com"], "Subject: one\r\n\r\nbody")
+
+    def dropped_during_data(self, msg):
+        self.data_sent = True
+        raise smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+
+    monkeypatch.setattr(smtp_pool._SMTP, "data", dropped_during_data)
+    # the message may already be queued on the server: resending could deliver it twice
+    with pytest.raises(smtplib.SMTPServerDisconnected):
+        pool.sendmail("shop@example.com", ["b@example.com"], "Subject: two\r\n\r\nbody")
+    assert pool.stats()["reconnects"] == 0 and len(inbox.messages) == 1
+
+def test_password_is_not_in_repr():
+    assert "secret" not in repr(SmtpConfig(host="h", port=25, secure=False, user="shop", password="secret"))
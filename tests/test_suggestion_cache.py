@@ -0,0 +1,131 @@
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler
+from uuid import uuid4
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.db.database import SessionLocal
+from app.models.ai_cache import AiSuggestionCache
+from app.services import suggestion_cache
+
+client = TestClient(app)
+
+EMAIL = "prodadmin@example.com"
+PWD = "testpass123"
+
+def get_token():
+    r = client.post("/api/v1/auth/login", json={"email": EMAIL, "password": PWD})
+    if r.status_code != 200:
+        r = client.post("/api/v1/auth/register", json={"email": EMAIL, "password": PWD})
+    return r.json()["access_token"]
+
+class _OpenAI(BaseHTTPRequestHandler):
+    calls = 0
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        type(self).calls += 1
+        time.sleep(0.1)
+        content = json.dumps({"title": body["messages"][1]["content"].split("\n")[1], "description": "Copy", "tags": "x, y"})
+        data = json.dumps({"choices": [{"message": {"content": content}}]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def openai(openai_server, suggestion_cache_rows):
+    _OpenAI.calls = 0
+    openai_server(_OpenAI)
+    return _OpenAI
+
+def test_key_ignores_formatting_but_not_model_or_prompt():
+    a = suggestion_cache.cache_key({"title": " Blue  Mug", "features": ["Glass", "big"], "language": "sq"}, "m", "1")
+    b = suggestion_cache.cache_key({"title": "blue mug", "features": ["big", "glass ", "Big"], "language": "SQ"}, "m", "1")
+    assert a == b
+    assert a != suggestion_cache.cache_key({"title": "blue mug", "features": ["big", "glass"], "language": "sq"}, "m", "2")
+    assert a != suggestion_cache.cache_key({"title": "blue mug", "features": ["big", "glass"], "language": "sq"}, "m2", "1")
+
+def test_repeat_suggest_is_served_from_cache(openai):
+    headers = {"Authorization": f"Bearer {get_token()}"}
+    body = {"title": f"Mug {uuid4().hex[:6]}", "features": ["glass"]}
+    first = client.post("/api/v1/products/ai/suggest", json=body, headers=headers)
+    assert first.status_code == 200 and first.headers["X-Cache"] == "miss"
+    again = client.post("/api/v1/products/ai/suggest", json={**body, "title": body["title"].upper()}, headers=headers)
+    assert again.headers["X-Cache"] == "hit" and again.json() == first.json()
+    assert again.json()["tags"] == ["x", "y"]
+    assert openai.calls == 1
+    fresh = client.post("/api/v1/products/ai/suggest", json={**body, "force_refresh": True}, headers=headers)
+    assert fresh.headers["X-Cache"] == "miss" and openai.calls == 2
+
+def test_identical_in_flight_requests_share_one_call():
+    calls = []
+
+    async def slow():
+        calls.append(1)
+        await asyncio.sleep(0.1)
+        return "answer"
+
+    async def failing():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        raise RuntimeError("boom")
+
+    async def run():
+        flight = suggestion_cache.SingleFlight()
+        results = await asyncio.gather(*(flight.do("k", slow) for _ in range(5)))
+        errors = await asyncio.gather(*(flight.do("e", failing) for _ in range(3)), return_exceptions=True)
+        return results, errors, flight.in_flight()
+
+    results, errors, left = asyncio.run(run())
+    assert results == ["answer"] * 5 and len(calls) == 2
+    assert all(isinstance(e, RuntimeError) for e in errors) and left == 0
+
+def test_waiters_take_over_when_the_first_caller_is_cancelled():
+    calls = []
+
+    async def slow():
+        calls.append(1)
+        await asyncio.sleep(0.1)
+        return "answer"
+
+    async def run():
+        flight = suggestion_cache.SingleFlight()
+        leader = asyncio.create_task(flight.do("c", slow))
+        await asyncio.sleep(0.01)
+        waiters = [asyncio.create_task(flight.do("c", slow)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        return await asyncio.gather(*waiters), leader.cancelled()
+
+    results, cancelled = asyncio.run(run())
+    assert cancelled and results == ["answer"] * 2 and len(calls) == 2
+
+def test_storing_an_existing_key_overwrites_it(suggestion_cache_rows):
+    key = uuid4().hex
+    with SessionLocal() as db:
+        suggestion_cache.store(db, key, "m", "1", {"description": "old"})
+        suggestion_cache.store(db, key, "m", "1", {"description": "new"})
+        assert suggestion_cache.lookup(db, key) == {"description": "new"}
+
+def test_expired_and_overflowing_entries_are_evicted(monkeypatch, suggestion_cache_rows):
+    monkeypatch.setattr(suggestion_cache.settings, "AI_SUGGEST_CACHE_MAX_ENTRIES", 2)
+    keys = [uuid4().hex for _ in range(3)]
+    with SessionLocal() as db:
+        for k in keys:
+            suggestion_cache.store(db, k, "m", "1", {"description": k})
+            time.sleep(0.01)
+        assert db.query(AiSuggestionCache.key).order_by(AiSuggestionCache.key).all() == [(k,) for k in sorted(keys[1:])]
+        db.query(AiSuggestionCache).filter(AiSuggestionCache.key == keys[1]) \
+            .update({"expires_at": datetime.utcnow() - timedelta(seconds=1)})
+        db.commit()
+        assert suggestion_cache.lookup(db, keys[1]) is None
+        assert suggestion_cache.lookup(db, keys[2]) == {"description": keys[2]}
+        assert suggestion_cache.evict(db) == 1
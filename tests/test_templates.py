@@ -0,0 +1,42 @@
+import pytest
+from jinja2.exceptions import SecurityError
+from app.main import app  # noqa: F401  (registers every model mapper)
+from app.db.database import SessionLocal
+from app.models.admin import AdminSetting
+from app.services import settings_service, templates
+
+NAME = "emails/order_status.html"
+
+def test_template_is_compiled_once_and_escapes():
+    env = templates.environment()
+    html = templates.render(NAME, {"name": "<b>Ana</b>", "message": "ok", "order_number": "A1"})
+    assert "&lt;b&gt;Ana&lt;/b&gt;" in html and "A1" in html
+    assert env.get_template(NAME) is env.get_template(NAME)
+
+def test_settings_override_hot_reloads():
+    db = SessionLocal()
+    try:
+        settings_service.set_setting(db, templates.SETTING_PREFIX + NAME, "<p>Custom {{ order_number }}</p>")
+        assert templates.render(NAME, {"order_number": "B2"}) == "<p>Custom B2</p>"
+        settings_service.set_setting(db, templates.SETTING_PREFIX + NAME, None)
+        assert "Përditësim i Porosisë" in templates.render(NAME, {"order_number": "B2", "message": "m"})
+    finally:
+        db.query(AdminSetting).filter(AdminSetting.key == templates.SETTING_PREFIX + NAME).delete()
+        db.commit()
+        settings_service.invalidate()
+        db.close()
+
+def test_admin_templates_are_sandboxed():
+    tpl = templates.environment().from_string("{{ ''.__class__.__mro__[1].__subclasses__() }}")
+    with pytest.raises(SecurityError):
+        tpl.render()
+
+def test_configured_bytecode_dir_must_be_private(tmp_path, monkeypatch):
+    private = tmp_path / "jinja"
+    monkeypatch.setattr(templates.settings, "TEMPLATE_BYTECODE_DIR", str(private))
+    templates._bytecode_cache()
+    assert private.stat().st_mode & 0o777 == 0o700
+
+    private.chmod(0o777)
+    with pytest.raises(RuntimeError):
+        templates._bytecode_cache()